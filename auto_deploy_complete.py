@@ -9,6 +9,8 @@ import time
 import json
 from datetime import datetime
 
+from deployment_profiler import PROFILER, trace_file_name
+
 try:
     import paramiko
     from paramiko import SSHClient, AutoAddPolicy
@@ -56,7 +58,8 @@ def log_phase(phase_name, status, details=""):
 
 
 def print_header(text):
-    """Print formatted header"""
+    """Print formatted header; every header starts a profiled phase"""
+    PROFILER.phase(text)
     print("\n" + "="*70)
     print(f"🚀 {text}")
     print("="*70 + "\n")
@@ -64,25 +67,30 @@ def print_header(text):
 
 def execute_ssh_command(ssh, command, timeout=300):
     """Execute SSH command and return output"""
-    try:
-        stdin, stdout, stderr = ssh.exec_command(command, timeout=timeout)
-        exit_status = stdout.channel.recv_exit_status()
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-
-        return {
-            "exit_code": exit_status,
-            "output": output,
-            "error": error,
-            "success": exit_status == 0
-        }
-    except Exception as e:
-        return {
-            "exit_code": -1,
-            "output": "",
-            "error": str(e),
-            "success": False
-        }
+    with PROFILER.command(command) as span:
+        try:
+            stdin, stdout, stderr = ssh.exec_command(command, timeout=timeout)
+            exit_status = stdout.channel.recv_exit_status()
+            span.add(remote_seconds=span.duration)
+            output = stdout.read()
+            error = stderr.read()
+            span.add(sent=len(command.encode('utf-8')), received=len(output) + len(error),
+                     exit_code=exit_status)
+
+            return {
+                "exit_code": exit_status,
+                "output": output.decode('utf-8'),
+                "error": error.decode('utf-8'),
+                "success": exit_status == 0
+            }
+        except Exception as e:
+            span.add(error=str(e))
+            return {
+                "exit_code": -1,
+                "output": "",
+                "error": str(e),
+                "success": False
+            }
 
 
 def phase1_connect_ssh():
@@ -598,6 +606,10 @@ def print_final_report():
     print(f"🎯 Deployment completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*70 + "\n")
 
+    trace_file = trace_file_name()
+    print(PROFILER.finish(trace_file))
+    print(f"\n⏱️  Chrome trace: {trace_file} (chrome://tracing or ui.perfetto.dev)\n")
+
 
 def main():
     """Main deployment function"""
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Manifest-based delta sync for the FTP/SFTP deployers.
+
+A manifest maps each remote path (relative to the deploy root) to the size,
+mtime and SHA-256 of the local file.  The manifest of the last successful
+deploy is kept on the server beside the deploy root (manifest_path()), never
+inside it: the docroot serves *.json files and the manifest lists every
+deployed path with its hash.  A deploy diffs the local manifest against it and only transfers added and changed
+files, optionally deleting files that disappeared locally.  Hashes are reused
+from a local cache while a file's size and mtime are unchanged, so building
+the manifest of an unchanged tree does not re-read it.
+
+The transport is supplied by the deployer (ftp_deploy.py, upload_laravel_files.py):
+
+    read_manifest() -> Optional[bytes]     # None when the server has none yet
+    upload(files)   -> List[str]           # [(local Path, remote rel)] -> rels that succeeded
+    delete(rels)    -> List[str]           # rels that were removed
+    write_manifest(data: bytes)
+
+    sources = [(Path('app'), 'app'), (Path('public'), 'public')]
+    plan = sync(transport, build_manifest(sources, cache=CACHE), delete=False)
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Earlier deploys kept the manifest under this name inside the deploy root
+MANIFEST_NAME = ".deploy-manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK = 1024 * 1024
+
+# remote path -> {'size', 'mtime', 'sha256'}
+Manifest = Dict[str, Dict]
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_path(root: str) -> str:
+    """'/home/u/public_html' -> '/home/u/.deploy-manifest-public_html.json'"""
+    parent, name = posixpath.split(root.rstrip('/'))
+    return posixpath.join(parent, f".deploy-manifest-{name}.json")
+
+
+def load_manifest(data: Optional[bytes]) -> Manifest:
+    """Files of a serialised manifest ({} for None or an unreadable one)"""
+    if not data:
+        return {}
+    try:
+        document = json.loads(data.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError):
+        return {}
+    if not isinstance(document, dict) or document.get('version') != MANIFEST_VERSION:
+        return {}
+    return document.get('files', {})
+
+
+def dump_manifest(files: Manifest) -> bytes:
+    return json.dumps({'version': MANIFEST_VERSION, 'files': files},
+                      sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def normalize_remote(path: str) -> str:
+    """'./public//css/' -> 'public/css'"""
+    return '/'.join(part for part in path.replace('\\', '/').split('/') if part not in ('', '.'))
+
+
+def walk_sources(sources: Sequence[Tuple[Path, str]],
+                 exclude: Optional[Callable[[Path], bool]] = None) -> Iterable[Tuple[Path, str]]:
+    """(local file, remote path) for every file under the (local dir or file, remote prefix) sources"""
+    for local, remote in sources:
+        local = Path(local)
+        remote = normalize_remote(remote)
+        if local.is_file():
+            if not (exclude and exclude(local)):
+                yield local, remote or local.name
+            continue
+        if not local.is_dir():
+            continue
+        for root, dirs, files in os.walk(local):
+            root_path = Path(root)
+            if exclude:
+                dirs[:] = [d for d in dirs if not exclude(root_path / d)]
+            dirs.sort()
+            relative = root_path.relative_to(local).as_posix()
+            prefix = '/'.join(part for part in (remote, relative) if part and part != '.')
+            for name in sorted(files):
+                path = root_path / name
+                if exclude and exclude(path):
+                    continue
+                yield path, f"{prefix}/{name}" if prefix else name
+
+
+class LocalManifest:
+    """Manifest of the local tree, plus the local files behind it"""
+
+    def __init__(self, files: Manifest, paths: Dict[str, Path]):
+        self.files = files
+        self.paths = paths
+
+
+def build_manifest(sources: Sequence[Tuple[Path, str]],
+                   exclude: Optional[Callable[[Path], bool]] = None,
+                   cache: Optional[Path] = None) -> LocalManifest:
+    """Hash the source trees, reusing cached hashes of files whose size and mtime did not change"""
+    cached: Manifest = {}
+    if cache and cache.exists():
+        cached = load_manifest(cache.read_bytes())
+    files: Manifest = {}
+    paths: Dict[str, Path] = {}
+    for path, remote in walk_sources(sources, exclude):
+        stat = path.stat()
+        previous = cached.get(remote)
+        if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime_ns:
+            digest = previous['sha256']
+        else:
+            digest = file_sha256(path)
+        files[remote] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': digest}
+        paths[remote] = path
+    if cache:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        temp = cache.with_name(cache.name + '.tmp')
+        temp.write_bytes(dump_manifest(files))
+        os.replace(temp, cache)
+    return LocalManifest(files, paths)
+
+
+class SyncPlan:
+    """Difference between the local tree and the remote manifest"""
+
+    def __init__(self, local: LocalManifest, remote: Manifest, scope: Optional[Sequence[str]] = None):
+        self.local = local
+        self.remote = remote
+        self.added = sorted(set(local.files) - set(remote))
+        self.changed = sorted(path for path in set(local.files) & set(remote)
+                              if local.files[path]['sha256'] != remote[path].get('sha256')
+                              or local.files[path]['size'] != remote[path].get('size'))
+        # Only files under the synced prefixes are candidates for deletion
+        self.removed = sorted(path for path in set(remote) - set(local.files)
+                              if scope is None or any(path == p or path.startswith(p.rstrip('/') + '/')
+                                                      for p in scope))
+        self.unchanged = len(local.files) - len(self.added) - len(self.changed)
+
+    @property
+    def transfers(self) -> List[Tuple[Path, str]]:
+        return [(self.local.paths[path], path) for path in self.added + self.changed]
+
+    @property
+    def transfer_bytes(self) -> int:
+        return sum(self.local.files[path]['size'] for path in self.added + self.changed)
+
+    def describe(self) -> str:
+        return (f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed, "
+                f"{self.unchanged} unchanged ({self.transfer_bytes / 1024 / 1024:.1f} MB to send)")
+
+
+def sync(transport, local: LocalManifest, delete: bool = False, full: bool = False,
+         dry_run: bool = False, scope: Optional[Sequence[str]] = None,
+         log: Callable[[str], None] = print) -> SyncPlan:
+    """Bring the remote tree up to date with `local` and store the new remote manifest.
+
+    `full` ignores the remote manifest and sends everything.  The manifest
+    written back only records files that were actually transferred (or were
+    already current), so a partly failed sync is retried on the next run.
+    """
+    remote = {} if full else load_manifest(transport.read_manifest())
+    if not remote and not full:
+        log("No manifest on the server yet: full upload")
+    plan = SyncPlan(local, remote, scope)
+    log(f"Sync plan: {plan.describe()}")
+    if dry_run:
+        return plan
+
+    updated = dict(remote)
+    if plan.transfers:
+        for path in transport.upload(plan.transfers):
+            updated[path] = local.files[path]
+    if delete and plan.removed:
+        for path in transport.delete(plan.removed):
+            updated.pop(path, None)
+    transport.write_manifest(dump_manifest(updated))
+    failed = len(plan.transfers) - sum(1 for path in plan.added + plan.changed
+                                       if updated.get(path) == local.files[path])
+    if failed:
+        log(f"⚠️ {failed} file(s) failed to upload; they will be retried on the next deploy")
+    return plan
@@ -21,6 +21,8 @@ from datetime import datetime
 import paramiko
 from paramiko import SSHClient, AutoAddPolicy
 
+from deployment_profiler import PROFILER, trace_file_name
+
 # Configuration
 SSH_HOST = "45.87.81.218"
 SSH_PORT = 65002
@@ -39,14 +41,18 @@ def log_phase(phase, status, details=""):
     deployment_log["phases"].append({"phase": phase, "status": status, "details": details, "timestamp": datetime.now().isoformat()})
 
 def execute_ssh(ssh, cmd, timeout=300):
-    try:
-        stdin, stdout, stderr = ssh.exec_command(cmd, timeout=timeout)
-        exit_code = stdout.channel.recv_exit_status()
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-        return {"exit_code": exit_code, "output": output, "error": error, "success": exit_code == 0}
-    except Exception as e:
-        return {"exit_code": -1, "output": "", "error": str(e), "success": False}
+    with PROFILER.command(cmd) as span:
+        try:
+            stdin, stdout, stderr = ssh.exec_command(cmd, timeout=timeout)
+            exit_code = stdout.channel.recv_exit_status()
+            span.add(remote_seconds=span.duration)
+            output = stdout.read()
+            error = stderr.read()
+            span.add(sent=len(cmd.encode('utf-8')), received=len(output) + len(error), exit_code=exit_code)
+            return {"exit_code": exit_code, "output": output.decode('utf-8'), "error": error.decode('utf-8'), "success": exit_code == 0}
+        except Exception as e:
+            span.add(error=str(e))
+            return {"exit_code": -1, "output": "", "error": str(e), "success": False}
 
 def main():
     print("\n" + "="*70)
@@ -58,6 +64,7 @@ def main():
     print("="*70 + "\n")
 
     # PHASE 1: Connect SSH
+    PROFILER.phase("PHASE 1: Connecting to SSH")
     print("\n" + "="*70)
     print("PHASE 1: Connecting to SSH")
     print("="*70 + "\n")
@@ -83,6 +90,7 @@ def main():
         return False
 
     # PHASE 2: Verify Files
+    PROFILER.phase("PHASE 2: Verifying Files")
     print("\n" + "="*70)
     print("PHASE 2: Verifying Files")
     print("="*70 + "\n")
@@ -130,6 +138,7 @@ def main():
         return False
 
     # PHASE 3: Create Database
+    PROFILER.phase("PHASE 3: Creating Database")
     print("\n" + "="*70)
     print("PHASE 3: Creating Database")
     print("="*70 + "\n")
@@ -185,6 +194,7 @@ DB_PASSWORD={db_password}
         return False
 
     # PHASE 4: Configure Environment
+    PROFILER.phase("PHASE 4: Configuring Environment")
     print("\n" + "="*70)
     print("PHASE 4: Configuring Environment")
     print("="*70 + "\n")
@@ -274,6 +284,7 @@ GOOGLE_ANALYTICS_ID=
         return False
 
     # PHASE 5: Set Permissions
+    PROFILER.phase("PHASE 5: Setting Permissions")
     print("\n" + "="*70)
     print("PHASE 5: Setting Permissions")
     print("="*70 + "\n")
@@ -292,6 +303,7 @@ GOOGLE_ANALYTICS_ID=
     log_phase("Permissions", "success", "Storage and cache permissions configured")
 
     # PHASE 6: Optimize Laravel
+    PROFILER.phase("PHASE 6: Optimizing Laravel")
     print("\n" + "="*70)
     print("PHASE 6: Optimizing Laravel")
     print("="*70 + "\n")
@@ -324,6 +336,7 @@ GOOGLE_ANALYTICS_ID=
     log_phase("Laravel Optimization", "success", "Caches built, composer optimized")
 
     # PHASE 7: Run Migrations
+    PROFILER.phase("PHASE 7: Running Migrations")
     print("\n" + "="*70)
     print("PHASE 7: Running Migrations")
     print("="*70 + "\n")
@@ -355,6 +368,7 @@ GOOGLE_ANALYTICS_ID=
         return False
 
     # PHASE 8: Configure .htaccess
+    PROFILER.phase("PHASE 8: Configuring Web Server")
     print("\n" + "="*70)
     print("PHASE 8: Configuring Web Server")
     print("="*70 + "\n")
@@ -395,6 +409,7 @@ GOOGLE_ANALYTICS_ID=
     log_phase("Web Server Configuration", "success", "htaccess configured")
 
     # PHASE 9: Final Verification
+    PROFILER.phase("PHASE 9: Final Verification")
     print("\n" + "="*70)
     print("PHASE 9: Final Verification")
     print("="*70 + "\n")
@@ -462,6 +477,10 @@ GOOGLE_ANALYTICS_ID=
     print(f"Deployment completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*70 + "\n")
 
+    trace_file = trace_file_name()
+    print(PROFILER.finish(trace_file))
+    print(f"\nChrome trace: {trace_file} (chrome://tracing or ui.perfetto.dev)\n")
+
     ssh.close()
     print("[CLOSED] SSH connection closed\n")
 
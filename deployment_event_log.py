@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Append-only structured event log for the deployment scripts.
+
+Every event is one JSON line appended to `<name>.jsonl`; nothing is re-read
+on write, so logging stays O(1) however long a deployment runs.  Writes are
+buffered and fsync'ed in batches (every FSYNC_EVERY events or FSYNC_INTERVAL
+seconds, and on close), and a crash can at worst leave one torn last line,
+which readers skip.  The pretty JSON array the scripts used to maintain
+(`<name>.json`) is produced on demand by compact():
+
+    log = EventLog(project_root / "master_deployment_log.json")
+    log.append({"action": "...", "status": "SUCCESS"})
+    log.compact()   # writes master_deployment_log.json atomically
+
+    python3 deployment_event_log.py master_deployment_log.json   # compact from the shell
+"""
+
+import argparse
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+FSYNC_EVERY = 32
+FSYNC_INTERVAL = 1.0
+
+
+class EventLog:
+    """JSON Lines event log with a compacted JSON view at `view`"""
+
+    def __init__(self, view: Union[str, Path], fsync_every: int = FSYNC_EVERY,
+                 fsync_interval: float = FSYNC_INTERVAL):
+        self.view = Path(view)
+        self.path = self.view.with_suffix('.jsonl')
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.file = None
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        atexit.register(self.close)
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fresh = not self.path.exists()
+        self.file = open(self.path, 'a', encoding='utf-8')
+        if fresh:
+            # Carry over the entries of a view written by the old read-modify-write logger
+            for entry in self._view_entries():
+                self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        elif self.path.stat().st_size and not self._ends_with_newline():
+            # Terminate a line torn by a crash so the next event starts cleanly
+            self.file.write('\n')
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _view_entries(self) -> List[Dict]:
+        if not self.view.exists():
+            return []
+        try:
+            with open(self.view, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return entries if isinstance(entries, list) else []
+
+    def append(self, entry: Dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            if self.file is None:
+                self._open()
+            self.file.write(line)
+            self.pending += 1
+            if (self.pending >= self.fsync_every
+                    or time.monotonic() - self.last_sync >= self.fsync_interval):
+                self._sync()
+
+    def _sync(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def flush(self) -> None:
+        """Make every appended event durable"""
+        with self.lock:
+            if self.file is not None and self.pending:
+                self._sync()
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+            if self.pending:
+                self._sync()
+            self.file.close()
+            self.file = None
+
+    def entries(self) -> Iterator[Dict]:
+        """Logged events, oldest first"""
+        self.flush()
+        if not self.path.exists():
+            yield from self._view_entries()
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn line from a crash mid-write
+                    continue
+
+    def compact(self, view: Optional[Path] = None) -> Path:
+        """Write the events as an indented JSON array (atomically) and return its path"""
+        target = Path(view) if view else self.view
+        entries = list(self.entries())
+        fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, target)
+        except BaseException:
+            if os.path.exists(temp):
+                os.unlink(temp)
+            raise
+        return target
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compact a deployment event log into its JSON view")
+    parser.add_argument('logs', nargs='+', type=Path,
+                        help='JSON views (or their .jsonl logs), e.g. master_deployment_log.json')
+    args = parser.parse_args()
+
+    for log in args.logs:
+        view = log.with_suffix('.json')
+        events = EventLog(view)
+        written = events.compact()
+        print(f"{written}: {sum(1 for _ in events.entries())} events")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
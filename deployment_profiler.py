@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Span profiler for the SSH deployment scripts.
+
+Each deployment phase and each remote command becomes a span with its start,
+end, bytes sent/received and, for commands, the time until the remote exit
+status arrived.  At the end of a run the spans are written as a Chrome trace
+(open in chrome://tracing or https://ui.perfetto.dev) and summarised as an
+indented flame-style table, so it is obvious whether composer, migrations or
+file transfer dominated a deployment:
+
+    PROFILER.phase("PHASE 6: Optimizing Laravel")      # ends the previous phase
+    with PROFILER.command(command) as span:
+        ...
+        span.add(received=len(output), remote_seconds=elapsed)
+    print(PROFILER.finish("deployment_trace.json"))
+
+The summary is plain ASCII so it prints on Windows consoles too.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+# Commands are grouped in the summary by their first characters
+COMMAND_LABEL_LENGTH = 60
+SUMMARY_DEPTH = 3
+SUMMARY_CHILDREN = 8
+BAR_WIDTH = 20
+
+
+class Span:
+    """One timed region; `args` end up in the trace event"""
+
+    def __init__(self, name: str, category: str, start: float, parent: Optional['Span']):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end: Optional[float] = None
+        self.parent = parent
+        self.args: Dict[str, Union[int, float, str]] = {}
+
+    def add(self, **values) -> None:
+        """Accumulate counters (bytes, remote seconds) or set other arguments"""
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and isinstance(self.args.get(key), (int, float)):
+                self.args[key] += value
+            else:
+                self.args[key] = value
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    @property
+    def path(self) -> List[str]:
+        span, names = self, []
+        while span is not None:
+            names.append(span.name)
+            span = span.parent
+        return names[::-1]
+
+
+def command_label(command: str) -> str:
+    label = ' '.join(command.split())
+    return label if len(label) <= COMMAND_LABEL_LENGTH else label[:COMMAND_LABEL_LENGTH - 3] + '...'
+
+
+class Profiler:
+    def __init__(self, name: str = 'deployment'):
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.root = Span(name, 'run', self.origin, None)
+        self.spans: List[Span] = [self.root]
+        self.stack: List[Span] = [self.root]
+        self.current_phase: Optional[Span] = None
+
+    def _open(self, name: str, category: str) -> Span:
+        with self.lock:
+            span = Span(name, category, time.perf_counter(), self.stack[-1])
+            self.spans.append(span)
+            self.stack.append(span)
+        return span
+
+    def _close(self, span: Span) -> None:
+        with self.lock:
+            span.end = time.perf_counter()
+            if span not in self.stack:
+                return
+            # Spans opened inside `span` and never closed end with it
+            while True:
+                top = self.stack.pop()
+                if top.end is None:
+                    top.end = span.end
+                if top is span:
+                    break
+
+    @contextmanager
+    def span(self, name: str, category: str = 'step') -> Iterator[Span]:
+        span = self._open(name, category)
+        try:
+            yield span
+        finally:
+            self._close(span)
+            self._propagate(span)
+
+    def command(self, command: str):
+        """Span of one remote command, labelled with its (shortened) text"""
+        return self.span(command_label(command), 'ssh')
+
+    def phase(self, name: str) -> Span:
+        """End the running phase (if any) and start `name`"""
+        self.end_phase()
+        self.current_phase = self._open(name, 'phase')
+        return self.current_phase
+
+    def end_phase(self) -> None:
+        if self.current_phase is not None and self.current_phase.end is None:
+            self._close(self.current_phase)
+        self.current_phase = None
+
+    def _propagate(self, span: Span) -> None:
+        """Roll byte and remote-time counters up into the enclosing spans"""
+        counters = {key: value for key, value in span.args.items()
+                    if key in ('sent', 'received', 'remote_seconds')}
+        if not counters:
+            return
+        parent = span.parent
+        while parent is not None:
+            parent.add(**counters)
+            parent = parent.parent
+
+    def finish(self, trace_file: Optional[Union[str, Path]] = None) -> str:
+        """Close open spans, write the Chrome trace if asked, return the text summary"""
+        self.end_phase()
+        self.root.end = time.perf_counter()
+        if trace_file:
+            self.write_chrome_trace(trace_file)
+        return self.summary()
+
+    # Chrome trace ("X" complete events, microseconds)
+
+    def trace_events(self) -> List[Dict]:
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                   'args': {'name': self.root.name}}]
+        for span in self.spans:
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round((span.start - self.origin) * 1e6),
+                'dur': round(span.duration * 1e6),
+                'pid': pid,
+                'tid': 0,
+                'args': dict(span.args),
+            })
+        return events
+
+    def write_chrome_trace(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    # Flame-style summary
+
+    def _tree(self) -> Dict:
+        """Spans merged by call path: {name: {'time', 'count', 'args', 'children'}}"""
+        tree: Dict = {'time': 0.0, 'count': 0, 'args': {}, 'children': {}}
+        for span in self.spans:
+            node = tree
+            for name in span.path:
+                node = node['children'].setdefault(
+                    name, {'time': 0.0, 'count': 0, 'args': {}, 'children': {}})
+            node['time'] += span.duration
+            node['count'] += 1
+            for key in ('sent', 'received', 'remote_seconds'):
+                if key in span.args:
+                    node['args'][key] = node['args'].get(key, 0) + span.args[key]
+        return tree
+
+    def summary(self) -> str:
+        total = self.root.duration or 1e-9
+        commands = sum(1 for span in self.spans if span.category == 'ssh')
+        moved = self.root.args.get('sent', 0) + self.root.args.get('received', 0)
+        lines = [f"Deployment profile: {total:.1f}s, {commands} remote commands, {format_bytes(moved)} moved",
+                 f"  {'time':>8} {'share':>6} {'':{BAR_WIDTH}}  {'remote':>8} {'bytes':>9}  span"]
+
+        def render(name: str, node: Dict, depth: int) -> None:
+            share = node['time'] / total
+            bar = '#' * max(1, round(share * BAR_WIDTH)) if node['time'] else ''
+            remote = node['args'].get('remote_seconds')
+            data = node['args'].get('sent', 0) + node['args'].get('received', 0)
+            count = f" x{node['count']}" if node['count'] > 1 else ''
+            lines.append(f"  {node['time']:>7.1f}s {share:>6.1%} {bar:<{BAR_WIDTH}}  "
+                         f"{(f'{remote:.1f}s' if remote is not None else ''):>8} "
+                         f"{(format_bytes(data) if data else ''):>9}  {'  ' * depth}{name}{count}")
+            if depth + 1 >= SUMMARY_DEPTH:
+                return
+            children = sorted(node['children'].items(), key=lambda item: -item[1]['time'])
+            for child_name, child in children[:SUMMARY_CHILDREN]:
+                render(child_name, child, depth + 1)
+            if len(children) > SUMMARY_CHILDREN:
+                rest = children[SUMMARY_CHILDREN:]
+                lines.append(f"  {sum(c['time'] for _, c in rest):>7.1f}s {'':>6} {'':{BAR_WIDTH}}  "
+                             f"{'':>8} {'':>9}  {'  ' * (depth + 1)}... {len(rest)} more")
+
+        for name, node in self._tree()['children'].items():
+            render(name, node, 0)
+        return '\n'.join(lines)
+
+
+def format_bytes(count: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
+
+
+def trace_file_name() -> str:
+    return f"deployment_trace_{time.strftime('%Y%m%d_%H%M%S')}.json"
+
+
+# Shared by the deployment entry points; each script is one process, one run
+PROFILER = Profiler()
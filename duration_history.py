@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Persisted per-command wall-time history for the COPRRA test/tool runners.
+
+Samples come from the `execution_time` values Task4Executor writes to
+reports/task4_execution/batch_logs/*.json (and from any runner that calls
+record()).  The history is used to order work longest-processing-time-first
+and to estimate the makespan of a run before it starts.
+"""
+
+import heapq
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+HISTORY_FILE = Path("reports/task4_execution/duration_history.json")
+BATCH_LOGS_DIR = Path("reports/task4_execution/batch_logs")
+MAX_SAMPLES = 50
+DEFAULT_DURATION = 30.0
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Linear-interpolated percentile of a non-empty sample list"""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def estimate_makespan(durations: Iterable[float], workers: int) -> float:
+    """Greedy LPT list-scheduling estimate of the total run time"""
+    slots = [0.0] * max(1, workers)
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(slots, slots[0] + duration)
+    return max(slots)
+
+
+def estimate_batched_makespan(durations: List[float], workers: int, batch_size: int,
+                              pause: float = 0.0) -> float:
+    """Run time of lock-step batches: each batch waits for its slowest item, then pauses"""
+    batches = [durations[i:i + batch_size] for i in range(0, len(durations), max(1, batch_size))]
+    return (sum(estimate_makespan(batch, workers) for batch in batches)
+            + pause * max(0, len(batches) - 1))
+
+
+class DurationHistory:
+    """Per-command p50/p95 wall time, persisted as JSON"""
+
+    def __init__(self, path: Path = HISTORY_FILE):
+        self.path = Path(path)
+        self.samples: Dict[str, List[float]] = {}
+        self.ingested: Dict[str, str] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.samples = {cmd: entry['samples'] for cmd, entry in data.get('commands', {}).items()}
+        self.ingested = data.get('ingested', {})
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'commands': {
+                cmd: {
+                    'samples': samples,
+                    'p50': round(percentile(samples, 0.5), 3),
+                    'p95': round(percentile(samples, 0.95), 3),
+                }
+                for cmd, samples in sorted(self.samples.items()) if samples
+            },
+            'ingested': self.ingested,
+        }
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def record(self, command: str, duration: float) -> None:
+        samples = self.samples.setdefault(command, [])
+        samples.append(round(float(duration), 3))
+        del samples[:-MAX_SAMPLES]
+
+    def ingest_batch_logs(self, logs_dir: Path = BATCH_LOGS_DIR) -> int:
+        """Import execution times from batch logs not seen before; returns samples added"""
+        added = 0
+        if not Path(logs_dir).is_dir():
+            return added
+        for log_file in sorted(Path(logs_dir).glob('*.json')):
+            stat = log_file.stat()
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+            if self.ingested.get(str(log_file)) == signature:
+                continue
+            try:
+                with open(log_file, 'r', encoding='utf-8') as f:
+                    batch = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for test in batch.get('tests', []):
+                if test.get('command') and test.get('execution_time'):
+                    self.record(test['command'], test['execution_time'])
+                    added += 1
+            self.ingested[str(log_file)] = signature
+        return added
+
+    def p50(self, command: str) -> Optional[float]:
+        samples = self.samples.get(command)
+        return percentile(samples, 0.5) if samples else None
+
+    def p95(self, command: str) -> Optional[float]:
+        samples = self.samples.get(command)
+        return percentile(samples, 0.95) if samples else None
+
+    def estimate(self, command: str, default: Optional[float] = None) -> float:
+        """Expected duration (p50), falling back to `default` or the history median"""
+        known = self.p50(command)
+        if known is not None:
+            return known
+        if default is not None:
+            return default
+        medians = [percentile(s, 0.5) for s in self.samples.values() if s]
+        return percentile(medians, 0.5) if medians else DEFAULT_DURATION
+
+    def order_longest_first(self, items: List[Any], command: Callable[[Any], str],
+                            default: Callable[[Any], Optional[float]] = lambda item: None) -> List[Any]:
+        """Stable longest-processing-time-first ordering of `items`"""
+        return sorted(items, key=lambda item: self.estimate(command(item), default(item)), reverse=True)
+
+    def print_makespan_table(self, durations: List[float], workers: int,
+                             batch_size: Optional[int] = None, pause: float = 0.0) -> None:
+        """Print makespan estimates for a range of worker counts around `workers`.
+
+        With `batch_size`, `durations` are in execution order and run as
+        lock-step batches separated by `pause` seconds.
+        """
+        total = sum(durations)
+        longest = max(durations, default=0.0)
+        print(f"Estimated work: {total / 60:.1f} min across {len(durations)} items "
+              f"(longest item {longest:.0f}s)")
+        counts = sorted({1, 2, 4, 8, 16, workers})
+        for count in counts:
+            marker = '  <- configured' if count == workers else ''
+            if batch_size:
+                makespan = estimate_batched_makespan(durations, count, batch_size, pause)
+            else:
+                makespan = estimate_makespan(durations, count)
+            print(f"  {count:>2} workers: ~{makespan / 60:.1f} min{marker}")
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Test-duration regression detector over the JUnit runs in junit_store.
+
+A run is compared against a rolling baseline of the previous runs with the
+same label (phpunit_pool.py labels each run with its suite set, so pooled
+suite runs are only compared with runs of the same suites).  For every
+test case (and every suite) the baseline median and MAD (median absolute
+deviation) are computed; a duration is a regression when it is both a robust
+outlier ((current - median) / scaled MAD above the threshold) and materially
+slower (ratio and absolute increase above their minimums), so noisy but cheap
+tests do not trip the gate.
+
+    python3 duration_regression.py test-report.xml --baseline 10 --markdown reports/regressions.md
+
+The exit code is 1 when regressions were found, for CI gating.
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from statistics import median
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from junit_store import STORE_FILE, JUnitIngester, connect, file_sha256
+from report_renderer import Report, render_markdown
+
+BASELINE_RUNS = 10
+# A baseline with fewer runs is too noisy to judge
+MIN_BASELINE_RUNS = 3
+THRESHOLD = 3.5
+MIN_RATIO = 1.5
+MIN_INCREASE_SECONDS = 0.1
+# MAD of normally distributed data * 1.4826 estimates the standard deviation
+MAD_SCALE = 1.4826
+# Floor for the spread so perfectly stable tests are not flagged on noise
+MIN_SPREAD_FRACTION = 0.05
+MIN_SPREAD_SECONDS = 0.01
+MAX_ROWS = 25
+# Report the latest run of every label ingested this long before the newest run
+HEAD_WINDOW_HOURS = 12
+
+
+class Regression:
+    """One test case or suite that got slower than its baseline"""
+    def __init__(self, kind: str, name: str, baseline: float, spread: float,
+                 current: float, samples: int):
+        self.kind = kind
+        self.name = name
+        self.baseline = baseline
+        self.spread = spread
+        self.current = current
+        self.samples = samples
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float('inf')
+
+    @property
+    def score(self) -> float:
+        return (self.current - self.baseline) / self.spread
+
+
+def robust_baseline(samples: List[float]) -> Tuple[float, float]:
+    """(median, scaled MAD with a floor)"""
+    middle = median(samples)
+    mad = median(abs(sample - middle) for sample in samples) * MAD_SCALE
+    return middle, max(mad, middle * MIN_SPREAD_FRACTION, MIN_SPREAD_SECONDS)
+
+
+def find_regressions(history: Dict[str, List[float]], current: Dict[str, float], kind: str,
+                     threshold: float = THRESHOLD, min_ratio: float = MIN_RATIO,
+                     min_increase: float = MIN_INCREASE_SECONDS) -> List[Regression]:
+    regressions = []
+    for name, duration in current.items():
+        samples = history.get(name)
+        if not samples or len(samples) < MIN_BASELINE_RUNS:
+            continue
+        baseline, spread = robust_baseline(samples)
+        regression = Regression(kind, name, baseline, spread, duration, len(samples))
+        if (regression.score > threshold and regression.ratio >= min_ratio
+                and duration - baseline >= min_increase):
+            regressions.append(regression)
+    return sorted(regressions, key=lambda r: r.current - r.baseline, reverse=True)
+
+
+def _durations(connection: sqlite3.Connection, query: str, runs: List[int]) -> Dict[int, Dict[str, float]]:
+    by_run: Dict[int, Dict[str, float]] = {run: {} for run in runs}
+    marks = ','.join('?' * len(runs))
+    for run_id, name, time in connection.execute(query.format(marks=marks), runs):
+        # Data-provider cases share a name; their times add up
+        by_run[run_id][name] = by_run[run_id].get(name, 0.0) + (time or 0.0)
+    return by_run
+
+
+CASE_QUERY = "SELECT run_id, class || '::' || name, time FROM cases WHERE run_id IN ({marks})"
+# The root suite is the whole run; its time is already in the run totals
+SUITE_QUERY = "SELECT run_id, name, time FROM suites WHERE run_id IN ({marks}) AND parent_id IS NOT NULL"
+
+
+def detect(connection: sqlite3.Connection, head: int, baseline_runs: int = BASELINE_RUNS,
+           threshold: float = THRESHOLD) -> Tuple[List[Regression], List[int]]:
+    """Regressions of run `head` against up to `baseline_runs` earlier runs with its label"""
+    baseline = [row[0] for row in connection.execute(
+        "SELECT id FROM runs WHERE id < ? AND label IS (SELECT label FROM runs WHERE id = ?) "
+        "ORDER BY id DESC LIMIT ?", (head, head, baseline_runs))]
+    regressions: List[Regression] = []
+    if not baseline:
+        return regressions, baseline
+
+    for kind, query in (('suite', SUITE_QUERY), ('case', CASE_QUERY)):
+        by_run = _durations(connection, query, baseline + [head])
+        current = by_run.pop(head)
+        history: Dict[str, List[float]] = {}
+        for durations in by_run.values():
+            for name, duration in durations.items():
+                history.setdefault(name, []).append(duration)
+        regressions.extend(find_regressions(history, current, kind, threshold))
+    return regressions, baseline
+
+
+def section(regressions: List[Regression], baseline: List[int],
+            head: Optional[int] = None, threshold: float = THRESHOLD) -> Report:
+    """Report section for the runners' reports"""
+    report = Report(data={'duration_regressions': []})
+    report.heading("⏱ تراجعات مدة الاختبارات")
+    return describe_run(report, regressions, baseline, head, threshold)
+
+
+def describe_run(report: Report, regressions: List[Regression], baseline: List[int],
+                 head: Optional[int] = None, threshold: float = THRESHOLD,
+                 label: Optional[str] = None) -> Report:
+    """Append the findings for one run to `report`"""
+    report.data['duration_regressions'].extend(dict(vars(r), run=head) for r in regressions)
+    run = f"التشغيل {head} " if head else ''
+    if label:
+        run += f"(`{label}`) "
+    if len(baseline) < MIN_BASELINE_RUNS:
+        return report.paragraph(f"{run}خط الأساس غير كافٍ ({len(baseline)} من {MIN_BASELINE_RUNS} تشغيلات على الأقل).")
+    report.paragraph(f"{run}مقارنة بآخر {len(baseline)} تشغيلات (الوسيط/MAD، العتبة {threshold}).")
+    if not regressions:
+        return report.paragraph("✓ لا توجد تراجعات في المدة.")
+
+    suites = sum(1 for r in regressions if r.kind == 'suite')
+    report.paragraph(f"**✗ {len(regressions) - suites} اختبار و {suites} مجموعة أبطأ من خط الأساس**")
+    report.table(["Kind", "Test", "Baseline", "Now", "Ratio", "Score"],
+                 ([r.kind, f"`{r.name}`", f"{r.baseline:.3f}s", f"{r.current:.3f}s",
+                   f"×{r.ratio:.1f}", f"{r.score:.1f}"] for r in regressions[:MAX_ROWS]),
+                 align='llrrrr')
+    if len(regressions) > MAX_ROWS:
+        report.paragraph(f"… و {len(regressions) - MAX_ROWS} أخرى")
+    return report
+
+
+def markdown_section(regressions: List[Regression], baseline: List[int],
+                     head: Optional[int] = None, threshold: float = THRESHOLD) -> str:
+    return render_markdown(section(regressions, baseline, head, threshold))
+
+
+def latest_runs(connection: sqlite3.Connection) -> List[Tuple[int, Optional[str]]]:
+    """(id, label) of the newest run of every label ingested with the newest run overall.
+
+    A pooled PHPUnit run ingests one run per suite, so "the latest run" is
+    the set of per-suite runs, not only whichever suite finished last.
+    """
+    row = connection.execute("SELECT ingested_at FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+    if row is None:
+        return []
+    since = (datetime.fromisoformat(row[0]) - timedelta(hours=HEAD_WINDOW_HOURS)).isoformat()
+    return [tuple(r) for r in connection.execute(
+        "SELECT MAX(id), label FROM runs WHERE ingested_at >= ? GROUP BY label ORDER BY MAX(id)", (since,))]
+
+
+def stored_section(store: Path = STORE_FILE) -> Optional[Report]:
+    """Section for the latest stored runs, or None when no JUnit runs are stored"""
+    if not store.exists():
+        return None
+    connection = connect(store)
+    try:
+        heads = latest_runs(connection)
+        if not heads:
+            return None
+        report = Report(data={'duration_regressions': []})
+        report.heading("⏱ تراجعات مدة الاختبارات")
+        for head, label in heads:
+            regressions, baseline = detect(connection, head)
+            describe_run(report, regressions, baseline, head, label=label)
+        return report
+    finally:
+        connection.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Detect test-duration regressions in a JUnit report")
+    parser.add_argument('report', type=Path, nargs='?',
+                        help='JUnit report to check (ingested if new; default: latest stored run)')
+    parser.add_argument('--store', type=Path, default=STORE_FILE)
+    parser.add_argument('--baseline', type=int, default=BASELINE_RUNS, help='previous runs to compare with')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='robust z-score to flag')
+    parser.add_argument('--markdown', type=Path, help='also write the Markdown section here')
+    args = parser.parse_args()
+
+    connection = connect(args.store)
+    if args.report:
+        head = JUnitIngester(connection).ingest(args.report)
+        if head is None:
+            head = connection.execute("SELECT id FROM runs WHERE sha256 = ?",
+                                      (file_sha256(args.report),)).fetchone()[0]
+    else:
+        head = connection.execute("SELECT MAX(id) FROM runs").fetchone()[0]
+        if head is None:
+            print("No runs stored; pass a JUnit report")
+            return 1
+
+    regressions, baseline = detect(connection, head, args.baseline, args.threshold)
+    section = markdown_section(regressions, baseline, head, args.threshold)
+    print(section)
+    if args.markdown:
+        args.markdown.parent.mkdir(parents=True, exist_ok=True)
+        args.markdown.write_text(section, encoding='utf-8')
+    return 1 if regressions and len(baseline) >= MIN_BASELINE_RUNS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,103 +5,125 @@
 """
 
 import os
-import re
 import sys
+import argparse
 import subprocess
 import time
 from pathlib import Path
 from datetime import datetime
 
+from duration_regression import stored_section as regression_section
+from inventory_loader import InventoryError, load_inventory
+from output_classifier import OutputClassifier
+from progress_events import EventBus, start_dashboard
+from report_renderer import Report, write_report
+from result_cache import ResultCache, rewrites_sources
+from run_journal import RunJournal
+from stream_capture import run_streaming
+
 # Configuration
 INVENTORY_FILE = Path("FRESH_COMPREHENSIVE_TESTS_AND_TOOLS_INVENTORY_2025.md")
 RESULTS_FILE = Path("TASK_4_NEGATIVE_OUTPUTS_ONLY.md")
+# HTML/JSON copies stay out of the project root, whose *.json files are cache inputs
+RESULTS_EXPORT = Path("reports/task4_execution/TASK_4_NEGATIVE_OUTPUTS_ONLY.md")
+INVENTORY_CACHE = Path("reports/task4_execution/inventory_cache.json")
+OUTPUTS_DIR = Path("reports/task4_execution/individual_outputs")
+JOURNAL_FILE = Path("reports/task4_execution/run_journal.sqlite")
 TIMEOUT_SECONDS = 300
+TRUNCATION_MARKER = "\n... (تم اقتطاع {omitted} حرف) ...\n"
 
 class TestExecutor:
-    def __init__(self):
+    def __init__(self, use_cache=True, events=None, resume=False):
         self.tests = []
         self.negative_outputs = []
         self.failed_tools = []
         self.total_executed = 0
         self.total_passed = 0
         self.total_failed = 0
+        self.total_cached = 0
         self.start_time = None
+        self.cache = ResultCache() if use_cache else None
+        self.events = events if events is not None else EventBus()
+        self.journal = RunJournal(JOURNAL_FILE, 'sequential-450')
+        self.resume = resume
+        self.total_resumed = 0
         
     def parse_inventory(self):
         """قراءة وتحليل ملف القائمة الشاملة"""
         print("📖 قراءة ملف القائمة الشاملة...")
         
-        with open(INVENTORY_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Pattern to extract test items
-        pattern = r'####\s+(\d+)\.\s+(.+?)\n-\s+\*\*الأمر\*\*:\s+`(.+?)`\n-\s+\*\*الوصف\*\*:\s+(.+?)\n-\s+\*\*المعايير\*\*:\s+(.+?)\n-\s+\*\*الإخراج\*\*:\s+`(.+?)`'
-        matches = re.findall(pattern, content, re.MULTILINE | re.DOTALL)
-        
-        for match in matches:
-            self.tests.append({
-                'number': int(match[0]),
-                'name': match[1].strip(),
-                'command': match[2].strip(),
-                'description': match[3].strip(),
-                'criteria': match[4].strip(),
-                'output_file': match[5].strip()
-            })
+        try:
+            self.tests = load_inventory(INVENTORY_FILE, INVENTORY_CACHE)
+        except InventoryError as e:
+            print(f"❌ خطأ في ملف القائمة: {e}")
+            sys.exit(1)
         
         print(f"✅ تم قراءة {len(self.tests)} اختبار/أداة\n")
         
     def execute_test(self, test):
         """تنفيذ اختبار واحد"""
-        num = test['number']
-        name = test['name']
-        cmd = test['command']
+        num = test.number
+        name = test.name
+        cmd = test.command
         
         print(f"[{num:03d}/450] تنفيذ: {name[:60]}...", end=' ', flush=True)
         
+        if self.cache:
+            cached = self.cache.get(cmd)
+            if cached:
+                self.replay_cached(test, cached)
+                self.total_executed += 1
+                return
+        
+        output_path = OUTPUTS_DIR / test.output_file
+        classifier = OutputClassifier(cmd)
+        
         try:
-            result = subprocess.run(
+            # Output is spooled to the per-item file; only head/tail stay in memory
+            result = run_streaming(
                 cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=TIMEOUT_SECONDS,
+                output_path,
+                TIMEOUT_SECONDS,
+                header=f"Test #{num}: {name}\nCommand: {cmd}\n" + "=" * 80 + "\n",
+                on_chunk=classifier.feed,
                 cwd=Path.cwd()
             )
+            if result.timed_out:
+                raise subprocess.TimeoutExpired(cmd, TIMEOUT_SECONDS)
             
-            # Check if test passed or failed
-            has_errors = False
-            error_indicators = [
-                'error', 'failed', 'failure', 'exception', 'fatal',
-                'warning', 'deprecated', 'notice', 'violation',
-                'found', 'issues', 'problems', 'bugs'
-            ]
-            
-            output_combined = (result.stdout + result.stderr).lower()
-            
-            # Check exit code
-            if result.returncode != 0:
-                has_errors = True
-            
-            # Check for error indicators in output
-            for indicator in error_indicators:
-                if indicator in output_combined:
-                    has_errors = True
-                    break
+            # Exit code plus the severities found by the tool/generic rules
+            verdict = classifier.finish(result.returncode)
+            has_errors = verdict.has_problems
+            stdout = result.stdout.text(TRUNCATION_MARKER)
+            stderr = result.stderr.text(TRUNCATION_MARKER)
             
             if has_errors:
-                print("❌ مشاكل")
+                print(f"❌ مشاكل ({verdict.describe()})")
                 self.total_failed += 1
                 self.negative_outputs.append({
                     'number': num,
                     'name': name,
                     'command': cmd,
                     'exit_code': result.returncode,
-                    'stdout': result.stdout,
-                    'stderr': result.stderr
+                    'severity': verdict.to_dict(),
+                    'stdout': stdout,
+                    'stderr': stderr,
+                    'output_file': str(output_path)
                 })
             else:
                 print("✅")
                 self.total_passed += 1
+            
+            # Timeouts and launch failures are environmental, so only real verdicts are cached
+            if self.cache:
+                self.cache.put(cmd, {
+                    'verdict': 'negative' if has_errors else 'passed',
+                    'exit_code': result.returncode,
+                    'severity': verdict.to_dict(),
+                    'stdout': stdout if has_errors else '',
+                    'stderr': stderr if has_errors else '',
+                    'output_file': str(output_path)
+                })
                 
         except subprocess.TimeoutExpired:
             print("⏱️ Timeout")
@@ -133,30 +155,97 @@ class TestExecutor:
                 'reason': str(e)
             })
         
+        # Fixers and formatters change the inputs of later commands, even when they time out
+        if self.cache and rewrites_sources(cmd):
+            self.cache.invalidate()
         self.total_executed += 1
         
+    def replay_cached(self, test, cached):
+        """إعادة استخدام نتيجة محفوظة لأمر لم تتغير مدخلاته"""
+        self.total_cached += 1
+        if cached['verdict'] == 'negative':
+            print("❌ مشاكل (من الذاكرة المؤقتة)")
+            self.total_failed += 1
+            self.negative_outputs.append({
+                'number': test.number,
+                'name': test.name,
+                'command': test.command,
+                'exit_code': cached['exit_code'],
+                'severity': cached.get('severity'),
+                'stdout': cached['stdout'],
+                'stderr': cached['stderr'],
+                'output_file': cached.get('output_file', '')
+            })
+        else:
+            print("✅ (من الذاكرة المؤقتة)")
+            self.total_passed += 1
+        
     def execute_all(self):
         """تنفيذ جميع الاختبارات"""
         print("🚀 بدء تنفيذ جميع الاختبارات...\n")
         print("=" * 80)
         
-        self.start_time = datetime.now()
+        done = self.journal.start(resume=self.resume)
+        self.start_time = self.journal.started_at
+        session_start = datetime.now()
+        for record in done.values():
+            self.restore(record)
+        if done:
+            print(f"⏯️ استئناف: {len(done)} عنصر مكتمل من التشغيل السابق "
+                  f"(✅ {self.total_passed} | ❌ {self.total_failed})\n")
+        self.events.publish('run_started', total=len(self.tests) - len(done), workers=1)
         
         for test in self.tests:
+            if str(test.number) in done:
+                continue
+            failed_before = self.total_failed
+            cached_before = self.total_cached
+            negative_before = len(self.negative_outputs)
+            tools_before = len(self.failed_tools)
+            self.events.publish('item_started', item=str(test.number), worker='main')
+            started = time.time()
             self.execute_test(test)
+            status = 'failed' if self.total_failed > failed_before else 'passed'
+            self.events.publish('item_finished', item=str(test.number), worker='main',
+                                duration=time.time() - started, verdict=status)
+            # Checkpoint before moving on, so a crash never loses a finished item
+            self.journal.record(str(test.number), status, {
+                'status': status,
+                'cached': self.total_cached > cached_before,
+                'negative_outputs': self.negative_outputs[negative_before:],
+                'failed_tools': self.failed_tools[tools_before:],
+            })
             
             # Progress indicator every 50 tests
             if self.total_executed % 50 == 0:
-                elapsed = (datetime.now() - self.start_time).total_seconds()
-                avg_time = elapsed / self.total_executed
+                elapsed = (datetime.now() - session_start).total_seconds()
+                avg_time = elapsed / max(self.total_executed - self.total_resumed, 1)
                 remaining = (450 - self.total_executed) * avg_time
                 print(f"\n📊 التقدم: {self.total_executed}/450 | "
                       f"✅ {self.total_passed} | ❌ {self.total_failed} | "
                       f"⏱️ متبقي: {remaining/60:.1f} دقيقة\n")
         
+        self.events.publish('run_finished')
         print("=" * 80)
         print("\n✅ اكتمل تنفيذ جميع الاختبارات!\n")
         
+        if self.cache:
+            self.cache.save()
+            print(f"♻️ نتائج من الذاكرة المؤقتة: {self.total_cached}/{self.total_executed}\n")
+        
+    def restore(self, record):
+        """إعادة بناء العدادات من عنصر مكتمل في سجل التشغيل"""
+        self.total_executed += 1
+        self.total_resumed += 1
+        if record['cached']:
+            self.total_cached += 1
+        if record['status'] == 'failed':
+            self.total_failed += 1
+        else:
+            self.total_passed += 1
+        self.negative_outputs.extend(record['negative_outputs'])
+        self.failed_tools.extend(record['failed_tools'])
+        
     def save_results(self):
         """حفظ النتائج في ملف"""
         print("💾 حفظ النتائج...")
@@ -164,79 +253,95 @@ class TestExecutor:
         end_time = datetime.now()
         duration = (end_time - self.start_time).total_seconds()
         
-        with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
-            # Header
-            f.write("# تقرير المخرجات السلبية - Task 4\n")
-            f.write("## مشروع COPRRA - المشاكل والأخطاء المكتشفة\n\n")
-            f.write(f"**تاريخ التنفيذ**: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"**مدة التنفيذ**: {duration:.2f} ثانية ({duration/60:.2f} دقيقة)\n\n")
-            f.write("---\n\n")
-            
-            # Summary
-            f.write("## 📊 ملخص النتائج\n\n")
-            f.write(f"- **إجمالي الاختبارات المنفذة**: {self.total_executed}\n")
-            f.write(f"- **✅ نجح بدون مشاكل**: {self.total_passed}\n")
-            f.write(f"- **❌ يحتوي على مشاكل**: {self.total_failed}\n")
-            f.write(f"- **نسبة النجاح**: {(self.total_passed * 100 / self.total_executed):.1f}%\n\n")
-            f.write("---\n\n")
-            
-            # Section 1: Negative Outputs
-            f.write("## 🔴 القسم الأول: المخرجات السلبية (مشاكل وأخطاء)\n\n")
-            f.write(f"**عدد الاختبارات التي تحتوي على مشاكل**: {len(self.negative_outputs)}\n\n")
-            
-            if self.negative_outputs:
-                for i, output in enumerate(self.negative_outputs, 1):
-                    f.write(f"### {i}. [{output['number']:03d}] {output['name']}\n\n")
-                    f.write(f"**الأمر**: `{output['command']}`\n\n")
-                    f.write(f"**Exit Code**: {output['exit_code']}\n\n")
-                    
-                    if output['stderr']:
-                        f.write("**STDERR (الأخطاء)**:\n```\n")
-                        f.write(output['stderr'][:2000])  # First 2000 chars
-                        if len(output['stderr']) > 2000:
-                            f.write("\n... (تم اقتطاع الباقي)")
-                        f.write("\n```\n\n")
-                    
-                    if output['stdout']:
-                        f.write("**STDOUT (المخرجات)**:\n```\n")
-                        f.write(output['stdout'][:2000])  # First 2000 chars
-                        if len(output['stdout']) > 2000:
-                            f.write("\n... (تم اقتطاع الباقي)")
-                        f.write("\n```\n\n")
-                    
-                    f.write("---\n\n")
-            else:
-                f.write("✅ **لا توجد مخرجات سلبية - جميع الاختبارات نجحت!**\n\n")
-            
-            # Section 2: Failed Tools
-            f.write("## ⚠️ القسم الثاني: الأدوات/الاختبارات التي فشل تشغيلها\n\n")
-            f.write(f"**عدد الأدوات التي فشل تشغيلها**: {len(self.failed_tools)}\n\n")
-            
-            if self.failed_tools:
-                for i, tool in enumerate(self.failed_tools, 1):
-                    f.write(f"### {i}. [{tool['number']:03d}] {tool['name']}\n\n")
-                    f.write(f"**الأمر**: `{tool['command']}`\n\n")
-                    f.write(f"**السبب**: {tool['reason']}\n\n")
-                    f.write("---\n\n")
-            else:
-                f.write("✅ **جميع الأدوات تعمل بشكل صحيح!**\n\n")
-            
-            # Footer
-            f.write("---\n\n")
-            f.write("## 🎯 الخلاصة\n\n")
-            
-            if self.total_failed == 0:
-                f.write("✅ **ممتاز!** جميع الاختبارات نجحت بدون أي مشاكل.\n\n")
-            elif self.total_failed <= 45:  # 10%
-                f.write("✓ **جيد جداً!** نسبة المشاكل أقل من 10%.\n\n")
-            elif self.total_failed <= 90:  # 20%
-                f.write("⚠️ **مقبول** - يوجد بعض المشاكل التي تحتاج إلى مراجعة.\n\n")
-            else:
-                f.write("❌ **يحتاج إلى تحسين** - عدد كبير من المشاكل.\n\n")
-            
-            f.write(f"**تاريخ الانتهاء**: {end_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        report = Report("تقرير المخرجات السلبية - Task 4", "مشروع COPRRA - المشاكل والأخطاء المكتشفة",
+                        data={'executed': self.total_executed, 'passed': self.total_passed,
+                              'failed': self.total_failed, 'cached': self.total_cached,
+                              'duration_seconds': duration, 'negative_outputs': self.negative_outputs,
+                              'failed_tools': self.failed_tools})
+        report.fields([
+            ("تاريخ التنفيذ", self.start_time.strftime('%Y-%m-%d %H:%M:%S')),
+            ("مدة التنفيذ", f"{duration:.2f} ثانية ({duration/60:.2f} دقيقة)"),
+        ], bullets=False)
+        report.rule()
+        
+        # Summary
+        report.heading("📊 ملخص النتائج")
+        report.fields([
+            ("إجمالي الاختبارات المنفذة", self.total_executed),
+            ("✅ نجح بدون مشاكل", self.total_passed),
+            ("❌ يحتوي على مشاكل", self.total_failed),
+            ("♻️ من الذاكرة المؤقتة (مدخلات لم تتغير)", self.total_cached),
+            ("نسبة النجاح", f"{(self.total_passed * 100 / self.total_executed):.1f}%"),
+        ])
+        report.rule()
+        
+        # Section 1: Negative Outputs
+        report.heading("🔴 القسم الأول: المخرجات السلبية (مشاكل وأخطاء)")
+        report.field("عدد الاختبارات التي تحتوي على مشاكل", len(self.negative_outputs))
+        
+        if self.negative_outputs:
+            for i, output in enumerate(self.negative_outputs, 1):
+                report.heading(f"{i}. [{output['number']:03d}] {output['name']}", 3)
+                report.field("الأمر", f"`{output['command']}`")
+                report.field("Exit Code", output['exit_code'])
+                
+                severity = output.get('severity')
+                if severity:
+                    counts = severity['counts']
+                    report.field(f"التصنيف ({severity['tool']})",
+                                 f"❌ {counts['error']} أخطاء | ⚠️ {counts['warning']} تحذيرات | "
+                                 f"ℹ️ {counts['info']} ملاحظات")
+                    if severity.get('summary'):
+                        report.field("الملخص", f"`{severity['summary']}`")
+                
+                if output.get('output_file'):
+                    report.field("المخرجات الكاملة", f"`{output['output_file']}`")
+                
+                # stdout/stderr hold only the bounded head and tail of each stream
+                if output['stderr']:
+                    report.code(output['stderr'], "STDERR (الأخطاء)")
+                
+                if output['stdout']:
+                    report.code(output['stdout'], "STDOUT (المخرجات)")
+                
+                report.rule()
+        else:
+            report.paragraph("✅ **لا توجد مخرجات سلبية - جميع الاختبارات نجحت!**")
+        
+        # Section 2: Failed Tools
+        report.heading("⚠️ القسم الثاني: الأدوات/الاختبارات التي فشل تشغيلها")
+        report.field("عدد الأدوات التي فشل تشغيلها", len(self.failed_tools))
+        
+        if self.failed_tools:
+            for i, tool in enumerate(self.failed_tools, 1):
+                report.heading(f"{i}. [{tool['number']:03d}] {tool['name']}", 3)
+                report.field("الأمر", f"`{tool['command']}`")
+                report.field("السبب", tool['reason'])
+                report.rule()
+        else:
+            report.paragraph("✅ **جميع الأدوات تعمل بشكل صحيح!**")
+        
+        # Section 3: PHPUnit duration regressions (absent without stored JUnit runs)
+        report.extend(regression_section())
+        
+        # Footer
+        report.rule()
+        report.heading("🎯 الخلاصة")
+        
+        if self.total_failed == 0:
+            report.paragraph("✅ **ممتاز!** جميع الاختبارات نجحت بدون أي مشاكل.")
+        elif self.total_failed <= 45:  # 10%
+            report.paragraph("✓ **جيد جداً!** نسبة المشاكل أقل من 10%.")
+        elif self.total_failed <= 90:  # 20%
+            report.paragraph("⚠️ **مقبول** - يوجد بعض المشاكل التي تحتاج إلى مراجعة.")
+        else:
+            report.paragraph("❌ **يحتاج إلى تحسين** - عدد كبير من المشاكل.")
+        
+        report.field("تاريخ الانتهاء", end_time.strftime('%Y-%m-%d %H:%M:%S'))
+        write_report(report, RESULTS_FILE)
+        exports = write_report(report, RESULTS_EXPORT, formats=('html', 'json'))
         
-        print(f"✅ تم حفظ النتائج في: {RESULTS_FILE}\n")
+        print(f"✅ تم حفظ النتائج في: {RESULTS_FILE} ({', '.join(map(str, exports))})\n")
         
     def run(self):
         """التنفيذ الرئيسي"""
@@ -248,6 +353,7 @@ class TestExecutor:
         self.parse_inventory()
         self.execute_all()
         self.save_results()
+        self.journal.finish()
         
         print("=" * 80)
         print("✅ اكتمل Task 4 بنجاح!")
@@ -256,6 +362,16 @@ class TestExecutor:
         print("=" * 80 + "\n")
 
 if __name__ == "__main__":
-    executor = TestExecutor()
+    parser = argparse.ArgumentParser(description="تنفيذ جميع الـ 450 اختبار/أداة بشكل تسلسلي")
+    parser.add_argument('--no-cache', action='store_true',
+                        help='تجاهل النتائج المحفوظة وإعادة تنفيذ كل الأوامر')
+    parser.add_argument('--dashboard', type=int, metavar='PORT',
+                        help='لوحة تقدم مباشرة على localhost:PORT')
+    parser.add_argument('--resume', action='store_true',
+                        help='استئناف آخر تشغيل غير مكتمل وتخطي العناصر المنتهية')
+    args = parser.parse_args()
+    
+    bus, dashboard = start_dashboard(args.dashboard)
+    executor = TestExecutor(use_cache=not args.no_cache, events=bus, resume=args.resume)
     executor.run()
 
@@ -1,18 +1,30 @@
 #!/usr/bin/env python3
 
-import subprocess
+import argparse
 import sys
 import os
 import time
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional
 import json
 
+from duration_history import DurationHistory
+from progress_events import EventBus, start_dashboard
+from report_renderer import Report, write_report
+from resource_budget import ResourceBudget
+from run_journal import RunJournal
+from stream_capture import run_streaming
+from task_scheduler import DependencyScheduler
+
 class SmartTestExecutor:
-    def __init__(self, batch_size: int = 30, max_workers: int = 5):
+    def __init__(self, batch_size: int = 30, max_workers: int = 5, php_workers: int = 0,
+                 events: Optional[EventBus] = None, resume: bool = False):
+        # batch_size only controls how often a summary is printed; execution
+        # itself is a continuous work queue (see task_scheduler.py)
         self.batch_size = batch_size
         self.max_workers = max_workers
+        # > 0: PHPUnit suites run per test file on a pool of warm PHP workers
+        self.php_workers = php_workers
         self.total_tests = 628
         self.executed = 0
         self.success_count = 0
@@ -23,6 +35,13 @@ class SmartTestExecutor:
         self.success_list_file = os.path.join(self.results_dir, "successful_tests.txt")
         self.failed_to_start_file = os.path.join(self.results_dir, "failed_to_start.txt")
         self.summary_file = os.path.join(self.results_dir, "execution_summary.md")
+        # Batch summaries are collected here and rendered once at the end of the run
+        self.batches: List[Dict] = []
+        # Finished items are checkpointed here; --resume skips them
+        self.journal = RunJournal(os.path.join(self.results_dir, "run_journal.sqlite"), 'smart-628')
+        self.resume = resume
+        self.budget = ResourceBudget()
+        self.events = events if events is not None else EventBus()
         self.initialize_directories()
 
     def initialize_directories(self):
@@ -40,15 +59,25 @@ class SmartTestExecutor:
         # PHPUnit test suites
         phpunit_suites = ['AI', 'Security', 'Performance', 'Integration', 'Unit', 'Feature', 'Comprehensive']
         for suite in phpunit_suites:
+            if self.php_workers:
+                command = (f'python3 phpunit_pool.py --testsuite {suite} --workers {self.php_workers} '
+                           f'--log-junit reports/phpunit_pool/{suite}.xml')
+            else:
+                command = f'vendor/bin/phpunit --testsuite {suite}'
             commands.append({
                 'name': f'PHPUnit {suite} Tests',
-                'command': f'vendor/bin/phpunit --testsuite {suite}',
+                'command': command,
                 'timeout': 600
             })
 
+        # The comprehensive suite builds on the unit suite's fixtures
+        for command in commands:
+            if command['name'] == 'PHPUnit Comprehensive Tests':
+                command['depends_on'] = ['PHPUnit Unit Tests']
+
         # Static Analysis Tools
         static_analysis = [
-            {'name': 'PHPStan', 'command': './vendor/bin/phpstan analyse --memory-limit=1G'},
+            {'name': 'PHPStan', 'command': './vendor/bin/phpstan analyse --memory-limit=1G', 'depends_on': ['Pint']},
             {'name': 'Psalm', 'command': './vendor/bin/psalm'},
             {'name': 'PHP Insights', 'command': './vendor/bin/phpinsights analyse app'},
             {'name': 'PHPMD', 'command': './vendor/bin/phpmd app text cleancode,codesize,controversial,design,naming,unusedcode'},
@@ -96,24 +125,38 @@ class SmartTestExecutor:
             'duration': 0
         }
 
+        # Output is spooled to what becomes the failure report; it is
+        # discarded again unless the command ran to completion and failed
+        output_file = os.path.join(
+            self.failed_outputs_dir,
+            f"{test['name'].replace(' ', '_')}_{int(time.time())}.txt"
+        )
+        timeout = test.get('timeout', 300)
+
         try:
-            process = subprocess.Popen(
+            capture = run_streaming(
                 test['command'],
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                output_file,
+                timeout,
+                header=f"Command: {test['command']}\n",
+                stdout_label="Output:\n",
+                stderr_label="\nError:\n",
+                on_start=lambda process: self.budget.track(test['command'], process.pid)
             )
+            self.budget.untrack(capture.pid)
+            result['output'] = capture.stdout.text()
+            result['error'] = capture.stderr.text()
 
-            try:
-                stdout, stderr = process.communicate(timeout=test.get('timeout', 300))
-                result['output'] = stdout
-                result['error'] = stderr
-                result['status'] = 'success' if process.returncode == 0 else 'failed'
-            except subprocess.TimeoutExpired:
-                process.kill()
+            if capture.timed_out:
                 result['status'] = 'timeout'
-                result['error'] = f"Command timed out after {test.get('timeout', 300)} seconds"
+                result['error'] = f"Command timed out after {timeout} seconds"
+            else:
+                result['status'] = 'success' if capture.returncode == 0 else 'failed'
+
+            if result['status'] == 'failed':
+                result['output_file'] = output_file
+            else:
+                os.remove(output_file)
 
         except Exception as e:
             result['status'] = 'failed_to_start'
@@ -129,15 +172,9 @@ class SmartTestExecutor:
                 f.write(f"{result['name']}\n")
             self.success_count += 1
 
-        elif result['status'] == 'failed':
-            output_file = os.path.join(
-                self.failed_outputs_dir,
-                f"{result['name'].replace(' ', '_')}_{int(time.time())}.txt"
-            )
-            with open(output_file, 'w') as f:
-                f.write(f"Command: {result['command']}\n")
-                f.write(f"Output:\n{result['output']}\n")
-                f.write(f"Error:\n{result['error']}\n")
+        elif result['status'] in ('failed', 'timeout'):
+            # A failure's full output was already streamed to result['output_file'];
+            # timeouts count as failed, as they do in restore() and the batch summaries
             self.failed_count += 1
 
         elif result['status'] == 'failed_to_start':
@@ -157,64 +194,134 @@ class SmartTestExecutor:
         print(f"✗ Failed: {failed}")
         print(f"Time elapsed: {time.time() - self.start_time:.2f}s")
         print(f"{'='*80}\n")
+        self.add_batch(batch_number, batch_results)
 
-        # Save batch summary to file
-        with open(self.summary_file, 'a') as f:
-            f.write(f"\n## Batch {batch_number} Summary\n")
-            f.write(f"- Executed: {self.executed}/{self.total_tests}\n")
-            f.write(f"- Successful: {success}\n")
-            f.write(f"- Failed: {failed}\n")
-            f.write(f"- Time: {time.time() - self.start_time:.2f}s\n")
-            for result in batch_results:
-                status_symbol = '✓' if result['status'] == 'success' else '✗'
-                f.write(f"\n{status_symbol} {result['name']} ({result['duration']:.2f}s)\n")
-                if result['status'] != 'success':
-                    f.write(f"```\n{result['error']}\n```\n")
-
-    def execute_batch(self, batch: List[Dict]) -> List[Dict]:
-        """Execute a batch of tests in parallel"""
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = [executor.submit(self.execute_command, test) for test in batch]
-            results = []
+    def add_batch(self, batch_number: int, batch_results: List[Dict]):
+        """Keep a batch for the summary written at the end of the run"""
+        success = sum(1 for r in batch_results if r['status'] == 'success')
+        self.batches.append({
+            'batch': batch_number,
+            'executed': self.executed,
+            'successful': success,
+            'failed': len(batch_results) - success,
+            'elapsed': batch_results[-1].get('elapsed', time.time() - self.start_time),
+            'results': [{key: result.get(key) for key in ('name', 'status', 'duration', 'error')}
+                        for result in batch_results],
+        })
 
-            for future in as_completed(futures):
-                result = future.result()
-                self.save_result(result)
+    def restore(self, records: List[Dict]):
+        """Rebuild counters and batch summaries from journaled results"""
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            for record in batch:
                 self.executed += 1
-                results.append(result)
-
-                # Print progress
-                print(f"\rProgress: {self.executed}/{self.total_tests} "
-                      f"(✓:{self.success_count} ✗:{self.failed_count})", end='')
+                if record['status'] == 'success':
+                    self.success_count += 1
+                else:
+                    self.failed_count += 1
+            self.add_batch(len(self.batches) + 1, batch)
 
-            return results
+    def write_summary(self):
+        """Render all batch summaries to execution_summary.{md,html,json} in one write each"""
+        report = Report("Execution Summary", data={'total_tests': self.total_tests, 'batches': self.batches})
+        for batch in self.batches:
+            report.heading(f"Batch {batch['batch']} Summary")
+            report.fields([
+                ("Executed", f"{batch['executed']}/{self.total_tests}"),
+                ("Successful", batch['successful']),
+                ("Failed", batch['failed']),
+                ("Time", f"{batch['elapsed']:.2f}s"),
+            ])
+            for result in batch['results']:
+                status_symbol = '✓' if result['status'] == 'success' else '✗'
+                report.paragraph(f"{status_symbol} {result['name']} ({result['duration']:.2f}s)")
+                if result['status'] != 'success':
+                    report.code(str(result['error']))
+        write_report(report, self.summary_file, formats=('md', 'html', 'json'))
 
     def run(self):
-        """Run all tests in batches"""
+        """Run all tests on a continuous, dependency-aware work queue"""
         print("Starting Smart Test Executor")
         print(f"Total tests: {self.total_tests}")
-        print(f"Batch size: {self.batch_size}")
+        print(f"Summary every: {self.batch_size} tests")
         print(f"Max parallel executions: {self.max_workers}")
+        print(f"Resource budget: {self.budget.cpu_budget:.0f} CPU, {self.budget.memory_budget:.0f} MB")
         print("="*80)
 
         commands = self.generate_test_commands()
-        batch_number = 0
+        history = DurationHistory()
+        history.ingest_batch_logs()
+        estimate = lambda test: history.estimate(test['command'])
+        history.print_makespan_table([estimate(test) for test in commands], self.max_workers)
+        print("="*80)
 
-        for i in range(0, len(commands), self.batch_size):
-            batch_number += 1
-            batch = commands[i:i + self.batch_size]
-            print(f"\nExecuting batch {batch_number}...")
+        done = self.journal.start(resume=self.resume)
+        if done:
+            self.restore(list(done.values()))
+            # Dependencies that already finished are satisfied, not unknown items
+            commands = [dict(test, depends_on=[dep for dep in test.get('depends_on', []) if dep not in done])
+                        for test in commands if test['name'] not in done]
+            print(f"Resuming: {len(done)} finished items restored "
+                  f"(✓:{self.success_count} ✗:{self.failed_count}), {len(commands)} left")
+            print("="*80)
+
+        scheduler = DependencyScheduler(max_workers=self.max_workers, estimate=estimate,
+                                        admission=self.budget, events=self.events,
+                                        verdict=lambda result: result['status'])
+        pending_summary: List[Dict] = []
+        batch_number = len(self.batches)
 
-            results = self.execute_batch(batch)
-            self.print_batch_summary(batch_number, results)
+        def on_result(test: Dict, result: Dict):
+            nonlocal batch_number
+            self.save_result(result)
+            self.executed += 1
+            result['elapsed'] = time.time() - self.start_time
+            self.journal.record(result['name'], result['status'],
+                                {key: result.get(key) for key in
+                                 ('name', 'command', 'status', 'duration', 'error', 'elapsed')})
+            pending_summary.append(result)
+            if result['status'] in ('success', 'failed'):
+                history.record(result['command'], result['duration'])
+
+            # Print progress
+            print(f"\rProgress: {self.executed}/{self.total_tests} "
+                  f"(✓:{self.success_count} ✗:{self.failed_count})", end='')
+
+            if len(pending_summary) >= self.batch_size:
+                batch_number += 1
+                self.print_batch_summary(batch_number, list(pending_summary))
+                pending_summary.clear()
+
+        self.events.publish('run_started', total=len(commands), workers=self.max_workers)
+        scheduler.run(commands, self.execute_command, on_result)
+        self.events.publish('run_finished')
+        if pending_summary:
+            batch_number += 1
+            self.print_batch_summary(batch_number, pending_summary)
+        history.save()
+        self.budget.stop()
+        self.budget.save()
+        self.write_summary()
+        self.journal.finish()
 
         # Print final summary
         print("\nExecution Complete!")
         print(f"Total executed: {self.executed}/{self.total_tests}")
         print(f"Successful: {self.success_count}")
         print(f"Failed: {self.failed_count}")
+        print(f"Worker utilisation: {scheduler.utilisation() * 100:.1f}%")
         print(f"Total time: {time.time() - self.start_time:.2f}s")
 
 if __name__ == "__main__":
-    executor = SmartTestExecutor(batch_size=30, max_workers=5)
+    parser = argparse.ArgumentParser(description="Smart parallel execution of all 628 tests")
+    parser.add_argument('--php-workers', type=int, default=0,
+                        help='run PHPUnit suites per test file on N warm PHP workers (phpunit_pool.py)')
+    parser.add_argument('--dashboard', type=int, metavar='PORT',
+                        help='serve a live progress dashboard on localhost:PORT')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the last unfinished run, skipping items already finished')
+    args = parser.parse_args()
+    bus, dashboard = start_dashboard(args.dashboard)
+    executor = SmartTestExecutor(batch_size=30, max_workers=5, php_workers=args.php_workers, events=bus,
+                                 resume=args.resume)
     executor.run()
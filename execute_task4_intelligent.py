@@ -4,23 +4,37 @@ Task 4 Intelligent Execution Script
 مشروع COPRRA - تنفيذ ذكي لجميع الاختبارات والأدوات (450 عنصر)
 """
 
+import argparse
 import os
-import re
 import sys
 import json
 import time
-import subprocess
 from pathlib import Path
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Tuple, Optional
 
+from duration_history import DurationHistory
+from duration_regression import stored_section as regression_section
+from inventory_loader import InventoryError, TestItem, load_inventory
+from output_classifier import OutputClassifier
+from progress_events import EventBus, start_dashboard
+from report_renderer import Report, write_report
+from resource_budget import ResourceBudget
+from stream_capture import CaptureResult, run_streaming
+from task_scheduler import DependencyScheduler
+
 # Configuration
 BATCH_SIZE = 10
+BATCH_PAUSE_SECONDS = 1
 MAX_WORKERS = 10
 TIMEOUT_SECONDS = 300
 REPORTS_DIR = Path("reports/task4_execution")
 INVENTORY_FILE = Path("FRESH_COMPREHENSIVE_TESTS_AND_TOOLS_INVENTORY_2025.md")
+INVENTORY_CACHE = REPORTS_DIR / "inventory_cache.json"
+
+def json_result_path(number: int) -> Path:
+    """Per-item result file under json_results"""
+    return REPORTS_DIR / "json_results" / f"test_{number:03d}.json"
 
 # Colors
 class Colors:
@@ -32,25 +46,10 @@ class Colors:
     CYAN = '\033[0;36m'
     NC = '\033[0m'  # No Color
 
-class TestItem:
-    """Represents a single test/tool item"""
-    def __init__(self, number: int, name: str, command: str, description: str, 
-                 criteria: str, output_file: str):
-        self.number = number
-        self.name = name
-        self.command = command
-        self.description = description
-        self.criteria = criteria
-        self.output_file = output_file
-        self.status = "pending"
-        self.exit_code = None
-        self.execution_time = 0.0
-        self.error_message = ""
-
 class Task4Executor:
     """Main executor for Task 4"""
     
-    def __init__(self):
+    def __init__(self, events: Optional[EventBus] = None):
         self.tests: List[TestItem] = []
         self.results = {
             'total': 0,
@@ -61,6 +60,10 @@ class Task4Executor:
         }
         self.start_time = None
         self.end_time = None
+        self.history = DurationHistory()
+        self.budget = ResourceBudget(command=lambda test: test.command)
+        # Progress is published here for the dashboard (progress_events.py)
+        self.events = events if events is not None else EventBus()
         
     def parse_inventory(self) -> None:
         """Parse the comprehensive inventory file"""
@@ -70,23 +73,11 @@ class Task4Executor:
             print(f"{Colors.RED}✗ خطأ: لم يتم العثور على ملف القائمة{Colors.NC}")
             sys.exit(1)
         
-        with open(INVENTORY_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Parse test items using regex
-        pattern = r'####\s+(\d+)\.\s+(.+?)\n-\s+\*\*الأمر\*\*:\s+`(.+?)`\n-\s+\*\*الوصف\*\*:\s+(.+?)\n-\s+\*\*المعايير\*\*:\s+(.+?)\n-\s+\*\*الإخراج\*\*:\s+`(.+?)`'
-        matches = re.findall(pattern, content, re.MULTILINE | re.DOTALL)
-        
-        for match in matches:
-            number = int(match[0])
-            name = match[1].strip()
-            command = match[2].strip()
-            description = match[3].strip()
-            criteria = match[4].strip()
-            output_file = match[5].strip()
-            
-            test = TestItem(number, name, command, description, criteria, output_file)
-            self.tests.append(test)
+        try:
+            self.tests = load_inventory(INVENTORY_FILE, INVENTORY_CACHE)
+        except InventoryError as e:
+            print(f"{Colors.RED}✗ خطأ في ملف القائمة: {e}{Colors.NC}")
+            sys.exit(1)
         
         self.results['total'] = len(self.tests)
         print(f"{Colors.GREEN}✓ تم قراءة {len(self.tests)} عنصر من القائمة{Colors.NC}")
@@ -103,6 +94,21 @@ class Task4Executor:
         
         print(f"{Colors.GREEN}✓ تم تهيئة البيئة بنجاح{Colors.NC}")
     
+    def order_by_history(self) -> None:
+        """Order tests longest-processing-time-first using recorded durations"""
+        print(f"{Colors.BLUE}=== ترتيب الاختبارات حسب المدة التاريخية ==={Colors.NC}")
+        
+        added = self.history.ingest_batch_logs(REPORTS_DIR / "batch_logs")
+        self.history.save()
+        known = sum(1 for test in self.tests if self.history.p50(test.command) is not None)
+        print(f"سجل المدد: {known}/{len(self.tests)} أمر معروف (+{added} عينة جديدة)")
+        
+        self.tests = self.history.order_longest_first(self.tests, lambda test: test.command)
+        durations = [min(self.history.estimate(t.command), TIMEOUT_SECONDS) for t in self.tests]
+        # execute_all() runs lock-step batches, each waiting for its slowest test
+        self.history.print_makespan_table(durations, MAX_WORKERS, batch_size=BATCH_SIZE,
+                                          pause=BATCH_PAUSE_SECONDS)
+    
     def execute_test(self, test: TestItem) -> TestItem:
         """Execute a single test"""
         output_path = REPORTS_DIR / "individual_outputs" / test.output_file
@@ -110,47 +116,43 @@ class Task4Executor:
         
         start_time = time.time()
         
+        def footer(result: CaptureResult) -> str:
+            status = f"TIMEOUT after {TIMEOUT_SECONDS}s" if result.timed_out else "COMPLETED"
+            return ("\n" + "=" * 80 + "\n"
+                    f"Status: {status}\n"
+                    f"Execution Time: {result.duration:.2f}s\n"
+                    f"Exit Code: {result.returncode}\n")
+        
+        classifier = OutputClassifier(test.command)
+        
         try:
-            # Execute command
-            result = subprocess.run(
+            # Execute command, spooling output straight to the per-item file
+            result = run_streaming(
                 test.command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=TIMEOUT_SECONDS,
+                output_path,
+                TIMEOUT_SECONDS,
+                header=f"Test #{test.number}: {test.name}\nCommand: {test.command}\n" + "=" * 80 + "\n",
+                stderr_label="\n" + "=" * 80 + "\nSTDERR:\n",
+                footer=footer,
+                on_chunk=classifier.feed,
+                on_start=lambda process: self.budget.track(test.command, process.pid),
                 cwd=Path.cwd()
             )
+            self.budget.untrack(result.pid)
             
-            test.execution_time = time.time() - start_time
+            test.execution_time = result.duration
             test.exit_code = result.returncode
+            test.severity = classifier.finish(result.returncode).to_dict()
             
-            # Write output
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(f"Test #{test.number}: {test.name}\n")
-                f.write(f"Command: {test.command}\n")
-                f.write(f"Execution Time: {test.execution_time:.2f}s\n")
-                f.write(f"Exit Code: {test.exit_code}\n")
-                f.write("=" * 80 + "\n")
-                f.write("STDOUT:\n")
-                f.write(result.stdout)
-                f.write("\n" + "=" * 80 + "\n")
-                f.write("STDERR:\n")
-                f.write(result.stderr)
-            
-            if result.returncode == 0:
+            if result.timed_out:
+                test.execution_time = TIMEOUT_SECONDS
+                test.status = "timeout"
+                test.error_message = f"Timeout after {TIMEOUT_SECONDS}s"
+            elif result.returncode == 0:
                 test.status = "passed"
             else:
                 test.status = "failed"
-                test.error_message = result.stderr[:200] if result.stderr else "Unknown error"
-                
-        except subprocess.TimeoutExpired:
-            test.execution_time = TIMEOUT_SECONDS
-            test.status = "timeout"
-            test.error_message = f"Timeout after {TIMEOUT_SECONDS}s"
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(f"Test #{test.number}: {test.name}\n")
-                f.write(f"Status: TIMEOUT after {TIMEOUT_SECONDS}s\n")
+                test.error_message = result.stderr.head[:200] if result.stderr else "Unknown error"
                 
         except Exception as e:
             test.execution_time = time.time() - start_time
@@ -164,41 +166,49 @@ class Task4Executor:
         
         return test
     
+    def save_json_result(self, test: TestItem, **extra) -> None:
+        """Write the item's result to json_results atomically"""
+        path = json_result_path(test.number)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(test.__dict__, **extra), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    
     def execute_batch(self, batch_number: int, batch_tests: List[TestItem]) -> None:
         """Execute a batch of tests in parallel"""
-        batch_start = batch_tests[0].number
-        batch_end = batch_tests[-1].number
-        
-        print(f"\n{Colors.YELLOW}=== الدفعة #{batch_number + 1}: الاختبارات {batch_start}-{batch_end} ==={Colors.NC}")
+        print(f"\n{Colors.YELLOW}=== الدفعة #{batch_number + 1}: {len(batch_tests)} اختبارات ==={Colors.NC}")
         
         batch_results = {'passed': 0, 'failed': 0, 'skipped': 0, 'errors': 0}
         
-        # Execute tests in parallel
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = {executor.submit(self.execute_test, test): test for test in batch_tests}
+        # Execute tests in parallel, admitting heavy tools only while the budget allows
+        scheduler = DependencyScheduler(max_workers=MAX_WORKERS, key=lambda test: str(test.number),
+                                        admission=self.budget, events=self.events,
+                                        verdict=lambda test: test.status)
+        
+        def on_result(_: TestItem, test: TestItem) -> None:
+            # Update counters
+            if test.status == "passed":
+                batch_results['passed'] += 1
+                self.results['passed'] += 1
+                status_icon = f"{Colors.GREEN}✓{Colors.NC}"
+            elif test.status == "failed":
+                batch_results['failed'] += 1
+                self.results['failed'] += 1
+                status_icon = f"{Colors.RED}✗{Colors.NC}"
+            elif test.status == "timeout":
+                batch_results['errors'] += 1
+                self.results['errors'] += 1
+                status_icon = f"{Colors.YELLOW}⏱{Colors.NC}"
+            else:
+                batch_results['errors'] += 1
+                self.results['errors'] += 1
+                status_icon = f"{Colors.RED}⚠{Colors.NC}"
             
-            for future in as_completed(futures):
-                test = future.result()
-                
-                # Update counters
-                if test.status == "passed":
-                    batch_results['passed'] += 1
-                    self.results['passed'] += 1
-                    status_icon = f"{Colors.GREEN}✓{Colors.NC}"
-                elif test.status == "failed":
-                    batch_results['failed'] += 1
-                    self.results['failed'] += 1
-                    status_icon = f"{Colors.RED}✗{Colors.NC}"
-                elif test.status == "timeout":
-                    batch_results['errors'] += 1
-                    self.results['errors'] += 1
-                    status_icon = f"{Colors.YELLOW}⏱{Colors.NC}"
-                else:
-                    batch_results['errors'] += 1
-                    self.results['errors'] += 1
-                    status_icon = f"{Colors.RED}⚠{Colors.NC}"
-                
-                print(f"  {status_icon} #{test.number:03d} {test.name[:60]} ({test.execution_time:.1f}s)")
+            print(f"  {status_icon} #{test.number:03d} {test.name[:60]} ({test.execution_time:.1f}s)")
+            self.save_json_result(test)
+        
+        scheduler.run(batch_tests, self.execute_test, on_result)
         
         # Save batch results
         batch_log = REPORTS_DIR / "batch_logs" / f"batch_{batch_number + 1}.json"
@@ -218,8 +228,10 @@ class Task4Executor:
         print(f"إجمالي الاختبارات: {len(self.tests)}")
         print(f"حجم الدفعة: {BATCH_SIZE}")
         print(f"العمليات المتوازية: {MAX_WORKERS}")
+        print(f"ميزانية الموارد: {self.budget.cpu_budget:.0f} CPU, {self.budget.memory_budget:.0f} MB")
         
         self.start_time = datetime.now()
+        self.events.publish('run_started', total=len(self.tests), workers=MAX_WORKERS)
         
         # Execute in batches
         for i in range(0, len(self.tests), BATCH_SIZE):
@@ -234,9 +246,10 @@ class Task4Executor:
             
             # Small delay between batches
             if i + BATCH_SIZE < len(self.tests):
-                time.sleep(1)
+                time.sleep(BATCH_PAUSE_SECONDS)
         
         self.end_time = datetime.now()
+        self.events.publish('run_finished')
     
     def generate_report(self) -> None:
         """Generate final comprehensive report"""
@@ -247,30 +260,35 @@ class Task4Executor:
         
         report_path = REPORTS_DIR / "TASK_4_EXECUTION_REPORT.md"
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write("# تقرير تنفيذ Task 4\n")
-            f.write("## مشروع COPRRA - تنفيذ شامل لجميع الاختبارات والأدوات\n\n")
-            f.write(f"**تاريخ التنفيذ**: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("---\n\n")
-            f.write("## 📊 ملخص النتائج\n\n")
-            f.write(f"- **إجمالي الاختبارات**: {self.results['total']}\n")
-            f.write(f"- **✓ نجح**: {self.results['passed']}\n")
-            f.write(f"- **✗ فشل**: {self.results['failed']}\n")
-            f.write(f"- **⚠ أخطاء**: {self.results['errors']}\n")
-            f.write(f"- **⊘ تم تخطيه**: {self.results['skipped']}\n\n")
-            f.write(f"**نسبة النجاح**: {success_rate}%\n\n")
-            f.write(f"**مدة التنفيذ**: {duration:.2f} ثانية ({duration/60:.2f} دقيقة)\n\n")
-            f.write("---\n\n")
-            
-            if success_rate >= 90:
-                f.write("## ✅ الحالة: ممتاز\n\n")
-                f.write("نسبة النجاح أعلى من 90% - المشروع في حالة ممتازة!\n\n")
-            elif success_rate >= 80:
-                f.write("## ✓ الحالة: جيد\n\n")
-                f.write("نسبة النجاح أعلى من 80% - المشروع في حالة جيدة.\n\n")
-            else:
-                f.write("## ⚠ الحالة: يحتاج إلى تحسين\n\n")
-                f.write("نسبة النجاح أقل من 80% - يُنصح بمراجعة الاختبارات الفاشلة.\n\n")
+        report = Report("تقرير تنفيذ Task 4", "مشروع COPRRA - تنفيذ شامل لجميع الاختبارات والأدوات",
+                        data={'results': self.results, 'success_rate': success_rate,
+                              'duration_seconds': duration, 'start_time': self.start_time.isoformat()})
+        report.field("تاريخ التنفيذ", self.start_time.strftime('%Y-%m-%d %H:%M:%S'))
+        report.rule()
+        report.heading("📊 ملخص النتائج")
+        report.fields([
+            ("إجمالي الاختبارات", self.results['total']),
+            ("✓ نجح", self.results['passed']),
+            ("✗ فشل", self.results['failed']),
+            ("⚠ أخطاء", self.results['errors']),
+            ("⊘ تم تخطيه", self.results['skipped']),
+        ])
+        report.field("نسبة النجاح", f"{success_rate}%")
+        report.field("مدة التنفيذ", f"{duration:.2f} ثانية ({duration/60:.2f} دقيقة)")
+        report.rule()
+        
+        if success_rate >= 90:
+            report.heading("✅ الحالة: ممتاز")
+            report.paragraph("نسبة النجاح أعلى من 90% - المشروع في حالة ممتازة!")
+        elif success_rate >= 80:
+            report.heading("✓ الحالة: جيد")
+            report.paragraph("نسبة النجاح أعلى من 80% - المشروع في حالة جيدة.")
+        else:
+            report.heading("⚠ الحالة: يحتاج إلى تحسين")
+            report.paragraph("نسبة النجاح أقل من 80% - يُنصح بمراجعة الاختبارات الفاشلة.")
+
+        report.extend(regression_section())
+        write_report(report, report_path, formats=('md', 'html', 'json'))
         
         print(f"{Colors.GREEN}✓ تم إنشاء التقرير: {report_path}{Colors.NC}")
     
@@ -285,13 +303,24 @@ class Task4Executor:
         
         self.parse_inventory()
         self.setup_environment()
+        self.order_by_history()
         self.execute_all()
+        self.history.ingest_batch_logs(REPORTS_DIR / "batch_logs")
+        self.history.save()
+        self.budget.stop()
+        self.budget.save()
         self.generate_report()
         
         print(f"\n{Colors.GREEN}✓ اكتمل تنفيذ Task 4 بنجاح{Colors.NC}")
         print(f"{Colors.CYAN}نسبة النجاح: {(self.results['passed'] * 100) // self.results['total']}%{Colors.NC}")
 
 if __name__ == "__main__":
-    executor = Task4Executor()
+    parser = argparse.ArgumentParser(description="Task 4 - تنفيذ جميع الاختبارات والأدوات")
+    parser.add_argument('--dashboard', type=int, metavar='PORT',
+                        help='serve a live progress dashboard on localhost:PORT')
+    args = parser.parse_args()
+    
+    bus, dashboard = start_dashboard(args.dashboard)
+    executor = Task4Executor(events=bus)
     executor.run()
 
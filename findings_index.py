@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Unified, deduplicated index of the static-analysis findings at the repo root.
+
+PHPStan, Psalm (baseline), PHPMD, phpcs, ESLint, Stylelint, gitleaks, trivy
+and PHP Insights reports are normalised into one SQLite table keyed by file,
+line and rule.  Rules that several tools report under different names (an
+unused variable, a non-final class, a long line, ...) map to one canonical
+rule, so the same defect is stored once with every tool that reported it.
+
+    python3 findings_index.py build
+    python3 findings_index.py file app/Services/PriceSearchService.php
+    python3 findings_index.py summary
+"""
+
+import argparse
+import glob
+import re
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from json_stream import JSONStreamError, iter_paths
+
+INDEX_FILE = Path("reports/findings.sqlite")
+
+SEVERITY_RANK = {'info': 1, 'warning': 2, 'error': 3}
+SEVERITY_NAME = {rank: name for name, rank in SEVERITY_RANK.items()}
+# Top-level project directories; absolute paths are cut back to these
+PROJECT_DIRS = ('app', 'bootstrap', 'config', 'database', 'lang', 'public', 'resources',
+                'routes', 'src', 'storage', 'tests')
+
+# (canonical rule, pattern over "tool:rule message"); first match wins
+CANONICAL_RULES = [
+    ('unused-variable', re.compile(r'UnusedVariable|UnusedLocalVariable|no-unused-vars|'
+                                   r'Variable \$\w+ (?:is|might be) never used', re.IGNORECASE)),
+    ('final-class', re.compile(r'ClassMustBeFinal|ForbiddenNormalClasses')),
+    ('line-length', re.compile(r'LineLength|max-len')),
+    ('missing-param-type', re.compile(r'MissingParamType|ParameterTypeHint|missingType\.parameter')),
+    ('missing-return-type', re.compile(r'MissingReturnType|ReturnTypeHint|missingType\.return')),
+    ('missing-property-type', re.compile(r'MissingPropertyType|PropertyTypeHint|missingType\.property')),
+    ('undefined-property', re.compile(r'UndefinedPropertyFetch|UndefinedMagicPropertyFetch|'
+                                      r'Access to an undefined property')),
+    ('static-access', re.compile(r'StaticAccess')),
+    ('else-expression', re.compile(r'ElseExpression|UselessElse')),
+    ('operator-spacing', re.compile(r'OperatorSpacing')),
+    ('cyclomatic-complexity', re.compile(r'CyclomaticComplexity')),
+    ('secret', re.compile(r'^(?:gitleaks|trivy-secret):')),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    line INTEGER NOT NULL,          -- 0 when the tool reports no line
+    rule TEXT NOT NULL,             -- canonical rule, or tool:rule
+    severity INTEGER NOT NULL,      -- most severe of the sources
+    message TEXT,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (file, line, rule)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    finding_id INTEGER NOT NULL REFERENCES findings(id) ON DELETE CASCADE,
+    tool TEXT NOT NULL,
+    tool_rule TEXT,
+    report TEXT NOT NULL,
+    UNIQUE (finding_id, tool, tool_rule)
+);
+CREATE TABLE IF NOT EXISTS reports (
+    path TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    mtime_ns INTEGER,
+    size INTEGER,
+    findings INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_findings_rule ON findings(rule);
+CREATE INDEX IF NOT EXISTS idx_sources_tool ON sources(tool);
+"""
+
+# (tool, file, line, tool rule, severity, message)
+Finding = Tuple[str, str, int, str, str, str]
+
+
+def project_path(path: str) -> str:
+    """Project-relative posix path for a path recorded on any machine"""
+    parts = path.replace('\\', '/').split('/')
+    for index, part in enumerate(parts):
+        if part in PROJECT_DIRS and index > 0:
+            return '/'.join(parts[index:])
+    path = '/'.join(parts)
+    while path.startswith('./'):
+        path = path[2:]
+    return path
+
+
+def sniff_name(tool: str, rule: str) -> Optional[str]:
+    """PHP_CodeSniffer sniff behind a phpcs source or an insights sniff class"""
+    if tool == 'phpcs':
+        parts = rule.split('.')
+        return parts[2] if len(parts) >= 3 else None
+    if tool == 'insights' and rule.endswith('Sniff'):
+        return rule[:-len('Sniff')]
+    return None
+
+
+def canonical_rule(tool: str, rule: str, message: str) -> str:
+    subject = f"{tool}:{rule} {message}"
+    for name, pattern in CANONICAL_RULES:
+        if pattern.search(subject):
+            return name
+    # phpcs and PHP Insights run many of the same sniffs
+    sniff = sniff_name(tool, rule)
+    if sniff:
+        return f"sniff:{sniff}"
+    return f"{tool}:{rule}"
+
+
+def _severity(value, mapping: Dict = None, default: str = 'warning') -> str:
+    value = str(value).lower() if value is not None else ''
+    if mapping and value in mapping:
+        return mapping[value]
+    if value in SEVERITY_RANK:
+        return value
+    if value in ('critical', 'high', 'fatal'):
+        return 'error'
+    if value in ('medium', 'moderate'):
+        return 'warning'
+    if value in ('low', 'unknown', 'note', 'notice'):
+        return 'info'
+    return default
+
+
+# --- Report readers -------------------------------------------------------
+
+def read_phpstan(path: Path) -> Iterator[Finding]:
+    for (_, file, _, _), message in iter_paths(path, 'files.*.messages.item'):
+        rule = message.get('identifier') or 'error'
+        yield 'phpstan', project_path(file), message.get('line') or 0, rule, 'error', message.get('message', '')
+
+
+def read_phpcs(path: Path) -> Iterator[Finding]:
+    for (_, file, _, _), message in iter_paths(path, 'files.*.messages.item'):
+        yield ('phpcs', project_path(file), message.get('line') or 0, message.get('source', ''),
+               _severity(message.get('type')), message.get('message', ''))
+
+
+def read_eslint(path: Path) -> Iterator[Finding]:
+    # ESLint severities: 1 = warning, 2 = error
+    for (_,), result in iter_paths(path, 'item'):
+        for message in result.get('messages', []):
+            yield ('eslint', project_path(result.get('filePath', '')), message.get('line') or 0,
+                   message.get('ruleId') or 'parse', _severity(message.get('severity'), {'1': 'warning', '2': 'error'}),
+                   message.get('message', ''))
+
+
+def read_stylelint(path: Path) -> Iterator[Finding]:
+    for (_,), result in iter_paths(path, 'item'):
+        for warning in result.get('warnings', []):
+            yield ('stylelint', project_path(result.get('source', '')), warning.get('line') or 0,
+                   warning.get('rule', ''), _severity(warning.get('severity')), warning.get('text', ''))
+
+
+def read_gitleaks(path: Path) -> Iterator[Finding]:
+    for (_,), leak in iter_paths(path, 'item'):
+        yield ('gitleaks', project_path(leak.get('File', '')), leak.get('StartLine') or 0,
+               leak.get('RuleID', ''), 'error', leak.get('Description', ''))
+
+
+def read_trivy(path: Path) -> Iterator[Finding]:
+    for (_, _), result in iter_paths(path, 'Results.item'):
+        target = project_path(result.get('Target', ''))
+        for vulnerability in result.get('Vulnerabilities') or []:
+            yield ('trivy', target, 0, vulnerability.get('VulnerabilityID', ''),
+                   _severity(vulnerability.get('Severity')),
+                   f"{vulnerability.get('PkgName', '')}: {vulnerability.get('Title', '')}")
+        for misconfiguration in result.get('Misconfigurations') or []:
+            line = (misconfiguration.get('CauseMetadata') or {}).get('StartLine') or 0
+            yield ('trivy', target, line, misconfiguration.get('ID', ''),
+                   _severity(misconfiguration.get('Severity')), misconfiguration.get('Title', ''))
+        for secret in result.get('Secrets') or []:
+            yield ('trivy-secret', target, secret.get('StartLine') or 0, secret.get('RuleID', ''),
+                   'error', secret.get('Title', ''))
+
+
+def read_insights(path: Path) -> Iterator[Finding]:
+    for (category, _), issue in iter_paths(path, '*.item'):
+        rule = issue.get('insightClass') or issue.get('title', '')
+        # Architecture/complexity insights are advice rather than defects
+        severity = 'warning' if category in ('Code', 'Security') else 'info'
+        yield ('insights', project_path(issue.get('file', '')), issue.get('line') or 0,
+               rule.rsplit('\\', 1)[-1], severity, issue.get('message') or issue.get('title', ''))
+
+
+def read_psalm_baseline(path: Path) -> Iterator[Finding]:
+    """The baseline has no line numbers: one finding per file and issue type"""
+    file = None
+    for event, element in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            if element.tag == 'file':
+                file = project_path(element.get('src', ''))
+            continue
+        if element.tag == 'file':
+            element.clear()
+        elif element.tag not in ('code', 'files') and file is not None:
+            codes = [code.text or '' for code in element.findall('code')]
+            for _ in codes or ['']:
+                yield 'psalm', file, 0, element.tag, 'error', ', '.join(sorted(set(codes)))[:500]
+            element.clear()
+
+
+def read_phpmd(path: Path) -> Iterator[Finding]:
+    """PHPMD XML report (<pmd><file><violation>)"""
+    file = None
+    for event, element in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            if element.tag == 'file':
+                file = project_path(element.get('name', ''))
+            continue
+        if element.tag == 'violation' and file is not None:
+            # PHPMD priorities: 1 (highest) .. 5
+            priority = int(element.get('priority', 3))
+            severity = 'error' if priority <= 2 else 'warning' if priority == 3 else 'info'
+            yield ('phpmd', file, int(element.get('beginline', 0)), element.get('rule', ''),
+                   severity, (element.text or '').strip())
+            element.clear()
+
+
+# (tool, glob patterns, reader)
+REPORTS: List[Tuple[str, List[str], Callable[[Path], Iterator[Finding]]]] = [
+    ('phpstan', ['phpstan-baseline-full-report.json', 'phpstan-report.json'], read_phpstan),
+    ('psalm', ['psalm-baseline.xml'], read_psalm_baseline),
+    ('phpmd', ['phpmd-report.xml', 'phpmd-current.xml'], read_phpmd),
+    ('phpcs', ['phpcs-report.json'], read_phpcs),
+    ('eslint', ['eslint-report.json'], read_eslint),
+    ('stylelint', ['stylelint-report.json'], read_stylelint),
+    ('gitleaks', ['gitleaks-report*.json'], read_gitleaks),
+    ('trivy', ['trivy-fs.json'], read_trivy),
+    ('insights', ['insights_report.json'], read_insights),
+]
+
+
+def discover_reports(root: Path = Path('.')) -> List[Tuple[str, Path, Callable]]:
+    found = []
+    for tool, patterns, reader in REPORTS:
+        for pattern in patterns:
+            for path in sorted(glob.glob(str(root / pattern))):
+                found.append((tool, Path(path), reader))
+    return found
+
+
+class FindingsIndex:
+    """SQLite store of deduplicated findings"""
+
+    def __init__(self, path: Path = INDEX_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def rebuild(self, reports: List[Tuple[str, Path, Callable]]) -> Dict[str, int]:
+        """Replace the index with the findings of `reports`; returns findings per report"""
+        counts: Dict[str, int] = {}
+        with self.connection:
+            for table in ('sources', 'findings', 'reports'):
+                self.connection.execute(f"DELETE FROM {table}")
+            for tool, path, reader in reports:
+                if path.stat().st_size == 0:
+                    counts[str(path)] = 0
+                    continue
+                try:
+                    counts[str(path)] = self._ingest(path, reader)
+                except (JSONStreamError, ET.ParseError, UnicodeError) as e:
+                    print(f"⚠ {path}: unreadable report ({e})", file=sys.stderr)
+                    counts[str(path)] = 0
+                    continue
+                stat = path.stat()
+                self.connection.execute(
+                    "INSERT INTO reports (path, tool, mtime_ns, size, findings) VALUES (?, ?, ?, ?, ?)",
+                    (str(path), tool, stat.st_mtime_ns, stat.st_size, counts[str(path)]))
+        return counts
+
+    def _ingest(self, path: Path, reader: Callable[[Path], Iterator[Finding]]) -> int:
+        count = 0
+        for tool, file, line, tool_rule, severity, message in reader(path):
+            rank = SEVERITY_RANK[severity]
+            finding_id = self.connection.execute("""
+                INSERT INTO findings (file, line, rule, severity, message) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (file, line, rule) DO UPDATE SET
+                    occurrences = occurrences + 1,
+                    severity = MAX(severity, excluded.severity)
+                RETURNING id
+            """, (file, line, canonical_rule(tool, tool_rule, message), rank, message)).fetchone()[0]
+            self.connection.execute(
+                "INSERT OR IGNORE INTO sources (finding_id, tool, tool_rule, report) VALUES (?, ?, ?, ?)",
+                (finding_id, tool, tool_rule, str(path)))
+            count += 1
+        return count
+
+    def for_file(self, file: str) -> List[sqlite3.Row]:
+        return self.connection.execute("""
+            SELECT findings.*, GROUP_CONCAT(DISTINCT sources.tool) AS tools
+            FROM findings JOIN sources ON sources.finding_id = findings.id
+            WHERE findings.file = ?
+            GROUP BY findings.id
+            ORDER BY findings.line, findings.rule
+        """, (project_path(file),)).fetchall()
+
+    def summary(self) -> Dict:
+        rows = self.connection.execute("""
+            SELECT COUNT(*) AS findings,
+                   SUM(occurrences) AS reported,
+                   SUM((SELECT COUNT(DISTINCT tool) FROM sources WHERE finding_id = findings.id) > 1) AS shared
+            FROM findings
+        """).fetchone()
+        by_tool = self.connection.execute(
+            "SELECT tool, COUNT(DISTINCT finding_id) AS findings FROM sources GROUP BY tool ORDER BY findings DESC"
+        ).fetchall()
+        top_files = self.connection.execute(
+            "SELECT file, COUNT(*) AS findings FROM findings GROUP BY file ORDER BY findings DESC LIMIT 10"
+        ).fetchall()
+        return {'totals': dict(rows), 'by_tool': [dict(row) for row in by_tool],
+                'top_files': [dict(row) for row in top_files]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Unified static-analysis findings index")
+    parser.add_argument('--index', type=Path, default=INDEX_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('build', help='(re)build the index from the reports at the repo root')
+    file_parser = sub.add_parser('file', help='all findings in one file')
+    file_parser.add_argument('path')
+    rule_parser = sub.add_parser('rule', help='all findings of one (canonical or tool:rule) rule')
+    rule_parser.add_argument('rule')
+    sub.add_parser('summary', help='totals, findings per tool and hottest files')
+    args = parser.parse_args()
+
+    index = FindingsIndex(args.index)
+
+    if args.command == 'build':
+        start = time.time()
+        counts = index.rebuild(discover_reports())
+        for path, count in counts.items():
+            print(f"  {count:>6}  {path}")
+        totals = index.summary()['totals']
+        print(f"✓ {totals['reported'] or 0} reported → {totals['findings']} unique findings "
+              f"({totals['shared'] or 0} reported by several tools) in {time.time() - start:.1f}s")
+        return 0
+
+    if args.command in ('file', 'rule'):
+        start = time.perf_counter()
+        if args.command == 'file':
+            rows = index.for_file(args.path)
+        else:
+            rows = index.connection.execute("""
+                SELECT findings.*, GROUP_CONCAT(DISTINCT sources.tool) AS tools
+                FROM findings JOIN sources ON sources.finding_id = findings.id
+                WHERE findings.rule = ? GROUP BY findings.id ORDER BY findings.file, findings.line
+            """, (args.rule,)).fetchall()
+        elapsed = (time.perf_counter() - start) * 1000
+        for row in rows:
+            location = f"{row['file']}:{row['line']}" if row['line'] else row['file']
+            count = f" ×{row['occurrences']}" if row['occurrences'] > 1 else ''
+            print(f"{SEVERITY_NAME[row['severity']]:<7} {location:<60} {row['rule']:<40} "
+                  f"[{row['tools']}]{count}")
+            if row['message']:
+                print(f"        {row['message'].splitlines()[0][:150]}")
+        print(f"{len(rows)} findings ({elapsed:.1f} ms)")
+        return 0
+
+    summary = index.summary()
+    totals = summary['totals']
+    print(f"{totals['findings']} unique findings, {totals['reported'] or 0} reports, "
+          f"{totals['shared'] or 0} found by several tools\n")
+    for row in summary['by_tool']:
+        print(f"  {row['findings']:>6}  {row['tool']}")
+    print("\nHottest files:")
+    for row in summary['top_files']:
+        print(f"  {row['findings']:>6}  {row['file']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
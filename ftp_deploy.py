@@ -1,10 +1,17 @@
+import argparse
 import ftplib
+import functools
+import io
 import os
 from pathlib import Path
 import sys
 import time
 import requests
 
+from deploy_manifest import MANIFEST_NAME, build_manifest, manifest_path, sync
+from ftp_upload_pool import DEFAULT_WORKERS, FtpUploadPool, close_quietly
+from remote_tree import RemoteTree
+
 
 # ===== إعدادات الاتصال (معبأة من بياناتك) =====
 FTP_HOST = "ftp.coprra.com"
@@ -41,6 +48,9 @@ EXTRA_FILES = [
     BASE_DIR / "deploy_unpack.php",
 ]
 
+# بصمات الملفات المحلية (الحجم/الوقت/SHA-256) لتجنب إعادة حسابها في كل نشر
+MANIFEST_CACHE = BASE_DIR / "reports" / "deploy_manifest_ftp.json"
+
 
 def log(msg: str):
     print(f"[DEPLOY] {msg}")
@@ -128,15 +138,38 @@ def ensure_remote_dir(ftp: ftplib.FTP, remote_dir: str):
         try:
             ftp.cwd(part)
         except Exception:
-            ftp.mkd(part)
+            try:
+                ftp.mkd(part)
+            except ftplib.error_perm:
+                pass  # أنشأه اتصال آخر بالتوازي
             ftp.cwd(part)
 
 
-def upload_file(ftp: ftplib.FTP, local_path: Path, remote_path: str):
+def list_subdirs(ftp: ftplib.FTP, path: str):
+    """أسماء المجلدات الفرعية لمسار بعيد (MLSD، ثم LIST للخوادم التي لا تدعمه)، أو None إن لم يوجد"""
+    try:
+        return [name for name, facts in ftp.mlsd(path, facts=["type"]) if facts.get("type") == "dir"]
+    except ftplib.error_perm as e:
+        if not str(e).startswith(("500", "502", "504")):
+            return None
+    lines = []
+    try:
+        ftp.retrlines(f"LIST {path}", lines.append)
+    except ftplib.error_perm:
+        return None
+    return [line.split(None, 8)[-1] for line in lines if line.startswith("d")]
+
+
+def upload_file(ftp: ftplib.FTP, local_path: Path, remote_path: str, tree: RemoteTree = None):
+    """مع `tree` (مجلداته أُنشئت مسبقًا) يُرفع الملف بأمر STOR واحد إلى مساره المطلق"""
     if not local_path.exists():
         log(f"تخطي: الملف غير موجود محليًا {local_path}")
         return
     log(f"رفع ملف: {local_path} -> {remote_path}")
+    if tree is not None:
+        with open(local_path, "rb") as f:
+            ftp.storbinary(f"STOR {tree.absolute(remote_path)}", f)
+        return
     dirname = os.path.dirname(remote_path)
     if dirname:
         # انتقل أو أنشئ المسار
@@ -166,34 +199,115 @@ def upload_directory(ftp: ftplib.FTP, local_dir: Path, remote_base: str):
             upload_file(ftp, local_file, remote_file)
 
 
-def deploy():
+class FtpTransport:
+    """نقل ملفات المزامنة (deploy_manifest) عبر FTP.
+
+    `connect()` يفتح جلسة جديدة داخل مجلد الجذر؛ الرفع يتم عبر `workers` جلسة متوازية.
+    """
+
+    def __init__(self, ftp: ftplib.FTP, connect, workers: int = DEFAULT_WORKERS):
+        self.ftp = ftp
+        self.connect = connect
+        self.workers = workers
+        self.root = ftp.pwd()
+
+    def session(self) -> ftplib.FTP:
+        """الجلسة الرئيسية، مع إعادة الاتصال إن أغلقها الخادم بسبب الخمول أثناء الرفع"""
+        try:
+            self.ftp.voidcmd("NOOP")
+        except ftplib.all_errors:
+            close_quietly(self.ftp)
+            self.ftp = self.connect()
+        return self.ftp
+
+    def read_manifest(self):
+        # manifest داخل الجذر من نشر سابق يُستخدم مرة واحدة ثم يُنقل خارجه
+        for path in (manifest_path(self.root), MANIFEST_NAME):
+            buffer = io.BytesIO()
+            try:
+                self.ftp.retrbinary(f"RETR {path}", buffer.write)
+            except ftplib.error_perm:
+                continue
+            return buffer.getvalue()
+        return None
+
+    def upload(self, files):
+        # مرور واحد لاكتشاف المجلدات الموجودة وإنشاء الناقص منها قبل الرفع
+        remote_paths = [remote_path for _, remote_path in files]
+        tree = RemoteTree(self.root)
+        ftp = self.session()
+        tree.scan(functools.partial(list_subdirs, ftp), remote_paths)
+        tree.create_missing(ftp.mkd, remote_paths)
+        log(f"المجلدات البعيدة: {tree.describe()}")
+        pool = FtpUploadPool(self.connect, functools.partial(upload_file, tree=tree),
+                             workers=self.workers, log=log)
+        return pool.upload(files)
+
+    def delete(self, remote_paths):
+        deleted = []
+        for remote_path in remote_paths:
+            try:
+                log(f"حذف ملف: {remote_path}")
+                self.session().delete(remote_path)
+                deleted.append(remote_path)
+            except ftplib.error_perm as e:
+                # غير موجود أصلاً يعني أنه محذوف
+                if str(e).startswith("550"):
+                    deleted.append(remote_path)
+                else:
+                    log(f"فشل حذف {remote_path}: {e}")
+        return deleted
+
+    def write_manifest(self, data: bytes):
+        # خارج الجذر: الخادم يقدّم ملفات *.json الموجودة فيه لأي زائر
+        ftp = self.session()
+        ftp.storbinary(f"STOR {manifest_path(self.root)}", io.BytesIO(data))
+        try:
+            ftp.delete(MANIFEST_NAME)
+        except ftplib.error_perm:
+            pass
+
+
+def deploy_sources():
+    """(مسار محلي، مسار بعيد نسبةً إلى الجذر) لكل ما يُنشر"""
+    sources = [(d, d.name) for d in APP_DIRS]
+    # مجلد public يُرفع كـ public/ داخل الجذر (لا نقوم بالمسار المسطح)
+    sources.append((PUBLIC_DIR, "public"))
+    # ملفات إضافية (جذرية)
+    sources.extend((lf, lf.name) for lf in EXTRA_FILES)
+    return sources
+
+
+def deploy(full: bool = False, delete: bool = False, dry_run: bool = False,
+           workers: int = DEFAULT_WORKERS):
     ftp = None
     try:
+        log("حساب بصمات الملفات المحلية")
+        sources = deploy_sources()
+        local = build_manifest(sources, cache=MANIFEST_CACHE)
+
         ftp = connect_ftp()
         # حدد الجذر الفعلي
         log("تحديد مسار الجذر للموقع")
         docroot = find_docroot(ftp)
+        docroot_path = ftp.pwd()
 
-        # رفع مجلدات التطبيق الأساسية إلى الجذر
-        log("رفع مجلدات التطبيق الأساسية")
-        for d in APP_DIRS:
-            upload_directory(ftp, d, d.name)
-
-        # رفع مجلد public كـ public/ داخل الجذر (لا نقوم بالمسار المسطح)
-        log("رفع مجلد public إلى public/")
-        upload_directory(ftp, PUBLIC_DIR, "public")
+        def connect_docroot():
+            session = connect_ftp()
+            session.cwd(docroot_path)
+            return session
 
-        # رفع ملفات إضافية (جذرية)
-        for lf in EXTRA_FILES:
-            upload_file(ftp, lf, f"./{lf.name}")
+        # رفع الملفات المضافة والمعدلة فقط مقارنةً بـ manifest آخر نشر على الخادم
+        log(f"مزامنة الملفات المتغيرة عبر {workers} اتصال متوازٍ")
+        transport = FtpTransport(ftp, connect_docroot, workers)
+        sync(transport, local, delete=delete, full=full, dry_run=dry_run,
+             scope=[remote for _, remote in sources], log=log)
+        # قد يكون النقل أعاد فتح الجلسة الرئيسية
+        ftp = transport.ftp
 
         log("اكتمل الرفع بنجاح")
     finally:
-        if ftp:
-            try:
-                ftp.quit()
-            except Exception:
-                ftp.close()
+        close_quietly(ftp)
 
 
 def verify_site(base: str = "https://coprra.com"):
@@ -219,9 +333,18 @@ def verify_site(base: str = "https://coprra.com"):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="نشر COPRRA عبر FTP (رفع الملفات المتغيرة فقط)")
+    parser.add_argument("--full", action="store_true", help="تجاهل manifest الخادم ورفع كل الملفات")
+    parser.add_argument("--delete", action="store_true", help="حذف الملفات التي أُزيلت محليًا من الخادم")
+    parser.add_argument("--dry-run", action="store_true", help="عرض خطة المزامنة دون رفع")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="عدد اتصالات FTP المتوازية")
+    args = parser.parse_args()
+
     start = time.time()
     try:
-        deploy()
+        deploy(full=args.full, delete=args.delete, dry_run=args.dry_run, workers=args.workers)
+        if args.dry_run:
+            sys.exit(0)
         ok = verify_site()
         duration = time.time() - start
         if ok:
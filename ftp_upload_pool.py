@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Parallel FTP upload pool for ftp_deploy.py.
+
+Deploying thousands of small PHP files over one control connection is bound
+by round-trip latency, not bandwidth.  The pool opens N authenticated
+sessions, each on its own thread, that take files from one shared queue.
+A session that fails (timeout, dropped connection, 421) is closed and
+reopened and the file is retried; permanent refusals (5xx) are not retried.
+A meter logs the aggregate files/s and MB/s while the upload runs:
+
+    pool = FtpUploadPool(connect, upload_one, workers=4, log=log)
+    uploaded = pool.upload([(Path('app/Models/User.php'), 'app/Models/User.php'), ...])
+
+`connect()` must return a logged-in session already in the deploy root;
+`upload_one(ftp, local_path, remote_path)` transfers one file on it.
+"""
+
+import ftplib
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+DEFAULT_WORKERS = 4
+RETRIES = 3
+RECONNECT_DELAY = 1.0
+METER_INTERVAL = 5.0
+
+
+class ThroughputMeter:
+    """Thread-safe file/byte counters that log progress at most every `interval` seconds"""
+
+    def __init__(self, total_files: int, total_bytes: int,
+                 log: Callable[[str], None] = print, interval: float = METER_INTERVAL):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.log = log
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.files = 0
+        self.bytes = 0
+        self.failed = 0
+        self.retries = 0
+        self.started = time.monotonic()
+        self.reported = self.started
+
+    def add(self, size: int = 0, failed: bool = False, retried: bool = False) -> None:
+        with self.lock:
+            if retried:
+                self.retries += 1
+            elif failed:
+                self.failed += 1
+            else:
+                self.files += 1
+                self.bytes += size
+            now = time.monotonic()
+            if now - self.reported < self.interval:
+                return
+            self.reported = now
+        self.log(self.describe())
+
+    def describe(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.bytes / elapsed
+        remaining = self.total_bytes - self.bytes
+        eta = f", ETA {remaining / rate:.0f}s" if rate and remaining > 0 else ""
+        return (f"{self.files + self.failed}/{self.total_files} files, "
+                f"{self.bytes / 1024 / 1024:.1f}/{self.total_bytes / 1024 / 1024:.1f} MB, "
+                f"{self.files / elapsed:.1f} files/s, {rate / 1024 / 1024:.2f} MB/s{eta}"
+                + (f", {self.failed} failed" if self.failed else "")
+                + (f", {self.retries} retries" if self.retries else ""))
+
+
+def close_quietly(ftp: Optional[ftplib.FTP]) -> None:
+    if ftp is None:
+        return
+    try:
+        ftp.quit()
+    except Exception:
+        ftp.close()
+
+
+class FtpUploadPool:
+    """Uploads files on `workers` FTP sessions fed from one shared queue"""
+
+    def __init__(self, connect: Callable[[], ftplib.FTP],
+                 upload_one: Callable[[ftplib.FTP, Path, str], None],
+                 workers: int = DEFAULT_WORKERS, retries: int = RETRIES,
+                 log: Callable[[str], None] = print):
+        self.connect = connect
+        self.upload_one = upload_one
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.log = log
+
+    def upload(self, files: Sequence[Tuple[Path, str]]) -> List[str]:
+        """Upload [(local path, remote path)] and return the remote paths that succeeded"""
+        if not files:
+            return []
+        work: "queue.Queue[Tuple[Path, str, int]]" = queue.Queue()
+        sizes = {}
+        for local_path, remote_path in files:
+            sizes[remote_path] = local_path.stat().st_size if local_path.exists() else 0
+            work.put((local_path, remote_path, 0))
+        self.meter = ThroughputMeter(len(files), sum(sizes.values()), self.log)
+        uploaded: List[str] = []
+        lock = threading.Lock()
+
+        def worker() -> None:
+            ftp = None
+            try:
+                while True:
+                    try:
+                        local_path, remote_path, attempt = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        if ftp is None:
+                            ftp = self.connect()
+                        self.upload_one(ftp, local_path, remote_path)
+                    except ftplib.error_perm as e:
+                        # 5xx: the server refused this file; another session would too
+                        self.log(f"{remote_path}: {e}")
+                        self.meter.add(failed=True)
+                        continue
+                    except (ftplib.Error, OSError, EOFError) as e:
+                        close_quietly(ftp)
+                        ftp = None
+                        if attempt < self.retries:
+                            self.log(f"{remote_path}: {e} (reconnecting, attempt {attempt + 2})")
+                            self.meter.add(retried=True)
+                            time.sleep(RECONNECT_DELAY * (attempt + 1))
+                            work.put((local_path, remote_path, attempt + 1))
+                        else:
+                            self.log(f"{remote_path}: {e} (giving up)")
+                            self.meter.add(failed=True)
+                        continue
+                    except Exception as e:
+                        # Local problems (unreadable file, ...) fail this file, not the worker
+                        self.log(f"{remote_path}: {e}")
+                        self.meter.add(failed=True)
+                        continue
+                    with lock:
+                        uploaded.append(remote_path)
+                    self.meter.add(sizes[remote_path])
+            finally:
+                close_quietly(ftp)
+
+        threads = [threading.Thread(target=worker, name=f"ftp-{i + 1}", daemon=True)
+                   for i in range(min(self.workers, len(files)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.log(self.meter.describe())
+        return uploaded
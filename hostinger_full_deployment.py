@@ -4,11 +4,14 @@ COPRRA Automated Hostinger Deployment Script
 Executes all deployment phases automatically via SSH
 """
 
+import argparse
 import sys
 import time
 import re
 from datetime import datetime
 
+from deployment_profiler import PROFILER, trace_file_name
+
 try:
     import paramiko
 except ImportError:
@@ -17,6 +20,10 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "paramiko"])
     import paramiko
 
+from deploy_manifest import walk_sources
+from tar_stream_deploy import COMPRESSIONS, StreamDeployError, stream_deploy
+from upload_laravel_files import LOCAL_PATH, deploy_sources, should_exclude
+
 # SSH Configuration
 SSH_HOST = "45.87.81.218"
 SSH_PORT = 65002
@@ -40,7 +47,8 @@ class Colors:
     UNDERLINE = '\033[4m'
 
 def print_phase(phase_num, title):
-    """Print phase header"""
+    """Print phase header; every header starts a profiled phase"""
+    PROFILER.phase(f"PHASE {phase_num}: {title}")
     print(f"\n{'═' * 80}")
     print(f"{Colors.HEADER}{Colors.BOLD}PHASE {phase_num}: {title}{Colors.ENDC}")
     print(f"{'═' * 80}\n")
@@ -63,25 +71,31 @@ def print_warning(message):
 
 def execute_ssh_command(ssh_client, command, print_output=True, timeout=300):
     """Execute SSH command and return output"""
-    try:
-        stdin, stdout, stderr = ssh_client.exec_command(command, timeout=timeout)
-
-        output = stdout.read().decode('utf-8', errors='ignore')
-        error = stderr.read().decode('utf-8', errors='ignore')
-        exit_status = stdout.channel.recv_exit_status()
-
-        if print_output and output:
-            print(output)
-
-        if error and exit_status != 0:
-            if print_output:
-                print_error(f"Error: {error}")
-            return False, error
-
-        return True, output
-    except Exception as e:
-        print_error(f"Command execution failed: {str(e)}")
-        return False, str(e)
+    with PROFILER.command(command) as span:
+        try:
+            stdin, stdout, stderr = ssh_client.exec_command(command, timeout=timeout)
+
+            output = stdout.read()
+            error = stderr.read()
+            exit_status = stdout.channel.recv_exit_status()
+            span.add(remote_seconds=span.duration, sent=len(command.encode('utf-8')),
+                     received=len(output) + len(error), exit_code=exit_status)
+            output = output.decode('utf-8', errors='ignore')
+            error = error.decode('utf-8', errors='ignore')
+
+            if print_output and output:
+                print(output)
+
+            if error and exit_status != 0:
+                if print_output:
+                    print_error(f"Error: {error}")
+                return False, error
+
+            return True, output
+        except Exception as e:
+            span.add(error=str(e))
+            print_error(f"Command execution failed: {str(e)}")
+            return False, str(e)
 
 def connect_ssh():
     """Establish SSH connection"""
@@ -113,6 +127,23 @@ def connect_ssh():
         print_error(f"SSH connection failed: {str(e)}")
         return None
 
+def upload_application(ssh_client, local_path, compression):
+    """Stream the local Laravel tree into ~/public_html as one compressed tar"""
+    print_phase("1B", "UPLOAD APPLICATION FILES")
+
+    print_info(f"Streaming {local_path} to ~/public_html...")
+    with PROFILER.span("tar stream upload", "transfer") as span:
+        try:
+            stats = stream_deploy(ssh_client, walk_sources(deploy_sources(local_path), should_exclude),
+                                  "public_html", compression=compression, log=print_info)
+        except StreamDeployError as e:
+            print_error(f"Upload failed: {str(e)}")
+            return False
+        span.add(sent=stats.sent_bytes)
+
+    print_success("Application files uploaded")
+    return True
+
 def verify_and_organize_files(ssh_client):
     """Verify and organize files on server"""
     print_phase(2, "VERIFY AND ORGANIZE FILES")
@@ -674,6 +705,10 @@ Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         f.write(report)
 
     print_success("Deployment report created: DEPLOYMENT_REPORT.md")
+
+    trace_file = trace_file_name()
+    print(f"\n{PROFILER.finish(trace_file)}\n")
+    print_info(f"Chrome trace: {trace_file} (chrome://tracing or ui.perfetto.dev)")
     print(f"\n{Colors.OKGREEN}{Colors.BOLD}{'═' * 80}{Colors.ENDC}")
     print(f"{Colors.OKGREEN}{Colors.BOLD}🎉 DEPLOYMENT COMPLETED SUCCESSFULLY! 🎉{Colors.ENDC}")
     print(f"{Colors.OKGREEN}{Colors.BOLD}{'═' * 80}{Colors.ENDC}\n")
@@ -683,6 +718,13 @@ Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="COPRRA automated Hostinger deployment")
+    parser.add_argument("--upload", nargs="?", const=LOCAL_PATH, metavar="LOCAL_PATH",
+                        help=f"first stream the Laravel files as one tar archive (default: {LOCAL_PATH})")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default="auto",
+                        help="archive compression for --upload (auto = zstd if available, else gzip)")
+    args = parser.parse_args()
+
     print(f"\n{Colors.HEADER}{Colors.BOLD}")
     print("═" * 80)
     print("🚀 COPRRA AUTOMATED HOSTINGER DEPLOYMENT")
@@ -703,6 +745,10 @@ def main():
         # Execute all phases
         db_password = None
 
+        if args.upload and not upload_application(ssh_client, args.upload, args.compression):
+            print_error("Failed to upload application files. Aborting.")
+            sys.exit(1)
+
         verify_and_organize_files(ssh_client)
         db_password = create_database(ssh_client)
 
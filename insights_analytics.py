@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Analytics over PHP Insights reports (insights_report.json, insights-*.json).
+
+The issues of one or more reports are streamed (json_stream) and flattened
+once into a columnar table of integer codes (report, category, file,
+directory, insight class); hot files, per-directory density and per-category
+trends are then all bincounts over those columns.  NumPy is used when
+installed; otherwise the same counts are computed in pure Python.
+
+    python3 insights_analytics.py                                   # insights_report.json
+    python3 insights_analytics.py insights.json insights-2.json insights_report.json
+    python3 insights_analytics.py --diff insights-4.json insights_report.json
+"""
+
+import argparse
+import json
+import os
+import posixpath
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from json_stream import iter_items
+
+try:
+    import numpy as np
+except ImportError:  # same results, just slower on very large reports
+    np = None
+
+DEFAULT_REPORT = Path("insights_report.json")
+# Scores at the top level; every other top-level array holds one category's issues
+SUMMARY_KEY = 'summary'
+# PHP Insights categories, listed even when a report has no issues in them
+CATEGORIES = ('Code', 'Complexity', 'Architecture', 'Style', 'Security')
+TOP = 20
+# Counts in messages ("using 22 lines") change without the insight changing
+NUMBER = re.compile(r'\d+')
+
+
+def normalize_file(path: str) -> str:
+    path = path.replace('\\', '/')
+    while path.startswith('./'):
+        path = path[2:]
+    return path
+
+
+def report_issues(path: Path, summary: Optional[Dict] = None) -> Iterable[Tuple[str, Dict]]:
+    """(category, issue) pairs streamed from a report; fills `summary` on the way"""
+    for location, value in iter_items(path, [SUMMARY_KEY, '*.item']):
+        if location == SUMMARY_KEY:
+            if summary is not None:
+                summary.update(value)
+            continue
+        yield location.split('.')[0], value
+
+
+class Vocabulary:
+    """Interns strings to dense integer codes"""
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class IssueTable:
+    """Columnar table of the issues of one or more reports"""
+
+    COLUMNS = ('report', 'category', 'file', 'directory', 'insight', 'line')
+
+    def __init__(self):
+        self.reports: List[str] = []
+        self.summaries: List[Dict] = []
+        self.categories = Vocabulary()
+        for category in CATEGORIES:
+            self.categories.code(category)
+        self.files = Vocabulary()
+        self.directories = Vocabulary()
+        self.insights = Vocabulary()
+        self.titles: Dict[int, str] = {}
+        self.columns: Dict[str, List[int]] = {name: [] for name in self.COLUMNS}
+
+    def add_report(self, name: str, path: Path) -> None:
+        """Stream one report into the table"""
+        report = len(self.reports)
+        self.reports.append(name)
+        self.summaries.append({})
+        columns = self.columns
+        for category, issue in report_issues(path, self.summaries[report]):
+            file = normalize_file(issue.get('file', ''))
+            insight = self.insights.code(issue.get('insightClass') or issue.get('title', ''))
+            self.titles.setdefault(insight, issue.get('title', ''))
+            columns['report'].append(report)
+            columns['category'].append(self.categories.code(category))
+            columns['file'].append(self.files.code(file))
+            columns['directory'].append(self.directories.code(posixpath.dirname(file) or '.'))
+            columns['insight'].append(insight)
+            columns['line'].append(issue.get('line') or -1)
+
+    def __len__(self) -> int:
+        return len(self.columns['report'])
+
+    def arrays(self) -> Dict:
+        """The columns as NumPy arrays (or the plain lists without NumPy)"""
+        if np is None:
+            return self.columns
+        return {name: np.asarray(values, dtype=np.int64) for name, values in self.columns.items()}
+
+
+def bincount(codes, size: int, mask=None) -> List[int]:
+    """Occurrences of each code in [0, size), optionally of the masked rows only"""
+    if np is not None:
+        if mask is not None:
+            codes = codes[mask]
+        return np.bincount(codes, minlength=size).tolist()
+    counts = [0] * size
+    for index, code in enumerate(codes):
+        if mask is None or mask[index]:
+            counts[code] += 1
+    return counts
+
+
+def combine(major, minor, minor_size: int):
+    """Single code for a pair of columns, so one bincount yields a 2-D table"""
+    if np is not None:
+        return major * minor_size + minor
+    return [a * minor_size + b for a, b in zip(major, minor)]
+
+
+def select(column, value: int):
+    if np is not None:
+        return column == value
+    return [code == value for code in column]
+
+
+def php_files_per_directory(root: Path) -> Counter:
+    counts: Counter = Counter()
+    for directory in ('app', 'config', 'database', 'routes', 'src'):
+        for dirpath, _, filenames in os.walk(root / directory):
+            relative = Path(dirpath).relative_to(root).as_posix()
+            counts[relative] += sum(1 for name in filenames if name.endswith('.php'))
+    return counts
+
+
+def analyse(table: IssueTable, root: Path = Path('.'), top: int = TOP) -> Dict:
+    """Hot files, directory density and category trends of `table`"""
+    columns = table.arrays()
+    categories = len(table.categories)
+    latest = select(columns['report'], len(table.reports) - 1)
+
+    # files x categories and directories x categories of the latest report
+    by_file = bincount(combine(columns['file'], columns['category'], categories),
+                       len(table.files) * categories, latest)
+    by_directory = bincount(columns['directory'], len(table.directories), latest)
+    by_insight = bincount(columns['insight'], len(table.insights), latest)
+    files_with_issues = Counter(posixpath.dirname(path) or '.' for code, path in enumerate(table.files.values)
+                                if any(by_file[code * categories:(code + 1) * categories]))
+    # reports x categories
+    trend = bincount(combine(columns['report'], columns['category'], categories),
+                     len(table.reports) * categories)
+
+    hot_files = []
+    for code, path in enumerate(table.files.values):
+        row = by_file[code * categories:(code + 1) * categories]
+        if sum(row):
+            hot_files.append({'file': path, 'total': sum(row),
+                              'by_category': {table.categories.values[c]: n for c, n in enumerate(row) if n}})
+    hot_files.sort(key=lambda entry: (-entry['total'], entry['file']))
+
+    on_disk = php_files_per_directory(root)
+    density = []
+    for code, directory in enumerate(table.directories.values):
+        if not by_directory[code]:
+            continue
+        # Fall back to the files that have issues when the tree is not checked out
+        files = on_disk.get(directory) or files_with_issues[directory] or 1
+        density.append({'directory': directory, 'issues': by_directory[code], 'php_files': files,
+                        'density': by_directory[code] / files})
+    density.sort(key=lambda entry: (-entry['density'], -entry['issues']))
+
+    trends = []
+    for report, name in enumerate(table.reports):
+        row = trend[report * categories:(report + 1) * categories]
+        trends.append({'report': name, 'summary': table.summaries[report],
+                       'counts': dict(zip(table.categories.values, row))})
+
+    insights = sorted(((count, code) for code, count in enumerate(by_insight) if count), reverse=True)
+    top_insights = [{'insight': table.insights.values[code], 'title': table.titles[code], 'count': count}
+                    for count, code in insights[:top]]
+
+    return {'issues': len(table), 'hot_files': hot_files[:top], 'density': density[:top],
+            'top_insights': top_insights, 'trends': trends}
+
+
+def issue_keys(path: Path) -> Counter:
+    """Multiset of insights, keyed without line numbers or counts so unrelated edits do not churn"""
+    keys: Counter = Counter()
+    for category, issue in report_issues(path):
+        keys[(category, issue.get('insightClass') or issue.get('title', ''),
+              normalize_file(issue.get('file', '')),
+              NUMBER.sub('#', issue.get('message') or issue.get('title', '')))] += 1
+    return keys
+
+
+def diff_reports(old: Path, new: Path) -> Tuple[Counter, Counter]:
+    """(new insights, fixed insights)"""
+    old_keys, new_keys = issue_keys(old), issue_keys(new)
+    return new_keys - old_keys, old_keys - new_keys
+
+
+def print_analysis(result: Dict, table: IssueTable) -> None:
+    print(f"{result['issues']} issues in {len(table.reports)} report(s) "
+          f"({'numpy' if np is not None else 'pure python'})\n")
+
+    print("=== Hot files ===")
+    for rank, entry in enumerate(result['hot_files'], 1):
+        breakdown = ', '.join(f"{category} {count}" for category, count in entry['by_category'].items())
+        print(f"{rank:>3}. {entry['total']:>4}  {entry['file']}  ({breakdown})")
+
+    print("\n=== Directory density (issues per PHP file) ===")
+    for entry in result['density']:
+        print(f"  {entry['density']:>6.2f}  {entry['issues']:>4} / {entry['php_files']:<4} {entry['directory']}")
+
+    print("\n=== Most frequent insights ===")
+    for entry in result['top_insights']:
+        print(f"  {entry['count']:>5}  {entry['title'][:90]}")
+
+    print("\n=== Category trends ===")
+    categories = table.categories.values
+    print("  " + "report".ljust(28) + ''.join(category[:12].rjust(13) for category in categories))
+    previous: Optional[Dict] = None
+    for entry in result['trends']:
+        cells = []
+        for category in categories:
+            count = entry['counts'][category]
+            delta = f"{count - previous['counts'][category]:+d}" if previous else ''
+            cells.append(f"{count}{'(' + delta + ')' if delta else ''}".rjust(13))
+        print("  " + Path(entry['report']).name[:27].ljust(28) + ''.join(cells))
+        previous = entry
+
+
+def print_diff(added: Counter, fixed: Counter, limit: int) -> None:
+    for label, keys in (('New', added), ('Fixed', fixed)):
+        per_category = Counter()
+        for (category, *_), count in keys.items():
+            per_category[category] += count
+        print(f"=== {label}: {sum(keys.values())} "
+              f"({', '.join(f'{c} {n}' for c, n in per_category.most_common()) or 'none'}) ===")
+        for (category, insight, path, message), count in sorted(keys.items())[:limit]:
+            suffix = f" ×{count}" if count > 1 else ''
+            first_line = message.strip().splitlines()[0] if message.strip() else ''
+            if first_line.startswith('@@'):
+                # Fixer suggestions carry a diff as message; name the fixer instead
+                first_line = f"{insight.rsplit(chr(92), 1)[-1]} (diff)"
+            print(f"  [{category}] {path}: {first_line}{suffix}")
+        print()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analytics over PHP Insights reports")
+    parser.add_argument('reports', nargs='*', type=Path, default=[DEFAULT_REPORT],
+                        help='reports, oldest first; the last one is analysed in detail')
+    parser.add_argument('--diff', nargs=2, type=Path, metavar=('OLD', 'NEW'),
+                        help='show insights that are new in NEW and fixed since OLD')
+    parser.add_argument('--top', type=int, default=TOP)
+    parser.add_argument('--json', type=Path, help='also write the analysis as JSON')
+    args = parser.parse_args(argv)
+
+    if args.diff:
+        added, fixed = diff_reports(args.diff[0], args.diff[1])
+        print_diff(added, fixed, args.top)
+        return 0
+
+    table = IssueTable()
+    for report in args.reports:
+        table.add_report(str(report), report)
+    result = analyse(table, top=args.top)
+    print_analysis(result, table)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding='utf-8')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
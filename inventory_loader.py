@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Shared loader for FRESH_COMPREHENSIVE_TESTS_AND_TOOLS_INVENTORY_2025.md.
+
+The inventory is parsed line by line (one entry is a `#### NNN. name` header
+followed by the command/description/criteria/output bullets), every problem is
+reported with its line number, and the parsed items are kept in a compiled
+JSON cache keyed by the file's mtime, size and SHA-256 so later starts skip
+parsing entirely.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INVENTORY_FILE = Path("FRESH_COMPREHENSIVE_TESTS_AND_TOOLS_INVENTORY_2025.md")
+CACHE_FILE = Path("reports/task4_execution/inventory_cache.json")
+CACHE_VERSION = 1
+
+HEADER_PATTERN = re.compile(r'^####\s+(\d+)\.\s+(.+?)\s*$')
+FIELD_PATTERN = re.compile(r'^-\s+\*\*(.+?)\*\*:\s*(.*?)\s*$')
+CODE_PATTERN = re.compile(r'^`(.+)`$')
+
+# Bullet label -> TestItem attribute, in the order they must appear
+FIELDS = [
+    ('الأمر', 'command'),
+    ('الوصف', 'description'),
+    ('المعايير', 'criteria'),
+    ('الإخراج', 'output_file'),
+]
+CODE_FIELDS = {'command', 'output_file'}
+# Persian/Urdu look-alike letters that occasionally slip into the labels
+LOOKALIKES = str.maketrans({'ی': 'ي', 'ک': 'ك'})
+
+
+class TestItem:
+    """Represents a single test/tool item"""
+    def __init__(self, number: int, name: str, command: str, description: str,
+                 criteria: str, output_file: str, line: int = 0):
+        self.number = number
+        self.name = name
+        self.command = command
+        self.description = description
+        self.criteria = criteria
+        self.output_file = output_file
+        self.line = line
+        self.status = "pending"
+        self.exit_code = None
+        self.execution_time = 0.0
+        self.error_message = ""
+        self.severity = {}
+
+    def definition(self) -> Dict:
+        """The inventory fields only, without run state"""
+        return {
+            'number': self.number,
+            'name': self.name,
+            'command': self.command,
+            'description': self.description,
+            'criteria': self.criteria,
+            'output_file': self.output_file,
+            'line': self.line,
+        }
+
+
+class InventoryError(Exception):
+    """Raised when the inventory contains malformed entries"""
+    def __init__(self, path: Path, problems: List[Tuple[int, str]]):
+        self.path = path
+        self.problems = problems
+        details = "\n".join(f"  {path}:{line}: {message}" for line, message in problems)
+        super().__init__(f"{len(problems)} malformed inventory entries:\n{details}")
+
+
+def parse_lines(lines: Iterable[str]) -> Tuple[List[TestItem], List[Tuple[int, str]]]:
+    """Parse inventory lines into items, collecting (line, message) problems"""
+    labels = {label: attribute for label, attribute in FIELDS}
+    items: List[TestItem] = []
+    problems: List[Tuple[int, str]] = []
+    seen: Dict[int, int] = {}
+    current: Optional[Dict] = None
+
+    def finish(entry: Optional[Dict]) -> None:
+        if entry is None:
+            return
+        missing = [label for label, attribute in FIELDS if attribute not in entry['fields']]
+        if missing:
+            problems.append((entry['line'], f"#{entry['number']:03d} is missing: {', '.join(missing)}"))
+            return
+        if entry['number'] in seen:
+            problems.append((entry['line'], f"#{entry['number']:03d} duplicates the entry on line "
+                                            f"{seen[entry['number']]}"))
+            return
+        seen[entry['number']] = entry['line']
+        items.append(TestItem(entry['number'], entry['name'], line=entry['line'], **entry['fields']))
+
+    for number, raw in enumerate(lines, 1):
+        line = raw.rstrip('\n')
+        header = HEADER_PATTERN.match(line)
+        if header:
+            finish(current)
+            current = {'number': int(header.group(1)), 'name': header.group(2),
+                       'line': number, 'fields': {}}
+            continue
+
+        field = FIELD_PATTERN.match(line)
+        if not field or current is None:
+            # Headings, separators and notes end the bullets of an entry
+            if line.strip() and current is not None:
+                finish(current)
+                current = None
+            continue
+
+        label = field.group(1).translate(LOOKALIKES)
+        attribute = labels.get(label)
+        if attribute is None:
+            problems.append((number, f"unknown field '{field.group(1)}'"))
+            continue
+        expected = FIELDS[len(current['fields'])][1] if len(current['fields']) < len(FIELDS) else None
+        if attribute in current['fields']:
+            problems.append((number, f"field '{label}' repeated"))
+            continue
+        if attribute != expected:
+            problems.append((number, f"field '{label}' out of order"))
+
+        value = field.group(2)
+        if attribute in CODE_FIELDS:
+            code = CODE_PATTERN.match(value)
+            if not code:
+                problems.append((number, f"field '{label}' must be wrapped in backticks"))
+                continue
+            value = code.group(1)
+        if not value:
+            problems.append((number, f"field '{label}' is empty"))
+            continue
+        current['fields'][attribute] = value
+
+    finish(current)
+    return items, sorted(problems)
+
+
+def file_signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_cache(cache_file: Path) -> Optional[Dict]:
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get('version') == CACHE_VERSION else None
+
+
+def write_cache(cache_file: Path, data: Dict) -> None:
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_file.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_file)
+
+
+def load_inventory(path: Path = INVENTORY_FILE, cache_file: Optional[Path] = CACHE_FILE) -> List[TestItem]:
+    """Load the inventory, using the compiled cache when the file is unchanged.
+
+    Raises InventoryError listing every malformed entry with its line number.
+    """
+    path = Path(path)
+    signature = file_signature(path)
+    cached = read_cache(Path(cache_file)) if cache_file else None
+    sha256 = None
+
+    if cached and cached['source'] == str(path):
+        unchanged = cached['signature'] == signature
+        if not unchanged:
+            # Touched but not edited (checkout, copy): same content, same items
+            sha256 = file_sha256(path)
+            unchanged = cached['sha256'] == sha256
+            if unchanged:
+                cached['signature'] = signature
+                write_cache(Path(cache_file), cached)
+        if unchanged:
+            return _from_cache(path, cached)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        items, problems = parse_lines(f)
+
+    if cache_file:
+        write_cache(Path(cache_file), {
+            'version': CACHE_VERSION,
+            'source': str(path),
+            'signature': signature,
+            'sha256': sha256 or file_sha256(path),
+            'items': [item.definition() for item in items],
+            'problems': problems,
+        })
+
+    if problems:
+        raise InventoryError(path, problems)
+    return items
+
+
+def _from_cache(path: Path, cached: Dict) -> List[TestItem]:
+    problems = [tuple(problem) for problem in cached['problems']]
+    if problems:
+        raise InventoryError(path, problems)
+    return [TestItem(**definition) for definition in cached['items']]
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for large JSON analysis reports.
+
+Reports (insights, PHPStan, ESLint, gitleaks, ...) can exceed 100 MB on the
+full monorepo, so instead of json.load() the document is scanned in chunks
+and only the values at the requested paths are materialised, one at a time.
+Paths use ijson-style prefixes: object keys joined with '.', 'item' for array
+elements and '*' for any key:
+
+    for issue in items('phpstan-report.json', 'files.*.messages.item'): ...
+    for path, issue in iter_items('insights_report.json', '*.item'): ...
+    for (_, file, _, _), message in iter_paths('phpstan-report.json', 'files.*.messages.item'): ...
+
+Reports written by PowerShell redirection are UTF-16 with a BOM; the encoding
+is detected from the BOM.
+"""
+
+import codecs
+import io
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, List, Sequence, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024
+# Consumed text is dropped from the buffer once it grows past this
+COMPACT_AT = 1024 * 1024
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Inside a skipped value only brackets and string starts matter
+STRUCTURE = re.compile(r'["\[\]{}]')
+STRING_END = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+DECODER = json.JSONDecoder()
+
+PathPattern = Union[str, Sequence[str]]
+
+
+class JSONStreamError(ValueError):
+    """Malformed or truncated JSON"""
+
+
+def detect_encoding(head: bytes) -> str:
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    return 'utf-8'
+
+
+def open_report(path: Union[str, Path]) -> io.TextIOBase:
+    """Open a report as text, honouring a UTF-8/16/32 byte-order mark"""
+    raw = open(path, 'rb')
+    encoding = detect_encoding(raw.peek(4)[:4])
+    return io.TextIOWrapper(raw, encoding=encoding)
+
+
+class _Scanner:
+    """Chunked text buffer with just enough JSON structure for navigation"""
+
+    def __init__(self, stream: io.TextIOBase):
+        self.stream = stream
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int = CHUNK_SIZE) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > COMPACT_AT:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of input)"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise JSONStreamError(f"expected {char!r}, found {found or 'end of input'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Grow geometrically so one huge value is not re-parsed per chunk
+                if self.fill(max(CHUNK_SIZE, len(self.buffer) - self.pos)):
+                    continue
+                raise JSONStreamError(str(e)) from None
+            # A number or literal ending at the buffer edge may continue
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def skip(self) -> None:
+        """Skip the next value without building it"""
+        first = self.peek()
+        if first not in '[{':
+            self.value()
+            return
+        self.pos += 1
+        depth = 1
+        while depth:
+            match = STRUCTURE.search(self.buffer, self.pos)
+            if not match:
+                self.pos = len(self.buffer)
+                if not self.fill():
+                    raise JSONStreamError("unterminated container")
+                continue
+            self.pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._skip_string_tail()
+            elif char in '[{':
+                depth += 1
+            else:
+                depth -= 1
+
+    def _skip_string_tail(self) -> None:
+        while True:
+            match = STRING_END.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                return
+            if not self.fill(max(CHUNK_SIZE, len(self.buffer) - self.pos)):
+                raise JSONStreamError("unterminated string")
+
+    def members(self) -> Iterator[str]:
+        """Keys of the object at the cursor; the caller consumes each value"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise JSONStreamError("object key must be a string")
+            self.expect(':')
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise JSONStreamError(f"expected ',' or '}}', found {separator!r}")
+
+    def elements(self) -> Iterator[None]:
+        """One step per element of the array at the cursor"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield None
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise JSONStreamError(f"expected ',' or ']', found {separator!r}")
+
+
+def _split(pattern: str) -> List[str]:
+    return pattern.split('.') if pattern else []
+
+
+def _matches(path: List[str], pattern: List[str]) -> bool:
+    return len(path) == len(pattern) and all(p == '*' or p == k for k, p in zip(path, pattern))
+
+
+def _leads_to(path: List[str], pattern: List[str]) -> bool:
+    return len(path) < len(pattern) and all(p == '*' or p == k for k, p in zip(path, pattern))
+
+
+def _walk(scanner: _Scanner, path: List[str], patterns: List[List[str]]) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    if any(_matches(path, pattern) for pattern in patterns):
+        yield tuple(path), scanner.value()
+        return
+    if not any(_leads_to(path, pattern) for pattern in patterns):
+        scanner.skip()
+        return
+    first = scanner.peek()
+    if first == '{':
+        for key in scanner.members():
+            yield from _walk(scanner, path + [key], patterns)
+    elif first == '[':
+        for _ in scanner.elements():
+            yield from _walk(scanner, path + ['item'], patterns)
+    else:
+        scanner.skip()
+
+
+def iter_paths(source: Union[str, Path, io.TextIOBase],
+               patterns: PathPattern) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """Yield (path components, value) for every value whose path matches one of `patterns`.
+
+    `source` is a path (opened with open_report) or a text stream.  Values are
+    yielded in document order; everything else is skipped without being built.
+    The components keep keys that contain '.' (e.g. file names) intact.
+    """
+    compiled = [_split(pattern) for pattern in ([patterns] if isinstance(patterns, str) else patterns)]
+    if isinstance(source, (str, Path)):
+        with open_report(source) as stream:
+            yield from _walk(_Scanner(stream), [], compiled)
+    else:
+        yield from _walk(_Scanner(source), [], compiled)
+
+
+def iter_items(source: Union[str, Path, io.TextIOBase],
+               patterns: PathPattern) -> Iterator[Tuple[str, Any]]:
+    """Like iter_paths, with the path joined by '.'"""
+    for path, value in iter_paths(source, patterns):
+        yield '.'.join(path), value
+
+
+def items(source: Union[str, Path, io.TextIOBase], pattern: str) -> Iterator[Any]:
+    """Values at `pattern` (see iter_items)"""
+    for _, value in iter_items(source, pattern):
+        yield value
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Streaming JUnit XML ingester and queryable SQLite store for test results.
+
+Reports such as test-report.xml are read with iterparse: every <testcase> is
+written out and its element discarded as soon as it closes, so memory stays
+constant however large the report is.  Each ingested report becomes a run.
+
+    python3 junit_store.py ingest test-report.xml --label "release 2.4"
+    python3 junit_store.py runs
+    python3 junit_store.py slowest --limit 20
+    python3 junit_store.py regressions            # latest run vs the one before
+    python3 junit_store.py flaky --runs 10
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+STORE_FILE = Path("reports/test_results.sqlite")
+BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    sha256 TEXT NOT NULL UNIQUE,
+    label TEXT,
+    ingested_at TEXT NOT NULL,
+    tests INTEGER DEFAULT 0,
+    failures INTEGER DEFAULT 0,
+    errors INTEGER DEFAULT 0,
+    skipped INTEGER DEFAULT 0,
+    time REAL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS suites (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    parent_id INTEGER REFERENCES suites(id),
+    name TEXT NOT NULL,
+    file TEXT,
+    tests INTEGER,
+    assertions INTEGER,
+    failures INTEGER,
+    errors INTEGER,
+    skipped INTEGER,
+    time REAL
+);
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    suite_id INTEGER REFERENCES suites(id),
+    class TEXT NOT NULL,
+    name TEXT NOT NULL,
+    file TEXT,
+    line INTEGER,
+    assertions INTEGER,
+    time REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS failures (
+    case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+    run_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    type TEXT,
+    message TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_suites_run ON suites(run_id);
+CREATE INDEX IF NOT EXISTS idx_cases_run ON cases(run_id);
+CREATE INDEX IF NOT EXISTS idx_cases_class ON cases(class, name);
+CREATE INDEX IF NOT EXISTS idx_cases_file ON cases(file);
+CREATE INDEX IF NOT EXISTS idx_cases_time ON cases(run_id, time);
+CREATE INDEX IF NOT EXISTS idx_failures_run ON failures(run_id);
+CREATE VIEW IF NOT EXISTS durations AS
+    SELECT cases.run_id, cases.class, cases.name, cases.file, cases.time
+    FROM cases;
+"""
+
+# Child elements of <testcase> that decide its status, most severe first
+OUTCOMES = ('error', 'failure', 'skipped')
+# Failure bodies can be whole stack traces; the store keeps the start
+MAX_DETAILS = 4000
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def connect(path: Path = STORE_FILE) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _int(element: ET.Element, name: str) -> Optional[int]:
+    value = element.get(name)
+    return int(value) if value not in (None, '') else None
+
+
+def _float(element: ET.Element, name: str) -> float:
+    value = element.get(name)
+    return float(value) if value not in (None, '') else 0.0
+
+
+def case_class(element: ET.Element) -> str:
+    """PHPUnit writes class=; other producers only classname= (dotted)"""
+    return element.get('class') or element.get('classname') or ''
+
+
+class JUnitIngester:
+    """Streams one JUnit report into the store as a new run"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.case_rows: List[Tuple] = []
+        self.failure_rows: List[Tuple] = []
+        self.last_case_id = 0
+
+    def ingest(self, report: Path, label: Optional[str] = None) -> Optional[int]:
+        """Ingest `report`; returns the run id, or None if it was ingested before"""
+        report = Path(report)
+        sha256 = file_sha256(report)
+        if self.connection.execute("SELECT 1 FROM runs WHERE sha256 = ?", (sha256,)).fetchone():
+            return None
+
+        with self.connection:
+            run_id = self.connection.execute(
+                "INSERT INTO runs (source, sha256, label, ingested_at) VALUES (?, ?, ?, ?)",
+                (str(report), sha256, label, datetime.now().isoformat())
+            ).lastrowid
+            # Case ids are assigned here so failures can reference unflushed cases
+            self.last_case_id = self.connection.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM cases").fetchone()[0]
+            self._stream(report, run_id)
+            self.connection.execute("""
+                UPDATE runs SET
+                    tests = (SELECT COUNT(*) FROM cases WHERE run_id = :run),
+                    failures = (SELECT COUNT(*) FROM cases WHERE run_id = :run AND status = 'failure'),
+                    errors = (SELECT COUNT(*) FROM cases WHERE run_id = :run AND status = 'error'),
+                    skipped = (SELECT COUNT(*) FROM cases WHERE run_id = :run AND status = 'skipped'),
+                    time = (SELECT COALESCE(SUM(time), 0) FROM cases WHERE run_id = :run)
+                WHERE id = :run
+            """, {'run': run_id})
+        return run_id
+
+    def _stream(self, report: Path, run_id: int) -> None:
+        # Open elements; finished ones are detached from their parent so the
+        # tree never grows beyond the current path
+        path: List[ET.Element] = []
+        suite_ids: List[int] = []
+
+        for event, element in ET.iterparse(report, events=('start', 'end')):
+            if event == 'start':
+                path.append(element)
+                if element.tag == 'testsuite':
+                    # Counters are only known at the end, the id is needed now
+                    suite_ids.append(self.connection.execute(
+                        "INSERT INTO suites (run_id, parent_id, name, file) VALUES (?, ?, ?, ?)",
+                        (run_id, suite_ids[-1] if suite_ids else None,
+                         element.get('name', ''), element.get('file'))
+                    ).lastrowid)
+                continue
+
+            path.pop()
+            if element.tag == 'testcase':
+                self._case(element, run_id, suite_ids[-1] if suite_ids else None)
+            elif element.tag == 'testsuite':
+                self.connection.execute(
+                    "UPDATE suites SET tests = ?, assertions = ?, failures = ?, errors = ?, "
+                    "skipped = ?, time = ? WHERE id = ?",
+                    (_int(element, 'tests'), _int(element, 'assertions'), _int(element, 'failures'),
+                     _int(element, 'errors'), _int(element, 'skipped'), _float(element, 'time'),
+                     suite_ids.pop())
+                )
+            if element.tag in ('testcase', 'testsuite'):
+                element.clear()
+                if path:
+                    path[-1].remove(element)
+        self._flush()
+
+    def _case(self, element: ET.Element, run_id: int, suite_id: Optional[int]) -> None:
+        outcomes = {child.tag: child for child in element if child.tag in OUTCOMES}
+        status = next((kind for kind in OUTCOMES if kind in outcomes), 'passed')
+        self.last_case_id += 1
+        case_id = self.last_case_id
+        self.case_rows.append((
+            case_id, run_id, suite_id, case_class(element), element.get('name', ''),
+            element.get('file'), _int(element, 'line'), _int(element, 'assertions'),
+            _float(element, 'time'), status
+        ))
+        for kind, child in outcomes.items():
+            self.failure_rows.append((
+                case_id, run_id, kind, child.get('type'), child.get('message'),
+                (child.text or '')[:MAX_DETAILS] or None
+            ))
+        if len(self.case_rows) >= BATCH_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        self.connection.executemany(
+            "INSERT INTO cases (id, run_id, suite_id, class, name, file, line, assertions, time, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self.case_rows)
+        self.connection.executemany(
+            "INSERT INTO failures (case_id, run_id, kind, type, message, details) "
+            "VALUES (?, ?, ?, ?, ?, ?)", self.failure_rows)
+        self.case_rows.clear()
+        self.failure_rows.clear()
+
+
+def latest_runs(connection: sqlite3.Connection, count: int) -> List[int]:
+    rows = connection.execute("SELECT id FROM runs ORDER BY id DESC LIMIT ?", (count,))
+    return [row['id'] for row in rows]
+
+
+def slowest(connection: sqlite3.Connection, run_id: int, limit: int = 20) -> List[sqlite3.Row]:
+    return connection.execute(
+        "SELECT class, name, file, time, status FROM cases WHERE run_id = ? "
+        "ORDER BY time DESC LIMIT ?", (run_id, limit)
+    ).fetchall()
+
+
+def regressions(connection: sqlite3.Connection, base: int, head: int) -> List[sqlite3.Row]:
+    """Cases that passed in `base` and fail or error in `head`"""
+    return connection.execute("""
+        SELECT head.class, head.name, head.status, failures.message
+        FROM cases AS head
+        JOIN cases AS base ON base.class = head.class AND base.name = head.name AND base.run_id = ?
+        LEFT JOIN failures ON failures.case_id = head.id AND failures.kind = head.status
+        WHERE head.run_id = ? AND base.status = 'passed' AND head.status IN ('failure', 'error')
+        ORDER BY head.class, head.name
+    """, (base, head)).fetchall()
+
+
+def flaky(connection: sqlite3.Connection, runs: List[int]) -> List[sqlite3.Row]:
+    """Cases that both passed and failed within `runs`"""
+    marks = ','.join('?' * len(runs))
+    return connection.execute(f"""
+        SELECT class, name,
+               SUM(status = 'passed') AS passed,
+               SUM(status IN ('failure', 'error')) AS failed,
+               COUNT(*) AS seen
+        FROM cases
+        WHERE run_id IN ({marks})
+        GROUP BY class, name
+        HAVING passed > 0 AND failed > 0
+        ORDER BY failed DESC, class, name
+    """, runs).fetchall()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="JUnit result store")
+    parser.add_argument('--store', type=Path, default=STORE_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    ingest = sub.add_parser('ingest', help='add JUnit reports as new runs')
+    ingest.add_argument('reports', nargs='+', type=Path)
+    ingest.add_argument('--label')
+
+    sub.add_parser('runs', help='list ingested runs')
+
+    slow = sub.add_parser('slowest', help='slowest test cases of a run')
+    slow.add_argument('--run', type=int, help='run id (default: latest)')
+    slow.add_argument('--limit', type=int, default=20)
+
+    regress = sub.add_parser('regressions', help='cases that passed in BASE and fail in HEAD')
+    regress.add_argument('--base', type=int, help='default: run before HEAD')
+    regress.add_argument('--head', type=int, help='default: latest run')
+
+    flaky_parser = sub.add_parser('flaky', help='cases with mixed outcomes over recent runs')
+    flaky_parser.add_argument('--runs', type=int, default=10)
+
+    args = parser.parse_args()
+    connection = connect(args.store)
+
+    if args.command == 'ingest':
+        ingester = JUnitIngester(connection)
+        for report in args.reports:
+            run_id = ingester.ingest(report, args.label)
+            if run_id is None:
+                print(f"⊘ {report}: already ingested")
+                continue
+            run = connection.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            print(f"✓ {report} → run {run_id}: {run['tests']} tests, {run['failures']} failures, "
+                  f"{run['errors']} errors, {run['skipped']} skipped, {run['time']:.1f}s")
+        return 0
+
+    if args.command == 'runs':
+        for run in connection.execute("SELECT * FROM runs ORDER BY id"):
+            print(f"{run['id']:>4}  {run['ingested_at'][:19]}  {run['tests']:>6} tests  "
+                  f"{run['failures'] + run['errors']:>4} failed  {run['time']:>8.1f}s  "
+                  f"{run['label'] or run['source']}")
+        return 0
+
+    recent = latest_runs(connection, max(getattr(args, 'runs', 2), 2))
+    if not recent:
+        print("No runs ingested yet")
+        return 1
+
+    if args.command == 'slowest':
+        for row in slowest(connection, args.run or recent[0], args.limit):
+            print(f"{row['time']:>9.3f}s  {row['status']:<8} {row['class']}::{row['name']}")
+        return 0
+
+    if args.command == 'regressions':
+        head = args.head or recent[0]
+        base = args.base or connection.execute(
+            "SELECT MAX(id) FROM runs WHERE id < ?", (head,)).fetchone()[0]
+        if base is None:
+            print("Need at least two runs to compare")
+            return 1
+        rows = regressions(connection, base, head)
+        print(f"Run {base} → {head}: {len(rows)} regressed cases")
+        for row in rows:
+            print(f"  ✗ {row['class']}::{row['name']} ({row['status']}) {row['message'] or ''}".rstrip())
+        return 1 if rows else 0
+
+    rows = flaky(connection, recent)
+    print(f"{len(rows)} flaky cases over the last {len(recent)} runs")
+    for row in rows:
+        print(f"  {row['failed']}/{row['seen']} failed  {row['class']}::{row['name']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,8 @@ import threading
 from pathlib import Path
 from urllib.parse import urljoin
 
+from deployment_event_log import EventLog
+
 class MasterDeploymentController:
     def __init__(self):
         self.base_url = "https://coprra.com"
@@ -33,6 +35,7 @@ class MasterDeploymentController:
             "success": False,
             "start_time": time.time()
         }
+        self.event_log = EventLog(self.project_root / "master_deployment_log.json")
         
     def log_action(self, action, status="INFO", details=""):
         """Log all actions with timestamp"""
@@ -50,9 +53,7 @@ class MasterDeploymentController:
         self.save_to_master_log(timestamp, action, status, details)
 
     def save_to_master_log(self, timestamp, action, status, details):
-        """Save to master deployment log"""
-        log_file = self.project_root / "master_deployment_log.json"
-        
+        """Append to the master deployment event log"""
         entry = {
             "timestamp": timestamp,
             "action": action,
@@ -63,16 +64,7 @@ class MasterDeploymentController:
         }
         
         try:
-            if log_file.exists():
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            else:
-                logs = []
-            
-            logs.append(entry)
-            
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
+            self.event_log.append(entry)
         except Exception as e:
             print(f"⚠️ Could not save to master log: {e}")
 
@@ -538,6 +530,11 @@ Generated by COPRRA Master Deployment Controller
             self.log_action("Unexpected error", "ERROR", str(e))
             print(f"\n❌ Unexpected error: {e}")
             return False
+        finally:
+            try:
+                self.event_log.compact()
+            except Exception as e:
+                print(f"⚠️ Could not compact master log: {e}")
 
 def main():
     """Main execution function"""
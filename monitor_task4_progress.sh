@@ -7,6 +7,13 @@
 LOG_FILE="task4_execution.log"
 OUTPUT_FILE="TASK_4_NEGATIVE_OUTPUTS_ONLY.md"
 
+# Runners started with --dashboard publish their progress; follow that stream
+# instead of re-scanning files when it is available
+DASHBOARD_PORT="${DASHBOARD_PORT:-8765}"
+if curl -sf "http://127.0.0.1:${DASHBOARD_PORT}/status" > /dev/null 2>&1; then
+    exec python3 "$(dirname "$0")/progress_events.py" watch --port "$DASHBOARD_PORT"
+fi
+
 echo "================================================================================"
 echo "📊 مراقبة تقدم Task 4"
 echo "================================================================================"
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Single-pass classifier for test/tool output.
+
+Output is fed chunk by chunk (see stream_capture.run_streaming) and split into
+lines once.  Each line goes through the active tool's rule set (PHPUnit
+summary, PHPStan/Psalm/ESLint text and JSON reports) and through one
+combined regex of generic severity rules, producing structured severity
+counts instead of a single "contains the word error" boolean.
+"""
+
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+SEVERITIES = ('error', 'warning', 'info')
+# JSON reports often arrive as one huge line; longer lines are scanned in
+# segments that overlap by more than the longest rule match
+MAX_LINE = 256 * 1024
+OVERLAP = 512
+
+# One alternation, scanned once per line.  Earlier alternatives win at the same
+# position, so "no errors"/"errors: 0" are consumed before the bare "error".
+GENERIC_PATTERN = re.compile(
+    r'(?P<clean>\b(?:no|0|zero)\s+(?:errors?|failures?|warnings?|issues|problems|violations?)\b'
+    r'|\b(?:errors?|failures?|warnings?):\s*0\b)'
+    r'|(?P<error>\b(?:fatal error|parse error|uncaught|exception|errors?|failed|failures?)\b'
+    r'|\b[1-9]\d*\s+(?:issues|problems|bugs|violations?)\b)'
+    r'|(?P<warning>\b(?:warnings?|deprecated|deprecations?)\b)'
+    r'|(?P<info>\b(?:notices?|risky|skipped|incomplete)\b)',
+    re.IGNORECASE
+)
+
+
+class Classification:
+    """Structured verdict for one command's output"""
+
+    def __init__(self, tool: str = 'generic'):
+        self.tool = tool
+        self.counts: Dict[str, int] = {severity: 0 for severity in SEVERITIES}
+        # Set when a tool rule parsed an authoritative summary/report
+        self.summary: Optional[str] = None
+        self.exit_code: Optional[int] = None
+
+    @property
+    def has_problems(self) -> bool:
+        if self.exit_code not in (None, 0):
+            return True
+        return self.counts['error'] > 0 or self.counts['warning'] > 0
+
+    def describe(self) -> str:
+        counts = ', '.join(f"{severity}={self.counts[severity]}" for severity in SEVERITIES)
+        return f"{self.tool}: {counts}" + (f" ({self.summary})" if self.summary else '')
+
+    def to_dict(self) -> Dict:
+        return {'tool': self.tool, 'counts': dict(self.counts), 'summary': self.summary}
+
+
+LineHandler = Callable[[re.Match, Classification], None]
+
+
+def _set(**counts: str) -> LineHandler:
+    """Handler that sets severities from named groups of the match"""
+    def handler(match: re.Match, result: Classification) -> None:
+        for severity, group in counts.items():
+            value = match.group(group)
+            result.counts[severity] = int(value) if value else 0
+        result.summary = match.group(0).strip()
+    return handler
+
+
+def _add(**counts: str) -> LineHandler:
+    """Handler that accumulates severities from named groups (JSON reports)"""
+    def handler(match: re.Match, result: Classification) -> None:
+        for severity, group in counts.items():
+            result.counts[severity] += int(match.group(group))
+        result.summary = f"{sum(result.counts.values())} findings in report"
+    return handler
+
+
+def _count(severity: str) -> LineHandler:
+    """Handler that counts one finding per match (JSON issue lists)"""
+    def handler(match: re.Match, result: Classification) -> None:
+        result.counts[severity] += 1
+        result.summary = f"{sum(result.counts.values())} findings in report"
+    return handler
+
+
+def _phpunit_summary(match: re.Match, result: Classification) -> None:
+    fields = dict((key.lower(), int(value)) for key, value in
+                  re.findall(r'(\w+):\s*(\d+)', match.group(0)))
+    result.counts['error'] = fields.get('errors', 0) + fields.get('failures', 0)
+    result.counts['warning'] = fields.get('warnings', 0) + fields.get('deprecations', 0)
+    result.counts['info'] = (fields.get('notices', 0) + fields.get('skipped', 0)
+                             + fields.get('incomplete', 0) + fields.get('risky', 0))
+    result.summary = match.group(0).strip()
+
+
+def _phpstan_totals(match: re.Match, result: Classification) -> None:
+    result.counts['error'] = int(match.group('errors')) + int(match.group('file_errors'))
+    result.summary = match.group(0)
+
+
+def _clean(match: re.Match, result: Classification) -> None:
+    for severity in SEVERITIES:
+        result.counts[severity] = 0
+    result.summary = match.group(0).strip()
+
+
+# tool name, command substrings, [(line pattern, handler)]
+TOOL_RULES: List[Tuple[str, List[str], List[Tuple[Pattern, LineHandler]]]] = [
+    ('phpunit', ['phpunit', 'artisan test', 'paratest'], [
+        (re.compile(r'^OK \(\d+ tests?, \d+ assertions?\)'), _clean),
+        (re.compile(r'^(?:OK, but .*|FAILURES!|ERRORS!)?\s*Tests: \d+, Assertions: \d+.*'), _phpunit_summary),
+    ]),
+    ('phpstan', ['phpstan', 'larastan'], [
+        (re.compile(r'"totals":\{"errors":(?P<errors>\d+),"file_errors":(?P<file_errors>\d+)\}'),
+         _phpstan_totals),
+        (re.compile(r'\[OK\] No errors'), _clean),
+        (re.compile(r'\[ERROR\] Found (?P<errors>\d+) errors?'), _set(error='errors')),
+    ]),
+    ('psalm', ['psalm'], [
+        (re.compile(r'"severity":\s*"error"'), _count('error')),
+        (re.compile(r'"severity":\s*"info"'), _count('info')),
+        (re.compile(r'No errors found!'), _clean),
+        # Psalm centres its summary line
+        (re.compile(r'^\s*(?P<errors>\d+) errors? found'), _set(error='errors')),
+    ]),
+    ('eslint', ['eslint'], [
+        (re.compile(r'"errorCount":\s*(?P<errors>\d+),\s*"fatalErrorCount":\s*\d+,\s*'
+                    r'"warningCount":\s*(?P<warnings>\d+)'),
+         _add(error='errors', warning='warnings')),
+        (re.compile(r'✖ \d+ problems? \((?P<errors>\d+) errors?, (?P<warnings>\d+) warnings?\)'),
+         _set(error='errors', warning='warnings')),
+    ]),
+]
+
+
+def tool_for(command: str) -> Tuple[str, List[Tuple[Pattern, LineHandler]]]:
+    lowered = command.lower()
+    for name, needles, rules in TOOL_RULES:
+        if any(needle in lowered for needle in needles):
+            return name, rules
+    return 'generic', []
+
+
+class OutputClassifier:
+    """Feeds a command's output through its tool rules and the generic automaton.
+
+    `feed(stream, text)` matches the run_streaming() `on_chunk` signature and
+    is safe to call from one thread per stream.
+    """
+
+    def __init__(self, command: str):
+        tool, self.rules = tool_for(command)
+        self.tool_result = Classification(tool)
+        self.generic = Classification('generic')
+        # Unterminated line per stream, kept as pieces to avoid quadratic joins
+        self.partial: Dict[str, List[str]] = {}
+        self.partial_size: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def feed(self, stream: str, text: str) -> None:
+        pieces = self.partial.setdefault(stream, [])
+        if '\n' not in text:
+            pieces.append(text)
+            self.partial_size[stream] = self.partial_size.get(stream, 0) + len(text)
+            if self.partial_size[stream] > MAX_LINE:
+                self._flush_segment(stream)
+            return
+
+        lines = text.split('\n')
+        lines[0] = ''.join(pieces) + lines[0]
+        rest = lines.pop()
+        self.partial[stream] = [rest]
+        self.partial_size[stream] = len(rest)
+        with self.lock:
+            for line in lines:
+                self._line(line)
+
+    def finish(self, exit_code: Optional[int]) -> Classification:
+        """Flush partial lines and return the verdict"""
+        with self.lock:
+            for stream, pieces in self.partial.items():
+                line = ''.join(pieces)
+                if line:
+                    self._line(line)
+            self.partial.clear()
+            self.partial_size.clear()
+        # A parsed tool summary is authoritative; otherwise fall back to generic counts
+        result = self.tool_result if self.tool_result.summary else self.generic
+        result.exit_code = exit_code
+        return result
+
+    def _flush_segment(self, stream: str) -> None:
+        """Scan an over-long unterminated line, keeping the overlap for later"""
+        segment = ''.join(self.partial[stream])
+        # Matches starting in the overlap are left for the next segment
+        cut = len(segment) - OVERLAP
+        with self.lock:
+            self._line(segment, limit=cut)
+        self.partial[stream] = [segment[cut:]]
+        self.partial_size[stream] = OVERLAP
+
+    def _line(self, line: str, limit: Optional[int] = None) -> None:
+        matched_tool_rule = False
+        for pattern, handler in self.rules:
+            for match in pattern.finditer(line):
+                if limit is None or match.start() < limit:
+                    handler(match, self.tool_result)
+                    matched_tool_rule = True
+        if matched_tool_rule:
+            return
+        seen = set()
+        cleared = set()
+        for match in GENERIC_PATTERN.finditer(line):
+            if limit is not None and match.start() >= limit:
+                break
+            severity = match.lastgroup
+            if severity == 'clean':
+                # "Error handling tests passed: 0 errors" reports zero errors, not one
+                cleared.add('warning' if 'warn' in match.group(0).lower() else 'error')
+            else:
+                # Count each severity at most once per line
+                seen.add(severity)
+        for severity in seen - cleared:
+            self.generic.counts[severity] += 1
+
+
+def classify(command: str, output: str, exit_code: Optional[int] = None) -> Classification:
+    """Classify an output that is already in memory"""
+    classifier = OutputClassifier(command)
+    classifier.feed('stdout', output)
+    return classifier.finish(exit_code)
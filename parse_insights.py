@@ -1,23 +1,20 @@
-import json
-
-with open('insights_report.json') as f:
-    data = json.load(f)
+from json_stream import iter_items
 
 count = 0
-for category, issues in data.items():
-    if category == 'summary' or not issues:
-        continue
+current = None
+# Issues are streamed, so only the ten printed ones are ever decoded
+for path, issue in iter_items('insights_report.json', '*.item'):
+    category = path.split('.')[0]
+    if category != current:
+        print(f'\n--- {category} ---\n')
+        current = category
 
-    print(f'\n--- {category} ---\n')
-    for issue in issues:
-        if count >= 10:
-            break
-        if 'file' in issue:
-            print(f"  File: {issue['file']}:{issue.get('line')}")
-        if 'insight' in issue:
-            print(f"  Insight: {issue['insight']}")
-        print('--------------------')
-        count += 1
+    if 'file' in issue:
+        print(f"  File: {issue['file']}:{issue.get('line')}")
+    if 'insight' in issue:
+        print(f"  Insight: {issue['insight']}")
+    print('--------------------')
+    count += 1
 
     if count >= 10:
         break
@@ -7,6 +7,13 @@ PROGRESS_FILE="/var/www/html/reports/task4_execution/progress.txt"
 LOG_FILE="/var/www/html/percentage_monitor.log"
 LAST_PERCENTAGE_FILE="/var/www/html/last_percentage.txt"
 
+# Runners started with --dashboard publish their progress; follow that stream
+# instead of re-scanning files when it is available
+DASHBOARD_PORT="${DASHBOARD_PORT:-8765}"
+if curl -sf "http://127.0.0.1:${DASHBOARD_PORT}/status" > /dev/null 2>&1; then
+    exec python3 "$(dirname "$0")/progress_events.py" watch --port "$DASHBOARD_PORT"
+fi
+
 # إنشاء ملف النسبة المئوية الأخيرة إذا لم يكن موجوداً
 if [ ! -f "$LAST_PERCENTAGE_FILE" ]; then
     echo "0" > "$LAST_PERCENTAGE_FILE"
@@ -0,0 +1,115 @@
+#!/usr/bin/env php
+<?php
+
+declare(strict_types=1);
+
+use PHPUnit\TextUI\Application;
+
+// Long-lived PHPUnit worker driven by phpunit_pool.py
+//
+// Reads one JSON job per line from STDIN:
+//   {"id": 12, "file": "tests/Unit/FooTest.php", "junit": "reports/.../12.xml"}
+// and answers on the pipe whose descriptor is in PHPUNIT_WORKER_REPLY_FD
+// (STDOUT/STDERR belong to the tests):
+//   {"id": 12, "exit": 0, "time": 0.41}
+//
+// The autoloader and PHPUnit are loaded once; every job then runs in a
+// forked child, so it starts warm but cannot leak state into the next job.
+
+require __DIR__.'/vendor/autoload.php';
+
+if (! class_exists('PHPUnit\TextUI\Application') && file_exists(__DIR__.'/phpunit.phar')) {
+    require __DIR__.'/phpunit.phar';
+}
+
+if (! class_exists('PHPUnit\TextUI\Application')) {
+    fwrite(STDERR, "PHPUnit >= 10 not found. Ensure dev dependencies are installed.\n");
+
+    exit(1);
+}
+
+$replyFd = (int) (getenv('PHPUNIT_WORKER_REPLY_FD') ?: 3);
+$replies = @fopen('php://fd/'.$replyFd, 'w');
+if ($replies === false) {
+    fwrite(STDERR, "Reply channel (fd {$replyFd}) is not open.\n");
+
+    exit(1);
+}
+
+$canFork = function_exists('pcntl_fork') && function_exists('pcntl_waitpid');
+
+// Warm up: load the framework classes once in the parent. The application
+// instance itself is discarded; every test case still creates its own.
+if ($canFork && getenv('PHPUNIT_WORKER_WARM_LARAVEL') !== '0' && file_exists(__DIR__.'/bootstrap/app.php')) {
+    try {
+        $app = require __DIR__.'/bootstrap/app.php';
+        $app->make(Illuminate\Contracts\Console\Kernel::class)->bootstrap();
+        Illuminate\Support\Facades\Facade::clearResolvedInstances();
+        $app->flush();
+        unset($app);
+    } catch (Throwable $e) {
+        fwrite(STDERR, 'Warm-up skipped: '.$e->getMessage()."\n");
+    }
+}
+
+function reply($channel, array $message): void
+{
+    fwrite($channel, json_encode($message)."\n");
+    fflush($channel);
+}
+
+function phpunitArguments(array $job): array
+{
+    return [
+        'phpunit',
+        '--no-output',
+        // Concurrent jobs must not race on .phpunit.cache
+        '--do-not-cache-result',
+        '--log-junit', $job['junit'],
+        $job['file'],
+    ];
+}
+
+function runForked(array $job): int
+{
+    $pid = pcntl_fork();
+    if ($pid === -1) {
+        return runSpawned($job);
+    }
+
+    if ($pid === 0) {
+        ini_set('display_errors', 'stderr');
+        $_SERVER['argv'] = phpunitArguments($job);
+        exit((new Application())->run($_SERVER['argv']));
+    }
+
+    pcntl_waitpid($pid, $status);
+
+    return pcntl_wifexited($status) ? pcntl_wexitstatus($status) : 255;
+}
+
+// Fallback without pcntl (e.g. Windows): a fresh PHP process per job
+function runSpawned(array $job): int
+{
+    $command = array_merge([PHP_BINARY, __DIR__.'/run-phpunit.php'], array_slice(phpunitArguments($job), 1));
+    $process = proc_open($command, [STDIN, STDOUT, STDERR], $pipes);
+
+    return is_resource($process) ? proc_close($process) : 255;
+}
+
+reply($replies, ['ready' => true, 'fork' => $canFork, 'pid' => getmypid()]);
+
+while (($line = fgets(STDIN)) !== false) {
+    $job = json_decode($line, true);
+    if (! is_array($job) || ! isset($job['id'], $job['file'], $job['junit'])) {
+        fwrite(STDERR, 'Ignoring malformed job: '.$line);
+
+        continue;
+    }
+
+    $start = microtime(true);
+    $exitCode = $canFork ? runForked($job) : runSpawned($job);
+    reply($replies, ['id' => $job['id'], 'exit' => $exitCode, 'time' => microtime(true) - $start]);
+}
+
+exit(0);
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Run PHPUnit suites through a pool of warm, long-lived PHP workers.
+
+Instead of one `vendor/bin/phpunit --testsuite X` per suite, every suite is
+split into one shard per test file (taken from test-list.xml, plus any test
+file on disk it does not list yet).  Shards are dispatched longest-first, using
+the per-file times recorded in test-report.xml, to N phpunit-worker.php
+processes.  Each worker loads the autoloader, PHPUnit and the framework once
+and forks a child per shard, so a shard only pays for its own tests.  The
+per-shard JUnit files are merged into one report.
+
+Without pcntl or on Windows every shard runs as a fresh `php run-phpunit.php`
+process instead (spawn mode); results are identical, only slower.  A worker
+that fails to start falls back to spawn mode for the rest of its queue.
+
+    python3 phpunit_pool.py --testsuite Unit --workers 8 --log-junit reports/phpunit_pool/unit.xml
+"""
+
+import argparse
+import json
+import os
+import queue
+import select
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from junit_store import JUnitIngester, connect
+from stream_capture import isolated_popen_kwargs, run_streaming, terminate_tree
+
+PHPUNIT_CONFIG = Path("phpunit.xml")
+TEST_LIST = Path("test-list.xml")
+TEST_REPORT = Path("test-report.xml")
+WORKER_SCRIPT = Path("phpunit-worker.php")
+SPAWN_SCRIPT = Path("run-phpunit.php")
+POOL_DIR = Path("reports/phpunit_pool")
+SHARD_TIMEOUT = 300
+# Startup covers the autoloader and framework warm-up
+READY_TIMEOUT = 60
+
+
+def local_name(tag: str) -> str:
+    """Element name without its XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def relative_test_path(path: str) -> str:
+    """tests/... path for a file recorded on another machine (e.g. C:\\...\\tests\\Unit\\X.php)"""
+    parts = path.replace('\\', '/').split('/')
+    if 'tests' in parts:
+        parts = parts[len(parts) - 1 - parts[::-1].index('tests'):]
+    return '/'.join(parts)
+
+
+def suite_directories(config: Path = PHPUNIT_CONFIG) -> Dict[str, Dict]:
+    """{suite: {'directories': [(dir, suffix)], 'exclude': {files}}} from phpunit.xml"""
+    suites: Dict[str, Dict] = {}
+    for suite in ET.parse(config).getroot().iter('testsuite'):
+        entry = suites.setdefault(suite.get('name'), {'directories': [], 'exclude': set()})
+        for directory in suite.findall('directory'):
+            entry['directories'].append((relative_test_path(directory.text.strip().lstrip('./')),
+                                         directory.get('suffix', 'Test.php')))
+        for exclude in suite.findall('exclude'):
+            entry['exclude'].update(relative_test_path(line.strip().lstrip('./'))
+                                    for line in (exclude.text or '').split() if line.strip())
+    return suites
+
+
+def listed_test_files(test_list: Path = TEST_LIST) -> List[str]:
+    """Test files named in test-list.xml, streamed so the listing can be large"""
+    if not test_list.exists():
+        return []
+    files = []
+    for _, element in ET.iterparse(test_list, events=('end',)):
+        if local_name(element.tag) == 'testClass' and element.get('file'):
+            files.append(relative_test_path(element.get('file')))
+        element.clear()
+    return files
+
+
+def discover_shards(suites: List[str], config: Path = PHPUNIT_CONFIG,
+                    test_list: Path = TEST_LIST) -> List[str]:
+    """One shard per test file of the selected suites"""
+    definitions = suite_directories(config)
+    unknown = [suite for suite in suites if suite not in definitions]
+    if unknown:
+        raise SystemExit(f"Unknown test suite(s): {', '.join(unknown)} "
+                         f"(available: {', '.join(definitions)})")
+
+    files = set()
+    for suite in suites:
+        directories = definitions[suite]['directories']
+        excluded = definitions[suite]['exclude']
+
+        def belongs(path: str) -> bool:
+            return path not in excluded and any(
+                path.startswith(directory.rstrip('/') + '/') and path.endswith(suffix)
+                for directory, suffix in directories)
+
+        # The listing may be stale: keep what still exists and add new files
+        files.update(path for path in listed_test_files(test_list)
+                     if belongs(path) and Path(path).exists())
+        for directory, suffix in directories:
+            files.update(path.as_posix() for path in Path(directory).rglob(f'*{suffix}')
+                         if belongs(path.as_posix()))
+    return sorted(files)
+
+
+def recorded_durations(report: Path = TEST_REPORT) -> Dict[str, float]:
+    """Per-file time of the last JUnit run, for longest-first dispatch"""
+    if not report.exists():
+        return {}
+    durations: Dict[str, float] = {}
+    for _, element in ET.iterparse(report, events=('end',)):
+        if element.tag == 'testsuite' and element.get('file'):
+            path = relative_test_path(element.get('file'))
+            durations[path] = durations.get(path, 0.0) + float(element.get('time', 0))
+            element.clear()
+        elif element.tag == 'testcase':
+            element.clear()
+    return durations
+
+
+class PhpWorker:
+    """One phpunit-worker.php process; jobs go over stdin, replies over a pipe"""
+
+    def __init__(self, php: str, log_path: Path):
+        self.php = php
+        self.log_path = log_path
+        self.process: Optional[subprocess.Popen] = None
+        self.replies = None
+        self.fork = False
+
+    def start(self) -> None:
+        read_fd, write_fd = os.pipe()
+        log = open(self.log_path, 'a', encoding='utf-8')
+        try:
+            self.process = subprocess.Popen(
+                [self.php, str(WORKER_SCRIPT)],
+                stdin=subprocess.PIPE,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                pass_fds=(write_fd,),
+                env=dict(os.environ, PHPUNIT_WORKER_REPLY_FD=str(write_fd)),
+                text=True,
+                **isolated_popen_kwargs()
+            )
+        except OSError as e:
+            os.close(read_fd)
+            raise RuntimeError(f"PHP worker could not be started: {e}") from e
+        finally:
+            os.close(write_fd)
+            log.close()
+        self.replies = os.fdopen(read_fd, 'r', encoding='utf-8')
+        ready = self.read_reply(READY_TIMEOUT)
+        if not ready or not ready.get('ready'):
+            self.stop()
+            raise RuntimeError(f"PHP worker did not start, see {self.log_path}")
+        self.fork = ready.get('fork', False)
+
+    def read_reply(self, timeout: float) -> Optional[Dict]:
+        """Next reply, or None on timeout or when the worker closed the pipe"""
+        readable, _, _ = select.select([self.replies], [], [], timeout)
+        if not readable:
+            return None
+        line = self.replies.readline()
+        return json.loads(line) if line else None
+
+    def run(self, job: Dict, timeout: float) -> Dict:
+        """Send one job and wait for its reply.
+
+        A worker that dies or times out is stopped (the next job restarts
+        it); the reply then carries its exit status, or None on timeout.
+        """
+        try:
+            self.process.stdin.write(json.dumps(job) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass
+        reply = self.read_reply(timeout)
+        if reply is not None:
+            return reply
+        try:
+            # The reply pipe closes a moment before the process is reaped
+            died = self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            died = None
+        self.stop(kill=died is None)
+        return {'id': job['id'], 'exit': died, 'time': timeout if died is None else 0.0}
+
+    def stop(self, kill: bool = False) -> None:
+        if self.process and self.process.poll() is None:
+            if kill:
+                # Also reaches a forked child that is still running a shard
+                terminate_tree(self.process)
+            else:
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    terminate_tree(self.process)
+        if self.replies:
+            self.replies.close()
+            self.replies = None
+        self.process = None
+
+
+class PhpunitPool:
+    """Dispatches test-file shards to warm PHP workers and merges their JUnit output"""
+
+    def __init__(self, workers: int, php: str = 'php', timeout: float = SHARD_TIMEOUT,
+                 spawn: bool = False, work_dir: Path = POOL_DIR):
+        self.workers = workers
+        self.php = php
+        self.timeout = timeout
+        # pass_fds and pcntl are POSIX only
+        self.spawn = spawn or os.name == 'nt'
+        self.work_dir = work_dir
+        self.lock = threading.Lock()
+        self.results: List[Dict] = []
+
+    def run(self, shards: List[str], junit_path: Path) -> Dict:
+        shutil.rmtree(self.work_dir / "shards", ignore_errors=True)
+        (self.work_dir / "shards").mkdir(parents=True, exist_ok=True)
+
+        durations = recorded_durations()
+        jobs: "queue.Queue[Dict]" = queue.Queue()
+        for job_id, path in enumerate(sorted(shards, key=lambda p: -durations.get(p, 0.0))):
+            jobs.put({'id': job_id, 'file': path,
+                      'junit': str(self.work_dir / "shards" / f"{job_id:05d}.xml")})
+
+        start = time.time()
+        threads = [threading.Thread(target=self.drain, args=(jobs, worker_id))
+                   for worker_id in range(min(self.workers, len(shards)) or 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        totals = merge_junit(sorted(self.results, key=lambda r: r['id']), junit_path)
+        totals['shards'] = len(shards)
+        totals['completed'] = len(self.results)
+        totals['wall_time'] = time.time() - start
+        totals['crashed'] = sum(1 for result in self.results if result['exit'] is None
+                                or not Path(result['junit']).exists())
+        return totals
+
+    def drain(self, jobs: "queue.Queue[Dict]", worker_id: int) -> None:
+        log_path = self.work_dir / f"worker_{worker_id}.log"
+        worker = None if self.spawn else PhpWorker(self.php, log_path)
+        while True:
+            try:
+                job = jobs.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None and worker.process is None:
+                try:
+                    worker.start()
+                except RuntimeError as e:
+                    # Keep draining the queue, one fresh process per shard
+                    print(f"\n{e}; worker {worker_id} falls back to spawn mode", flush=True)
+                    worker = None
+            if worker is None:
+                result = self.run_spawned(job, log_path)
+            else:
+                reply = worker.run(job, self.timeout)
+                result = dict(job, exit=reply['exit'], time=reply['time'])
+            with self.lock:
+                self.results.append(result)
+                done = len(self.results)
+            mark = '✓' if result['exit'] == 0 else '✗'
+            print(f"\r{mark} {done} shards done ({job['file']})"[:100].ljust(100), end='', flush=True)
+        if worker:
+            worker.stop()
+
+    def run_spawned(self, job: Dict, log_path: Path) -> Dict:
+        command = (f"{self.php} {SPAWN_SCRIPT} --no-output --do-not-cache-result "
+                   f"--log-junit {job['junit']} {job['file']}")
+        capture = run_streaming(command, log_path.with_name(f"shard_{job['id']:05d}.log"),
+                                self.timeout)
+        return dict(job, exit=None if capture.timed_out else capture.returncode,
+                    time=capture.duration)
+
+
+def merge_junit(results: List[Dict], junit_path: Path) -> Dict:
+    """Combine the per-shard JUnit files; crashed shards become an <error> case"""
+    counters = ('tests', 'assertions', 'errors', 'failures', 'skipped')
+    totals: Dict = {key: 0 for key in counters}
+    totals['time'] = 0.0
+    suites = []
+
+    for result in results:
+        suite = None
+        try:
+            root = ET.parse(result['junit']).getroot()
+            suite = root.find('testsuite') if root.tag == 'testsuites' else root
+        except (OSError, ET.ParseError):
+            pass
+        if suite is None:
+            reason = 'timed out' if result['exit'] is None else f"exited with {result['exit']}"
+            suite = ET.Element('testsuite', name=result['file'], file=result['file'], tests='1',
+                               assertions='0', errors='1', failures='0', skipped='0',
+                               time=f"{result['time']:.6f}")
+            case = ET.SubElement(suite, 'testcase', name='(shard)', file=result['file'],
+                                 assertions='0', time=f"{result['time']:.6f}")
+            ET.SubElement(case, 'error', type='PhpunitPool\\ShardCrashed').text = \
+                f"{result['file']} {reason} without a JUnit report"
+        for key in counters:
+            totals[key] += int(suite.get(key, 0))
+        totals['time'] += float(suite.get('time', 0))
+        suites.append(suite)
+
+    merged = ET.Element('testsuites')
+    top = ET.SubElement(merged, 'testsuite', name=str(PHPUNIT_CONFIG),
+                        **{key: str(totals[key]) for key in counters}, time=f"{totals['time']:.6f}")
+    top.extend(suites)
+
+    junit_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = junit_path.with_name(f".{junit_path.name}.tmp")
+    ET.ElementTree(merged).write(tmp_path, encoding='UTF-8', xml_declaration=True)
+    os.replace(tmp_path, junit_path)
+    return totals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run PHPUnit suites on a pool of warm PHP workers")
+    parser.add_argument('--testsuite', action='append',
+                        help='suite from phpunit.xml (repeatable or comma separated; default: all)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--log-junit', type=Path, default=POOL_DIR / "junit.xml")
+    parser.add_argument('--timeout', type=float, default=SHARD_TIMEOUT, help='seconds per test file')
+    parser.add_argument('--php', default='php', help='PHP binary')
+    parser.add_argument('--spawn', action='store_true',
+                        help='fresh PHP process per shard instead of forking warm workers')
+    parser.add_argument('--no-store', action='store_true',
+                        help='do not add the merged report to the junit_store history')
+    args = parser.parse_args()
+
+    suites = [name for value in (args.testsuite or []) for name in value.split(',') if name]
+    shards = discover_shards(suites or list(suite_directories()))
+    if not shards:
+        print("No test files found")
+        return 1
+
+    print(f"{len(shards)} test files on {args.workers} "
+          f"{'spawned' if args.spawn or os.name == 'nt' else 'warm'} PHP workers")
+    pool = PhpunitPool(args.workers, args.php, args.timeout, args.spawn)
+    totals = pool.run(shards, args.log_junit)
+
+    print(f"\nTests: {totals['tests']}, Assertions: {totals['assertions']}, "
+          f"Errors: {totals['errors']}, Failures: {totals['failures']}, Skipped: {totals['skipped']}")
+    print(f"Crashed shards: {totals['crashed']} | test time {totals['time']:.1f}s | "
+          f"wall time {totals['wall_time']:.1f}s")
+    print(f"JUnit report: {args.log_junit}")
+    if not args.no_store:
+        # Builds the baseline for duration_regression.py
+        JUnitIngester(connect()).ingest(args.log_junit, label=','.join(suites) or 'all')
+    if totals['completed'] < totals['shards']:
+        print(f"Only {totals['completed']} of {totals['shards']} shards ran")
+        return 1
+    return 0 if totals['errors'] == 0 and totals['failures'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+In-process progress events for the test/tool runners, with a live dashboard.
+
+Runners publish events on an EventBus instead of printing progress lines that
+monitor scripts then re-derive from output directories:
+
+    run_started    total, workers
+    item_started   item, worker
+    item_finished  item, worker, duration, verdict
+    run_finished
+
+A ProgressTracker folds the events into a snapshot (done/total, verdict
+counts, throughput in items per minute, ETA, per-worker utilisation), and
+DashboardServer serves it on localhost:
+
+    /         live HTML dashboard
+    /events   Server-Sent Events stream of snapshots
+    /status   current snapshot as JSON
+
+    python3 execute_task4_intelligent.py --dashboard 8765
+    python3 progress_events.py watch --port 8765        # follow from a terminal
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_PORT = 8765
+# Throughput and ETA follow the items finished within this window
+RATE_WINDOW_SECONDS = 300
+# Snapshots are pushed at most this often, and at least this often as a heartbeat
+PUSH_INTERVAL = 0.5
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE = 1000
+
+
+class EventBus:
+    """Thread-safe publish/subscribe; a slow subscriber drops events rather than blocking runners"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handlers: List[Callable[[Dict], None]] = []
+        self.queues: List[queue.Queue] = []
+
+    def publish(self, kind: str, **fields) -> None:
+        event = dict(fields, type=kind, time=time.time())
+        with self.lock:
+            handlers = list(self.handlers)
+            queues = list(self.queues)
+        for handler in handlers:
+            handler(event)
+        for events in queues:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def on(self, handler: Callable[[Dict], None]) -> None:
+        """Call `handler(event)` synchronously on the publishing thread"""
+        with self.lock:
+            self.handlers.append(handler)
+
+    def subscribe(self) -> queue.Queue:
+        events: queue.Queue = queue.Queue(SUBSCRIBER_QUEUE)
+        with self.lock:
+            self.queues.append(events)
+        return events
+
+    def unsubscribe(self, events: queue.Queue) -> None:
+        with self.lock:
+            if events in self.queues:
+                self.queues.remove(events)
+
+
+class ProgressTracker:
+    """Aggregates bus events into a progress snapshot"""
+
+    def __init__(self, bus: EventBus):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.workers = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = 0
+        self.verdicts: Dict[str, int] = {}
+        self.busy: Dict[str, float] = {}
+        self.running: Dict[str, Tuple[str, float]] = {}
+        self.recent: Deque[float] = deque()
+        self.last: Deque[Dict] = deque(maxlen=10)
+        self.changed = threading.Condition(self.lock)
+        self.version = 0
+        bus.on(self.handle)
+
+    def handle(self, event: Dict) -> None:
+        kind = event['type']
+        with self.lock:
+            if kind == 'run_started':
+                self.total = event.get('total', 0)
+                self.workers = event.get('workers', 1)
+                self.started_at = event['time']
+            elif kind == 'item_started':
+                self.running[event['worker']] = (event['item'], event['time'])
+            elif kind == 'item_finished':
+                worker = event['worker']
+                self.running.pop(worker, None)
+                self.busy[worker] = self.busy.get(worker, 0.0) + event.get('duration', 0.0)
+                self.done += 1
+                verdict = event.get('verdict') or 'done'
+                self.verdicts[verdict] = self.verdicts.get(verdict, 0) + 1
+                self.recent.append(event['time'])
+                self.last.append({'item': event['item'], 'verdict': verdict,
+                                  'duration': round(event.get('duration', 0.0), 2)})
+            elif kind == 'run_finished':
+                self.finished_at = event['time']
+            else:
+                return
+            self.version += 1
+            self.changed.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            now = self.finished_at or time.time()
+            elapsed = now - self.started_at if self.started_at else 0.0
+            while self.recent and self.recent[0] < now - RATE_WINDOW_SECONDS:
+                self.recent.popleft()
+            window = min(elapsed, RATE_WINDOW_SECONDS)
+            per_minute = len(self.recent) * 60 / window if window > 0 else 0.0
+            remaining = max(self.total - self.done, 0)
+            if self.finished_at:
+                eta = 0.0
+            elif per_minute > 0:
+                eta = remaining * 60 / per_minute
+            else:
+                eta = None
+            workers = {}
+            for name in sorted(set(self.busy) | set(self.running)):
+                busy = self.busy.get(name, 0.0)
+                current = self.running.get(name)
+                if current:
+                    busy += now - current[1]
+                workers[name] = {'utilisation': busy / elapsed if elapsed > 0 else 0.0,
+                                 'current': current[0] if current else None}
+            return {
+                'total': self.total, 'done': self.done, 'remaining': remaining,
+                'percent': self.done * 100 / self.total if self.total else 0.0,
+                'verdicts': dict(self.verdicts), 'elapsed': elapsed,
+                'per_minute': per_minute, 'eta_seconds': eta,
+                'workers': workers, 'last': list(self.last),
+                'finished': self.finished_at is not None, 'version': self.version,
+            }
+
+    def wait_for_change(self, version: int, timeout: float) -> None:
+        with self.lock:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html lang="ar" dir="rtl">
+<head>
+<meta charset="utf-8">
+<title>COPRRA - تقدم التنفيذ</title>
+<style>
+body { font-family: system-ui, sans-serif; margin: 2rem; }
+.bar { background: #eee; height: 1.5rem; border-radius: .25rem; overflow: hidden; }
+.bar > div { background: #2da44e; height: 100%; }
+table { border-collapse: collapse; margin-top: 1rem; }
+td, th { border: 1px solid #ccc; padding: .25rem .5rem; }
+.stats span { display: inline-block; margin-left: 2rem; font-size: 1.2rem; }
+</style>
+</head>
+<body>
+<h1>تقدم التنفيذ</h1>
+<div class="bar"><div id="bar" style="width:0"></div></div>
+<p class="stats"><span id="done"></span><span id="rate"></span><span id="eta"></span><span id="verdicts"></span></p>
+<h2>العمال</h2>
+<table id="workers"></table>
+<h2>آخر النتائج</h2>
+<table id="last"></table>
+<script>
+function minutes(s) { return s == null ? '…' : (s / 60).toFixed(1) + ' د'; }
+function cell(tag, text) { const e = document.createElement(tag); e.textContent = text; return e; }
+function rows(table, header, data) {
+  table.replaceChildren();
+  const h = document.createElement('tr'); header.forEach(t => h.appendChild(cell('th', t))); table.appendChild(h);
+  data.forEach(r => { const tr = document.createElement('tr'); r.forEach(t => tr.appendChild(cell('td', t))); table.appendChild(tr); });
+}
+new EventSource('/events').onmessage = (message) => {
+  const s = JSON.parse(message.data);
+  document.getElementById('bar').style.width = s.percent.toFixed(1) + '%';
+  document.getElementById('done').textContent = `${s.done}/${s.total} (${s.percent.toFixed(1)}%)`;
+  document.getElementById('rate').textContent = `${s.per_minute.toFixed(1)} عنصر/دقيقة`;
+  document.getElementById('eta').textContent = s.finished ? 'اكتمل' : `المتبقي: ${minutes(s.eta_seconds)}`;
+  document.getElementById('verdicts').textContent = Object.entries(s.verdicts).map(([k, v]) => `${k}: ${v}`).join(' | ');
+  rows(document.getElementById('workers'), ['العامل', 'الاستخدام', 'العنصر الحالي'],
+       Object.entries(s.workers).map(([name, w]) => [name, (w.utilisation * 100).toFixed(0) + '%', w.current || '—']));
+  rows(document.getElementById('last'), ['العنصر', 'النتيجة', 'المدة'],
+       s.last.slice().reverse().map(r => [r.item, r.verdict, r.duration + 's']));
+};
+</script>
+</body>
+</html>
+"""
+
+
+class _DashboardHandler(BaseHTTPRequestHandler):
+    tracker: ProgressTracker
+
+    def do_GET(self) -> None:
+        if self.path == '/':
+            self._send(200, 'text/html; charset=utf-8', DASHBOARD_HTML.encode('utf-8'))
+        elif self.path == '/status':
+            self._send(200, 'application/json', json.dumps(self.tracker.snapshot()).encode('utf-8'))
+        elif self.path == '/events':
+            self._stream()
+        else:
+            self._send(404, 'text/plain', b'not found')
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        version = -1
+        try:
+            while True:
+                snapshot = self.tracker.snapshot()
+                if snapshot['version'] != version:
+                    version = snapshot['version']
+                    self.wfile.write(f"data: {json.dumps(snapshot)}\n\n".encode('utf-8'))
+                else:
+                    self.wfile.write(b": heartbeat\n\n")
+                self.wfile.flush()
+                if snapshot['finished']:
+                    return
+                self.tracker.wait_for_change(version, HEARTBEAT_SECONDS)
+                time.sleep(PUSH_INTERVAL)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class DashboardServer:
+    """Serves the tracker's dashboard from a daemon thread on localhost"""
+
+    def __init__(self, tracker: ProgressTracker, port: int = DEFAULT_PORT, host: str = '127.0.0.1'):
+        handler = type('DashboardHandler', (_DashboardHandler,), {'tracker': tracker})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='dashboard', daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> 'DashboardServer':
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_dashboard(port: Optional[int]) -> Tuple[EventBus, Optional[DashboardServer]]:
+    """Bus for a runner, with the dashboard started when a port is given"""
+    bus = EventBus()
+    tracker = ProgressTracker(bus)
+    if not port:
+        return bus, None
+    server = DashboardServer(tracker, port).start()
+    print(f"📡 لوحة التقدم: {server.url}")
+    return bus, server
+
+
+def watch(port: int, host: str = '127.0.0.1') -> int:
+    """Print one line per snapshot from a running dashboard"""
+    try:
+        stream = urllib.request.urlopen(f"http://{host}:{port}/events")
+    except OSError as e:
+        print(f"لا توجد لوحة تقدم على المنفذ {port}: {e}")
+        return 1
+    with stream:
+        for raw in stream:
+            line = raw.decode('utf-8').strip()
+            if not line.startswith('data: '):
+                continue
+            s = json.loads(line[6:])
+            eta = 'اكتمل' if s['finished'] else (
+                f"{s['eta_seconds'] / 60:.1f} د" if s['eta_seconds'] is not None else '…')
+            verdicts = ' '.join(f"{k}:{v}" for k, v in sorted(s['verdicts'].items()))
+            busy = ' '.join(f"{w['utilisation'] * 100:.0f}%" for w in s['workers'].values())
+            print(f"{time.strftime('%H:%M:%S')} {s['done']}/{s['total']} ({s['percent']:.1f}%) "
+                  f"{s['per_minute']:.1f}/min ETA {eta} | {verdicts} | workers {busy}", flush=True)
+            if s['finished']:
+                break
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Follow a runner's live progress dashboard")
+    sub = parser.add_subparsers(dest='command', required=True)
+    watch_parser = sub.add_parser('watch', help='print progress from a running dashboard')
+    watch_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    watch_parser.add_argument('--host', default='127.0.0.1')
+    args = parser.parse_args()
+    return watch(args.port, args.host)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
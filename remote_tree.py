@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Remote directory-tree cache for the FTP/SFTP deployers.
+
+Creating each file's directory on the fly costs a cwd/mkd (FTP) or stat
+(SFTP) per path component for every file, i.e. ~2x depth round trips before
+the first byte.  Instead, the directories the upload needs are resolved once
+up front: existing ones are discovered with one listing per needed
+directory, the missing ones are created parents-first, and every file is
+then stored with a single STOR/put to its absolute path:
+
+    tree = RemoteTree('/public_html')
+    tree.scan(list_subdirs, files)          # list_subdirs(abs_dir) -> names or None
+    tree.create_missing(make_dir, files)    # make_dir(abs_dir)
+    ftp.storbinary(f"STOR {tree.absolute('app/Models/User.php')}", f)
+"""
+
+import posixpath
+from typing import Callable, Iterable, List, Optional, Set
+
+
+def parent_dirs(path: str) -> List[str]:
+    """'app/Models/User.php' -> ['app', 'app/Models']"""
+    parts = path.strip('/').split('/')[:-1]
+    return ['/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def needed_dirs(paths: Iterable[str]) -> Set[str]:
+    """Every directory (relative to the root) that must exist to store `paths`"""
+    dirs: Set[str] = set()
+    for path in paths:
+        dirs.update(parent_dirs(path))
+    return dirs
+
+
+class RemoteTree:
+    """Directories known to exist under `root` (paths relative to it, '' is the root)"""
+
+    def __init__(self, root: str):
+        self.root = root.rstrip('/') or '/'
+        self.dirs: Set[str] = {''}
+        self.listings = 0
+        self.created = 0
+
+    def absolute(self, path: str) -> str:
+        path = path.strip('/')
+        return posixpath.join(self.root, path) if path else self.root
+
+    def scan(self, list_subdirs: Callable[[str], Optional[Iterable[str]]],
+             paths: Iterable[str]) -> None:
+        """Discover which needed directories exist, listing only their existing ancestors.
+
+        `list_subdirs(absolute_dir)` returns the names of the subdirectories
+        of a directory, or None when it cannot be listed.
+        """
+        wanted = needed_dirs(paths)
+        # Only directories that lead to a needed subdirectory are listed
+        branches = needed_dirs(wanted)
+        pending = [''] if wanted else []
+        while pending:
+            directory = pending.pop()
+            if directory and directory not in branches:
+                continue
+            names = list_subdirs(self.absolute(directory))
+            self.listings += 1
+            for name in names or ():
+                child = f"{directory}/{name}" if directory else name
+                if child in wanted:
+                    self.dirs.add(child)
+                    pending.append(child)
+
+    def missing(self, paths: Iterable[str]) -> List[str]:
+        """Needed directories not known to exist, parents first"""
+        return sorted(needed_dirs(paths) - self.dirs, key=lambda d: (d.count('/'), d))
+
+    def create_missing(self, make_dir: Callable[[str], None], paths: Iterable[str]) -> None:
+        for directory in self.missing(paths):
+            make_dir(self.absolute(directory))
+            self.dirs.add(directory)
+            self.created += 1
+
+    def describe(self) -> str:
+        return (f"{len(self.dirs) - 1 - self.created} directories found with {self.listings} listings, "
+                f"{self.created} created")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Shared report rendering for the test runners.
+
+A report is built in memory as a list of blocks (headings, paragraphs,
+label/value fields, code, tables) plus an optional `data` dict with the raw
+results.  The same model renders to Markdown, HTML and JSON through templates
+compiled once at import, and each output file is written with a single
+atomic write instead of a stream of f.write() calls:
+
+    report = Report("تقرير تنفيذ Task 4", data=results)
+    report.heading("📊 ملخص النتائج")
+    report.fields([("إجمالي الاختبارات", 450), ("✓ نجح", 441)])
+    report.extend(regression_section())
+    write_report(report, REPORTS_DIR / "TASK_4_EXECUTION_REPORT.md", formats=('md', 'html', 'json'))
+
+Inline **bold** and `code` in text are kept as-is in Markdown and JSON and
+converted in HTML.
+"""
+
+import html
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+Field = Tuple[str, Any]
+
+MARKDOWN = {
+    'heading': '{marks} {text}\n\n',
+    'paragraph': '{text}\n\n',
+    'field': '**{label}**: {value}\n\n',
+    'bullet': '- **{label}**: {value}\n',
+    'code_label': '**{label}**:\n',
+    'code': '```\n{text}\n```\n\n',
+    'rule': '---\n\n',
+}
+
+HTML = {
+    'heading': '<h{level}>{text}</h{level}>\n',
+    'paragraph': '<p>{text}</p>\n',
+    'field': '<p><strong>{label}</strong>: {value}</p>\n',
+    'bullet': '<li><strong>{label}</strong>: {value}</li>\n',
+    'code_label': '<p><strong>{label}</strong>:</p>\n',
+    'code': '<pre><code>{text}</code></pre>\n',
+    'cell_l': '<td>{text}</td>',
+    'cell_r': '<td class="num">{text}</td>',
+    'rule': '<hr>\n',
+}
+
+HTML_PAGE = Template("""<!DOCTYPE html>
+<html lang="ar" dir="auto">
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { font-family: system-ui, sans-serif; max-width: 72rem; margin: 2rem auto; padding: 0 1rem; line-height: 1.5; }
+pre { background: #f6f8fa; padding: .75rem; overflow-x: auto; direction: ltr; text-align: left; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid #d0d7de; padding: .25rem .5rem; }
+td.num { text-align: right; }
+</style>
+</head>
+<body>
+$body</body>
+</html>
+""")
+
+BOLD = re.compile(r'\*\*(.+?)\*\*')
+CODE = re.compile(r'`([^`]+)`')
+
+
+def inline_html(text: Any) -> str:
+    """Escape `text` and turn inline **bold** / `code` into tags"""
+    escaped = html.escape(str(text), quote=False)
+    escaped = CODE.sub(r'<code>\1</code>', escaped)
+    return BOLD.sub(r'<strong>\1</strong>', escaped)
+
+
+class Report:
+    """Block model of one report (or of a section that is merged into one)"""
+
+    def __init__(self, title: Optional[str] = None, subtitle: Optional[str] = None,
+                 data: Optional[Dict] = None):
+        self.title = title
+        self.data = data if data is not None else {}
+        self.blocks: List[Dict] = []
+        if title:
+            self.heading(title, 1)
+        if subtitle:
+            self.heading(subtitle, 2)
+
+    def heading(self, text: str, level: int = 2) -> 'Report':
+        self.blocks.append({'type': 'heading', 'level': level, 'text': text})
+        return self
+
+    def paragraph(self, text: str) -> 'Report':
+        self.blocks.append({'type': 'paragraph', 'text': text})
+        return self
+
+    def fields(self, fields: Iterable[Field], bullets: bool = True) -> 'Report':
+        """Label/value pairs: a bullet list, or one bold-label paragraph each"""
+        self.blocks.append({'type': 'fields', 'bullets': bullets,
+                            'fields': [[label, value] for label, value in fields]})
+        return self
+
+    def field(self, label: str, value: Any) -> 'Report':
+        return self.fields([(label, value)], bullets=False)
+
+    def code(self, text: str, label: Optional[str] = None) -> 'Report':
+        self.blocks.append({'type': 'code', 'label': label, 'text': text})
+        return self
+
+    def table(self, headers: Sequence[str], rows: Iterable[Sequence[Any]],
+              align: Optional[str] = None) -> 'Report':
+        """`align` has one character per column: 'l' or 'r'"""
+        self.blocks.append({'type': 'table', 'headers': list(headers), 'align': align or 'l' * len(headers),
+                            'rows': [list(row) for row in rows]})
+        return self
+
+    def rule(self) -> 'Report':
+        self.blocks.append({'type': 'rule'})
+        return self
+
+    def extend(self, other: Optional['Report']) -> 'Report':
+        """Append the blocks (and data) of a section built elsewhere"""
+        if other is not None:
+            self.blocks.extend(other.blocks)
+            self.data.update(other.data)
+        return self
+
+
+def render_markdown(report: Report) -> str:
+    parts: List[str] = []
+    for block in report.blocks:
+        kind = block['type']
+        if kind == 'heading':
+            parts.append(MARKDOWN['heading'].format(marks='#' * block['level'], text=block['text']))
+        elif kind == 'paragraph':
+            parts.append(MARKDOWN['paragraph'].format(text=block['text']))
+        elif kind == 'fields':
+            template = MARKDOWN['bullet' if block['bullets'] else 'field']
+            parts.extend(template.format(label=label, value=value) for label, value in block['fields'])
+            if block['bullets']:
+                parts.append('\n')
+        elif kind == 'code':
+            if block['label']:
+                parts.append(MARKDOWN['code_label'].format(label=block['label']))
+            parts.append(MARKDOWN['code'].format(text=block['text']))
+        elif kind == 'table':
+            parts.append('| ' + ' | '.join(block['headers']) + ' |\n')
+            parts.append('|' + '|'.join('---:' if a == 'r' else '---' for a in block['align']) + '|\n')
+            parts.extend('| ' + ' | '.join(str(cell) for cell in row) + ' |\n' for row in block['rows'])
+            parts.append('\n')
+        elif kind == 'rule':
+            parts.append(MARKDOWN['rule'])
+    return ''.join(parts)
+
+
+def render_html(report: Report) -> str:
+    parts: List[str] = []
+    for block in report.blocks:
+        kind = block['type']
+        if kind == 'heading':
+            parts.append(HTML['heading'].format(level=block['level'], text=inline_html(block['text'])))
+        elif kind == 'paragraph':
+            parts.append(HTML['paragraph'].format(text=inline_html(block['text'])))
+        elif kind == 'fields':
+            template = HTML['bullet' if block['bullets'] else 'field']
+            items = ''.join(template.format(label=inline_html(label), value=inline_html(value))
+                            for label, value in block['fields'])
+            parts.append(f"<ul>\n{items}</ul>\n" if block['bullets'] else items)
+        elif kind == 'code':
+            if block['label']:
+                parts.append(HTML['code_label'].format(label=inline_html(block['label'])))
+            parts.append(HTML['code'].format(text=html.escape(block['text'], quote=False)))
+        elif kind == 'table':
+            head = ''.join(f"<th>{inline_html(header)}</th>" for header in block['headers'])
+            rows = ''.join(
+                '<tr>' + ''.join(HTML['cell_' + a].format(text=inline_html(cell))
+                                 for a, cell in zip(block['align'], row)) + '</tr>\n'
+                for row in block['rows'])
+            parts.append(f"<table>\n<tr>{head}</tr>\n{rows}</table>\n")
+        elif kind == 'rule':
+            parts.append(HTML['rule'])
+    return HTML_PAGE.substitute(title=html.escape(report.title or ''), body=''.join(parts))
+
+
+def render_json(report: Report) -> str:
+    return json.dumps({'title': report.title, 'data': report.data, 'blocks': report.blocks},
+                      indent=2, ensure_ascii=False, default=str)
+
+
+RENDERERS = {'md': render_markdown, 'html': render_html, 'json': render_json}
+
+
+def atomic_write(path: Path, text: str) -> None:
+    """Write `text` to `path` in one write, replacing the file atomically"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.unlink(temp)
+        raise
+
+
+def write_report(report: Report, path: Union[str, Path], formats: Sequence[str] = ('md',)) -> List[Path]:
+    """Render `report` once per format next to `path` (its suffix is replaced)"""
+    path = Path(path)
+    written = []
+    for fmt in formats:
+        target = path.with_suffix('.' + fmt)
+        atomic_write(target, RENDERERS[fmt](report))
+        written.append(target)
+    return written
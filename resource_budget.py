@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+CPU/memory admission control for the COPRRA test/tool runners.
+
+Every command carries a CPU weight (cores) and a resident-memory weight (MB).
+A job is only admitted while the machine's budget has room for it, so heavy
+analysers such as `phpstan --memory-limit=2G`, psalm and phpinsights no longer
+all start at once and push the box into swap.  Real usage is sampled from
+/proc while jobs run and folded back into the weights for the next run.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Any
+
+WEIGHTS_FILE = Path("reports/task4_execution/resource_weights.json")
+PROC_DIR = Path("/proc")
+MEMORY_FRACTION = 0.8
+SAMPLE_INTERVAL = 0.5
+LEARNING_RATE = 0.5
+
+# (command substring, cpu cores, resident MB) - first match wins
+DEFAULT_WEIGHTS = [
+    ('phpstan', 1.0, 1024),
+    ('psalm', 2.0, 1536),
+    ('phpinsights', 1.0, 1024),
+    ('infection', 2.0, 1024),
+    ('phpunit', 1.0, 512),
+    ('phpmd', 1.0, 512),
+    ('eslint', 1.0, 512),
+    ('npm ', 1.0, 512),
+]
+FALLBACK_WEIGHT = (1.0, 256)
+
+MEMORY_LIMIT_PATTERN = re.compile(r'memory[-_]limit=(\d+)([KMG]?)', re.IGNORECASE)
+UNIT_MB = {'': 1 / (1024 * 1024), 'K': 1 / 1024, 'M': 1, 'G': 1024}
+# Pooled runners (phpunit_pool.py) occupy one weight per worker
+WORKERS_PATTERN = re.compile(r'--workers[= ](\d+)')
+
+
+def declared_weight(command: str) -> Tuple[float, float]:
+    """Static (cpu, MB) weight from the command line and the defaults table"""
+    lowered = command.lower()
+    cpu, memory = FALLBACK_WEIGHT
+    for needle, needle_cpu, needle_memory in DEFAULT_WEIGHTS:
+        if needle in lowered:
+            cpu, memory = needle_cpu, needle_memory
+            break
+    match = MEMORY_LIMIT_PATTERN.search(command)
+    if match:
+        memory = int(match.group(1)) * UNIT_MB[match.group(2).upper()]
+    match = WORKERS_PATTERN.search(command)
+    if match:
+        cpu, memory = cpu * int(match.group(1)), memory * int(match.group(1))
+    return float(cpu), float(memory)
+
+
+def available_memory_mb() -> Optional[float]:
+    """MemAvailable from /proc/meminfo, or None off Linux"""
+    try:
+        with open(PROC_DIR / "meminfo", 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def process_tree(root_pid: int) -> list:
+    """PIDs of `root_pid` and all its descendants"""
+    children: Dict[int, list] = {}
+    for entry in PROC_DIR.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(entry / "stat", 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, so split after the closing paren
+        fields = stat[stat.rfind(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry.name))
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def sample_usage(pids: list) -> Tuple[float, float]:
+    """Total (cpu seconds, resident MB) across `pids`"""
+    ticks = os.sysconf('SC_CLK_TCK')
+    page_mb = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    cpu_seconds, rss_mb = 0.0, 0.0
+    for pid in pids:
+        try:
+            with open(PROC_DIR / str(pid) / "stat", 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        fields = stat[stat.rfind(')') + 2:].split()
+        # utime + stime, plus cutime + cstime of children already reaped
+        cpu_seconds += sum(int(value) for value in fields[11:15]) / ticks
+        rss_mb += int(fields[21]) * page_mb
+    return cpu_seconds, rss_mb
+
+
+class ResourceBudget:
+    """Token-bucket admission for CPU cores and resident memory.
+
+    `try_acquire()`/`release()` are called from the scheduling thread only;
+    `track()`/`untrack()` may be called from worker threads.
+    """
+
+    def __init__(self, cpu_budget: Optional[float] = None, memory_budget_mb: Optional[float] = None,
+                 command: Callable[[Any], str] = lambda item: item['command'],
+                 path: Path = WEIGHTS_FILE):
+        self.cpu_budget = float(cpu_budget or os.cpu_count() or 1)
+        available = available_memory_mb()
+        self.memory_budget = float(memory_budget_mb or (available * MEMORY_FRACTION if available else 4096))
+        self.command = command
+        self.path = Path(path)
+        self.learned: Dict[str, Dict[str, float]] = {}
+        self.cpu_in_use = 0.0
+        self.memory_in_use = 0.0
+        self.admitted: Dict[int, Tuple[float, float]] = {}
+        self.tracked: Dict[int, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.sampler: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.learned = json.load(f)
+        except (OSError, ValueError):
+            self.learned = {}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with self.lock:
+            snapshot = dict(sorted(self.learned.items()))
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def weight(self, command: str) -> Tuple[float, float]:
+        """Learned (cpu, MB) weight when available, else the declared one"""
+        with self.lock:
+            learned = self.learned.get(command)
+        if learned:
+            return learned['cpu'], learned['rss_mb']
+        return declared_weight(command)
+
+    def try_acquire(self, item: Any) -> bool:
+        """Reserve the item's weight if the budget allows it.
+
+        An item larger than the whole budget is still admitted when nothing
+        else is running, otherwise it could never start.
+        """
+        cpu, memory = self.weight(self.command(item))
+        cpu = min(cpu, self.cpu_budget)
+        fits = (self.cpu_in_use + cpu <= self.cpu_budget + 1e-9
+                and self.memory_in_use + memory <= self.memory_budget)
+        if not fits and self.admitted:
+            return False
+        self.cpu_in_use += cpu
+        self.memory_in_use += memory
+        self.admitted[id(item)] = (cpu, memory)
+        return True
+
+    def release(self, item: Any) -> None:
+        cpu, memory = self.admitted.pop(id(item), (0.0, 0.0))
+        self.cpu_in_use = max(0.0, self.cpu_in_use - cpu)
+        self.memory_in_use = max(0.0, self.memory_in_use - memory)
+
+    def track(self, command: str, pid: int) -> None:
+        """Start sampling the process tree rooted at `pid` for `command`"""
+        if not PROC_DIR.joinpath(str(pid)).exists():
+            return
+        with self.lock:
+            self.tracked[pid] = {'command': command, 'started': time.time(),
+                                 'cpu_seconds': 0.0, 'peak_rss_mb': 0.0}
+        self._ensure_sampler()
+
+    def untrack(self, pid: int) -> None:
+        """Stop sampling `pid` and fold its observed peak usage into the weights"""
+        with self.lock:
+            usage = self.tracked.pop(pid, None)
+        if not usage or usage['peak_rss_mb'] <= 0:
+            return
+        wall = max(time.time() - usage['started'], 1e-3)
+        observed_cpu = max(usage['cpu_seconds'] / wall, 0.1)
+        observed_rss = usage['peak_rss_mb']
+        with self.lock:
+            previous = self.learned.get(usage['command'])
+            if previous:
+                observed_cpu = previous['cpu'] + LEARNING_RATE * (observed_cpu - previous['cpu'])
+                observed_rss = previous['rss_mb'] + LEARNING_RATE * (observed_rss - previous['rss_mb'])
+            self.learned[usage['command']] = {'cpu': round(observed_cpu, 2),
+                                              'rss_mb': round(observed_rss, 1)}
+
+    def stop(self) -> None:
+        self.stopping.set()
+        if self.sampler:
+            self.sampler.join()
+            self.sampler = None
+
+    def _ensure_sampler(self) -> None:
+        with self.lock:
+            if self.sampler and self.sampler.is_alive():
+                return
+            self.stopping.clear()
+            self.sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self.sampler.start()
+
+    def _sample_loop(self) -> None:
+        while not self.stopping.wait(SAMPLE_INTERVAL):
+            with self.lock:
+                pids = list(self.tracked)
+            for pid in pids:
+                cpu_seconds, rss_mb = sample_usage(process_tree(pid))
+                with self.lock:
+                    usage = self.tracked.get(pid)
+                    if usage:
+                        usage['cpu_seconds'] = max(usage['cpu_seconds'], cpu_seconds)
+                        usage['peak_rss_mb'] = max(usage['peak_rss_mb'], rss_mb)
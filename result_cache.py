@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Content-addressed result cache for the COPRRA test/tool runners.
+
+A cached result is keyed on the command string plus a hash of the files the
+command reads.  The file set is declared per tool category (see INPUT_SETS);
+when neither the command nor any of its inputs changed, the stored verdict
+and output are replayed instead of spawning the process again.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+CACHE_DIR = Path("reports/task4_execution/result_cache")
+FILE_HASHES = CACHE_DIR / "file_hashes.json"
+
+PHP_SOURCES = ['app/**', 'bootstrap/app.php', 'config/**', 'routes/**', 'database/**', 'composer.lock']
+FRONTEND_SOURCES = ['resources/**', 'package.json', 'package-lock.json']
+
+# (command substrings, input globs) - first match wins
+INPUT_SETS: List[Tuple[List[str], List[str]]] = [
+    (['phpunit', 'paratest', 'artisan test', 'infection'],
+     PHP_SOURCES + ['tests/**', 'phpunit*.xml', 'infection.json.dist']),
+    (['phpstan', 'larastan'], PHP_SOURCES + ['phpstan.neon', 'phpstan-baseline.neon']),
+    (['psalm'], PHP_SOURCES + ['psalm.xml', 'psalm-baseline.xml']),
+    (['phpmd'], PHP_SOURCES + ['tests/**', 'phpmd*.xml']),
+    (['phpinsights'], PHP_SOURCES + ['phpinsights.php']),
+    (['pint', 'php-cs-fixer', 'phpcs', 'phpcbf'], PHP_SOURCES + ['tests/**', 'pint.json']),
+    (['rector'], PHP_SOURCES + ['rector.php']),
+    (['deptrac'], PHP_SOURCES + ['deptrac.yaml']),
+    (['composer audit', 'security-checker', 'composer validate', 'composer outdated'],
+     ['composer.json', 'composer.lock']),
+    (['npm audit'], ['package.json', 'package-lock.json']),
+    (['eslint'], FRONTEND_SOURCES + ['eslint.config.js']),
+    (['stylelint'], FRONTEND_SOURCES),
+    (['vitest', 'npm test', 'npm run'], FRONTEND_SOURCES + ['vite.config.js', 'vitest.config.js', 'tsconfig*.json']),
+]
+# Anything unrecognised is assumed to read the whole application
+DEFAULT_INPUTS = PHP_SOURCES + FRONTEND_SOURCES + ['tests/**', '*.xml', '*.neon', '*.json', '*.php', '*.sh']
+# Commands that may rewrite project files (fixers, formatters, migrations);
+# the file set is only walked and hashed again after one of these ran
+SOURCE_WRITERS = ['pint', 'php-cs-fixer', 'phpcbf', 'rector', '--fix', ':fix', '--write',
+                  'npm run format', 'composer format', 'pre-commit', 'migrate', 'db:seed',
+                  'l5-swagger:generate']
+CHECK_ONLY_FLAGS = ['--test', '--dry-run', '--check', 'format-test']
+EXCLUDED_DIRS = {'.git', 'vendor', 'node_modules', 'reports', 'storage', '__pycache__'}
+
+
+def inputs_for(command: str) -> List[str]:
+    """Declared input globs for a command"""
+    lowered = command.lower()
+    for needles, globs in INPUT_SETS:
+        if any(needle in lowered for needle in needles):
+            return globs
+    return DEFAULT_INPUTS
+
+
+def rewrites_sources(command: str) -> bool:
+    """Whether a command may change the files the cache hashes"""
+    lowered = command.lower()
+    if any(flag in lowered for flag in CHECK_ONLY_FLAGS):
+        return False
+    return any(writer in lowered for writer in SOURCE_WRITERS)
+
+
+class ResultCache:
+    """Replays stored results for commands whose inputs have not changed"""
+
+    def __init__(self, root: Optional[Path] = None, cache_dir: Path = CACHE_DIR):
+        self.root = Path(root) if root else Path.cwd()
+        self.cache_dir = Path(cache_dir)
+        self.hashes_file = self.cache_dir / FILE_HASHES.name
+        # relative path -> [size, mtime_ns, sha256]; avoids re-reading unchanged files
+        self.file_hashes: Dict[str, list] = {}
+        self.glob_digests: Dict[str, str] = {}
+        self.files: Optional[List[str]] = None
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.hashes_file, 'r', encoding='utf-8') as f:
+                self.file_hashes = json.load(f)
+        except (OSError, ValueError):
+            self.file_hashes = {}
+
+    def save(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.hashes_file.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.file_hashes, f)
+        os.replace(tmp_path, self.hashes_file)
+
+    def project_files(self) -> List[str]:
+        """All project files (relative, '/'-separated), walked once per run"""
+        if self.files is None:
+            self.files = []
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+                rel_dir = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+                for name in sorted(filenames):
+                    self.files.append(name if rel_dir == '.' else f"{rel_dir}/{name}")
+        return self.files
+
+    def file_digest(self, rel_path: str) -> str:
+        path = self.root / rel_path
+        try:
+            stat = path.stat()
+        except OSError:
+            return 'missing'
+        known = self.file_hashes.get(rel_path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        self.file_hashes[rel_path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def glob_digest(self, pattern: str) -> str:
+        """Hash of every file matching `pattern` ('dir/**' matches recursively, '*.xml' only the root)"""
+        if pattern not in self.glob_digests:
+            if pattern.endswith('/**'):
+                prefix = pattern[:-2]
+                matches = [p for p in self.project_files() if p.startswith(prefix)]
+            else:
+                # fnmatch's '*' also matches '/': a pattern without a directory
+                # part only names files in the project root
+                top_level = '/' not in pattern
+                matches = [p for p in self.project_files()
+                           if (not top_level or '/' not in p) and fnmatch.fnmatchcase(p, pattern)]
+            digest = hashlib.sha256()
+            for rel_path in matches:
+                digest.update(f"{rel_path}\0{self.file_digest(rel_path)}\n".encode('utf-8'))
+            self.glob_digests[pattern] = digest.hexdigest()
+        return self.glob_digests[pattern]
+
+    def key(self, command: str) -> str:
+        digest = hashlib.sha256(command.encode('utf-8'))
+        for pattern in inputs_for(command):
+            digest.update(f"\0{pattern}={self.glob_digest(pattern)}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, command: str) -> Optional[Dict[str, Any]]:
+        """Stored result for `command` with its current inputs, or None"""
+        try:
+            with open(self.cache_dir / f"{self.key(command)}.json", 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, command: str, result: Dict[str, Any]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{self.key(command)}.json"
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(result, command=command), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def invalidate(self) -> None:
+        """Forget per-run digests, e.g. after a command rewrote project files"""
+        self.glob_digests.clear()
+        self.files = None
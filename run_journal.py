@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Per-item checkpoint journal for the long-running test/tool runners.
+
+Every finished item is committed to a small SQLite database in WAL mode as
+soon as its verdict is known, so a run killed at item 380 (OOM, reboot,
+Ctrl+C) keeps the 379 results before it.  With --resume a runner reopens the
+latest unfinished run, skips the journaled items and rebuilds its counters
+from the stored records.
+
+    journal = RunJournal(JOURNAL_FILE, 'sequential-450')
+    done = journal.start(resume=args.resume)      # {key: record} already finished
+    ...
+    journal.record(str(test.number), 'passed', {...})
+    journal.finish()
+
+    python3 run_journal.py reports/task4_execution/run_journal.sqlite   # list runs
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+# Finished runs beyond this many per runner are pruned when a new run starts
+KEEP_RUNS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    runner TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    record TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, key)
+);
+"""
+
+
+def connect(path: Union[str, Path]) -> sqlite3.Connection:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path))
+    # WAL: each item is one small append; FULL: a commit survives power loss, not just a crash
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = FULL")
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class RunJournal:
+    """Durable record of the items one runner has finished"""
+
+    def __init__(self, path: Union[str, Path], runner: str):
+        self.path = Path(path)
+        self.runner = runner
+        self.connection: Optional[sqlite3.Connection] = None
+        self.run_id: Optional[int] = None
+        self.started_at: Optional[datetime] = None
+
+    def start(self, resume: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Open a run and return {key: record} of the items it already finished.
+
+        With `resume` the latest unfinished run of this runner is continued
+        (a new run is started when there is none); otherwise a new run starts.
+        """
+        self.connection = connect(self.path)
+        row = None
+        if resume:
+            row = self.connection.execute(
+                "SELECT id, started_at FROM runs WHERE runner = ? AND finished_at IS NULL "
+                "ORDER BY id DESC LIMIT 1", (self.runner,)).fetchone()
+        if row:
+            self.run_id, started_at = row
+            self.started_at = datetime.fromisoformat(started_at)
+        else:
+            self.started_at = datetime.now()
+            with self.connection:
+                self.run_id = self.connection.execute(
+                    "INSERT INTO runs (runner, started_at) VALUES (?, ?)",
+                    (self.runner, self.started_at.isoformat())).lastrowid
+                self._prune()
+        return self.completed()
+
+    def _prune(self) -> None:
+        self.connection.execute(
+            "DELETE FROM runs WHERE runner = ? AND id NOT IN "
+            "(SELECT id FROM runs WHERE runner = ? ORDER BY id DESC LIMIT ?)",
+            (self.runner, self.runner, KEEP_RUNS))
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        rows = self.connection.execute(
+            "SELECT key, record FROM items WHERE run_id = ? ORDER BY rowid", (self.run_id,))
+        return {key: json.loads(record) for key, record in rows}
+
+    def record(self, key: str, status: str, record: Dict[str, Any]) -> None:
+        """Commit one finished item (replacing an earlier record of the same key)"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO items (run_id, key, status, record, finished_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, key, status, json.dumps(record, ensure_ascii=False, default=str),
+                 datetime.now().isoformat()))
+
+    def finish(self) -> None:
+        """Mark the run complete so --resume starts a fresh one next time"""
+        with self.connection:
+            self.connection.execute("UPDATE runs SET finished_at = ? WHERE id = ?",
+                                    (datetime.now().isoformat(), self.run_id))
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.close()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="List the runs recorded in a run journal")
+    parser.add_argument('journal', type=Path)
+    args = parser.parse_args()
+
+    if not args.journal.exists():
+        print(f"{args.journal}: no journal")
+        return 1
+    connection = connect(args.journal)
+    rows = connection.execute(
+        "SELECT runs.id, runner, started_at, runs.finished_at, COUNT(items.key), "
+        "SUM(items.status NOT IN ('passed', 'success')) "
+        "FROM runs LEFT JOIN items ON items.run_id = runs.id GROUP BY runs.id ORDER BY runs.id")
+    print(f"{'run':>4}  {'runner':<16} {'started':<19}  {'state':<9} {'items':>6} {'problems':>8}")
+    for run_id, runner, started, finished, items, problems in rows:
+        state = 'finished' if finished else 'open'
+        print(f"{run_id:>4}  {runner:<16} {started[:19]:<19}  {state:<9} {items:>6} {problems or 0:>8}")
+    connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Concurrent, pipelined SFTP uploads for upload_laravel_files.py.
+
+`sftp.put` per file waits for every round trip: open, the write acks, close,
+then a confirming stat.  The engine instead opens several SFTP channels on
+the one SSH transport (each with a large flow-control window) and lets each
+channel's thread upload its own file with pipelined writes, so requests
+for several files are in flight at once:
+
+    engine = SftpTransferEngine(ssh_client.get_transport(), channels=4)
+    uploaded = engine.upload([('app/Models/User.php', '/home/u/public_html/app/Models/User.php'), ...])
+
+Remote directories must already exist (see remote_tree.py).  Throughput is
+logged while the upload runs and summarised at the end.
+
+Benchmark against any SSH server (e.g. OpenSSH on localhost or in a
+container), comparing sequential `put` with 1, 4 and 8 channels:
+
+    python3 sftp_transfer.py bench --host 127.0.0.1 --port 22 --user me --files 500 --size 16384
+"""
+
+import argparse
+import getpass
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple
+
+import paramiko
+
+from ftp_upload_pool import ThroughputMeter
+
+DEFAULT_CHANNELS = 4
+# Per-channel SSH window: enough unacknowledged data in flight to cover the round trip
+WINDOW_SIZE = 8 * 1024 * 1024
+MAX_PACKET_SIZE = 64 * 1024
+
+
+class SftpTransferEngine:
+    """Uploads files over `channels` SFTP sessions sharing one SSH transport"""
+
+    def __init__(self, transport: paramiko.Transport, channels: int = DEFAULT_CHANNELS,
+                 window_size: int = WINDOW_SIZE, log: Callable[[str], None] = print):
+        self.transport = transport
+        self.channels = max(1, channels)
+        self.window_size = window_size
+        self.log = log
+        self.meter = None
+
+    def open_channel(self) -> paramiko.SFTPClient:
+        return paramiko.SFTPClient.from_transport(self.transport, window_size=self.window_size,
+                                                  max_packet_size=MAX_PACKET_SIZE)
+
+    def upload(self, files: Sequence[Tuple[str, str]]) -> List[str]:
+        """Upload [(local path, absolute remote path)] and return the remote paths that succeeded"""
+        if not files:
+            return []
+        work: "queue.Queue[Tuple[str, str, int]]" = queue.Queue()
+        total = 0
+        for local_path, remote_path in files:
+            size = os.path.getsize(local_path)
+            total += size
+            work.put((local_path, remote_path, size))
+        self.meter = ThroughputMeter(len(files), total, self.log)
+        uploaded: List[str] = []
+        lock = threading.Lock()
+
+        def worker(sftp: paramiko.SFTPClient) -> None:
+            try:
+                while True:
+                    try:
+                        local_path, remote_path, size = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        with open(local_path, 'rb') as f:
+                            # Pipelined writes; errors surface when the file is closed
+                            sftp.putfo(f, remote_path, size, confirm=False)
+                    except Exception as e:
+                        self.log(f"  ❌ Error uploading {local_path}: {e}")
+                        self.meter.add(failed=True)
+                        continue
+                    with lock:
+                        uploaded.append(remote_path)
+                    self.meter.add(size)
+            finally:
+                sftp.close()
+
+        # Open every channel before any upload starts; servers may cap sessions
+        # (OpenSSH MaxSessions), so carry on with the channels that did open
+        sessions = []
+        for _ in range(min(self.channels, len(files))):
+            try:
+                sessions.append(self.open_channel())
+            except (paramiko.SSHException, OSError) as e:
+                if not sessions:
+                    raise
+                self.log(f"Only {len(sessions)} SFTP channel(s) available: {e}")
+                break
+        threads = [threading.Thread(target=worker, args=(sftp,), name=f"sftp-{i + 1}", daemon=True)
+                   for i, sftp in enumerate(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.log(self.meter.describe())
+        return uploaded
+
+
+def benchmark(ssh: paramiko.SSHClient, files: int, size: int, channel_counts: Sequence[int]) -> None:
+    """Upload the same generated files sequentially and with each channel count"""
+    sftp = ssh.open_sftp()
+    remote_base = f"sftp_bench_{os.getpid()}"
+    with tempfile.TemporaryDirectory() as local_dir:
+        local_files = []
+        for i in range(files):
+            path = Path(local_dir) / f"f{i:05d}.bin"
+            path.write_bytes(os.urandom(size))
+            local_files.append(str(path))
+        total_mb = files * size / 1024 / 1024
+
+        def run(label: str, target: str, upload: Callable[[List[Tuple[str, str]]], None]) -> None:
+            sftp.mkdir(target)
+            pairs = [(path, f"{target}/{Path(path).name}") for path in local_files]
+            start = time.perf_counter()
+            upload(pairs)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<14} {elapsed:>7.2f}s {total_mb / elapsed:>8.2f} MB/s {files / elapsed:>8.1f} files/s")
+            for _, remote in pairs:
+                sftp.remove(remote)
+            sftp.rmdir(target)
+
+        sftp.mkdir(remote_base)
+        try:
+            print(f"{files} files x {size} bytes ({total_mb:.1f} MB)")
+            run("sftp.put", f"{remote_base}/put",
+                lambda pairs: [sftp.put(local, remote) for local, remote in pairs])
+            for channels in channel_counts:
+                engine = SftpTransferEngine(ssh.get_transport(), channels=channels, log=lambda message: None)
+                run(f"{channels} channel(s)", f"{remote_base}/c{channels}", engine.upload)
+        finally:
+            sftp.rmdir(remote_base)
+            sftp.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SFTP transfer engine")
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench = commands.add_parser('bench', help="compare sequential put with concurrent pipelined uploads")
+    bench.add_argument('--host', default='127.0.0.1')
+    bench.add_argument('--port', type=int, default=22)
+    bench.add_argument('--user', default=getpass.getuser())
+    bench.add_argument('--password', default=os.environ.get('SFTP_PASSWORD'),
+                       help="defaults to $SFTP_PASSWORD, then SSH keys/agent")
+    bench.add_argument('--files', type=int, default=500)
+    bench.add_argument('--size', type=int, default=16 * 1024, help="bytes per file")
+    bench.add_argument('--channels', default='1,4,8', help="comma-separated channel counts")
+    args = parser.parse_args()
+
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(args.host, port=args.port, username=args.user, password=args.password, timeout=30)
+    try:
+        benchmark(ssh, args.files, args.size, [int(c) for c in args.channels.split(',')])
+    finally:
+        ssh.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Sharded coordinator/worker execution of the COPRRA inventory.
+
+The coordinator splits the inventory into one shard per worker, balanced
+longest-processing-time-first on the recorded durations, and writes every
+item as a small JSON file into a filesystem queue.  Workers claim items with
+an atomic rename (their own shard first, then stealing from the others), run
+them exactly like Task4Executor does and write per-item results into
+reports/task4_execution/json_results, which the coordinator merges.
+
+Workers on other machines only need the project checkout and the queue
+directory on a shared mount:
+
+    python3 shard_runner.py coordinator --workers 8 --spawn 4   # 4 local workers
+    python3 shard_runner.py worker --id 5                       # on another node
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from duration_history import DurationHistory, estimate_makespan
+from execute_task4_intelligent import (
+    INVENTORY_CACHE, INVENTORY_FILE, REPORTS_DIR, TIMEOUT_SECONDS, Colors, Task4Executor,
+    json_result_path
+)
+from inventory_loader import InventoryError, TestItem, load_inventory
+
+QUEUE_DIR = REPORTS_DIR / "shard_queue"
+RESULTS_DIR = json_result_path(0).parent
+POLL_SECONDS = 1.0
+# A claim older than this is assumed to belong to a dead worker and is requeued
+STALE_CLAIM_SECONDS = TIMEOUT_SECONDS * 2
+
+
+def write_json(path: Path, data: Dict) -> None:
+    """Write JSON atomically so readers on other nodes never see partial files"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def outstanding_claims(queue_dir: Path) -> List[Path]:
+    """Items claimed by some worker that are not done yet"""
+    return list((queue_dir / "claimed").glob('*/*.json'))
+
+
+def requeue_stale_claims(queue_dir: Path) -> None:
+    """Put items claimed longer than STALE_CLAIM_SECONDS ago back in the queue"""
+    now = time.time()
+    for claim in outstanding_claims(queue_dir):
+        try:
+            if now - claim.stat().st_mtime > STALE_CLAIM_SECONDS:
+                target = queue_dir / "pending" / "shard_0" / claim.name
+                os.rename(claim, target)
+                print(f"{Colors.YELLOW}⟳ إعادة جدولة عنصر متروك: {claim.name}{Colors.NC}")
+        except OSError:
+            continue
+
+
+class ShardCoordinator:
+    """Builds the shard queue, optionally spawns local workers and merges results"""
+
+    def __init__(self, workers: int, queue_dir: Path = QUEUE_DIR):
+        self.workers = workers
+        self.queue_dir = Path(queue_dir)
+        self.history = DurationHistory()
+
+    def plan(self, tests: List[TestItem]) -> List[List[TestItem]]:
+        """Greedy LPT assignment of items to the least-loaded shard"""
+        self.history.ingest_batch_logs(REPORTS_DIR / "batch_logs")
+        ordered = self.history.order_longest_first(tests, lambda test: test.command)
+        shards: List[List[TestItem]] = [[] for _ in range(self.workers)]
+        loads = [0.0] * self.workers
+        for test in ordered:
+            target = loads.index(min(loads))
+            shards[target].append(test)
+            loads[target] += min(self.history.estimate(test.command), TIMEOUT_SECONDS)
+
+        durations = [min(self.history.estimate(t.command), TIMEOUT_SECONDS) for t in ordered]
+        print(f"{Colors.CYAN}تقدير المدة: ~{estimate_makespan(durations, self.workers) / 60:.1f} دقيقة "
+              f"على {self.workers} عامل (الحمل لكل شظية: "
+              f"{', '.join(f'{load / 60:.1f}' for load in loads)} دقيقة){Colors.NC}")
+        return shards
+
+    def enqueue(self, shards: List[List[TestItem]]) -> int:
+        # Start from an empty queue and drop results of a previous run
+        shutil.rmtree(self.queue_dir, ignore_errors=True)
+        for test in (test for shard in shards for test in shard):
+            json_result_path(test.number).unlink(missing_ok=True)
+        for sub in ('pending', 'claimed', 'done'):
+            (self.queue_dir / sub).mkdir(parents=True, exist_ok=True)
+        total = 0
+        for shard_id, shard in enumerate(shards):
+            shard_dir = self.queue_dir / "pending" / f"shard_{shard_id}"
+            shard_dir.mkdir(parents=True, exist_ok=True)
+            for position, test in enumerate(shard):
+                # The position prefix keeps each shard longest-first in name order
+                write_json(shard_dir / f"{position:04d}_{test.number:03d}.json", test.definition())
+                total += 1
+        return total
+
+    def spawn(self, count: int) -> List[subprocess.Popen]:
+        """Start local worker processes"""
+        script = Path(__file__).resolve()
+        return [
+            subprocess.Popen([sys.executable, str(script), 'worker', '--id', str(worker_id),
+                              '--queue', str(self.queue_dir)])
+            for worker_id in range(count)
+        ]
+
+    def wait(self, total: int, processes: List[subprocess.Popen]) -> None:
+        done_dir = self.queue_dir / "done"
+        while True:
+            done = len(list(done_dir.glob('*.json')))
+            print(f"\r{Colors.MAGENTA}التقدم: {done}/{total}{Colors.NC}", end='', flush=True)
+            if done >= total:
+                break
+            if processes and all(p.poll() is not None for p in processes):
+                # Local workers exited before the queue drained (crash or kill)
+                print(f"\n{Colors.YELLOW}⚠ توقفت جميع العمليات المحلية قبل الانتهاء{Colors.NC}")
+                return
+            requeue_stale_claims(self.queue_dir)
+            time.sleep(POLL_SECONDS)
+        print()
+        for process in processes:
+            process.wait()
+
+    def merge(self, tests: List[TestItem]) -> Dict:
+        summary = {'total': len(tests), 'passed': 0, 'failed': 0, 'skipped': 0, 'errors': 0}
+        workers: Dict[str, int] = {}
+        results = []
+        for test in tests:
+            try:
+                with open(json_result_path(test.number), 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                summary['skipped'] += 1
+                continue
+            results.append(result)
+            status = result.get('status')
+            if status in ('passed', 'failed'):
+                summary[status] += 1
+            else:
+                summary['errors'] += 1
+            workers[result.get('worker', '?')] = workers.get(result.get('worker', '?'), 0) + 1
+            if result.get('execution_time'):
+                self.history.record(result['command'], result['execution_time'])
+        self.history.save()
+
+        write_json(RESULTS_DIR / "summary.json", {
+            'generated_at': datetime.now().isoformat(),
+            'results': summary,
+            'workers': workers,
+            'tests': [r['number'] for r in results],
+        })
+        return summary
+
+    def run(self, spawn: int) -> Dict:
+        try:
+            tests = load_inventory(INVENTORY_FILE, INVENTORY_CACHE)
+        except InventoryError as e:
+            print(f"{Colors.RED}✗ خطأ في ملف القائمة: {e}{Colors.NC}")
+            sys.exit(1)
+
+        total = self.enqueue(self.plan(tests))
+        print(f"{Colors.GREEN}✓ تمت جدولة {total} عنصر في {self.queue_dir}{Colors.NC}")
+        processes = self.spawn(spawn) if spawn else []
+        self.wait(total, processes)
+        summary = self.merge(tests)
+        print(f"{Colors.CYAN}✓ {summary['passed']} | ✗ {summary['failed']} | "
+              f"⚠ {summary['errors']} | ⊘ {summary['skipped']}{Colors.NC}")
+        return summary
+
+
+class ShardWorker:
+    """Claims queued items and executes them until no item is pending or claimed"""
+
+    def __init__(self, worker_id: int, queue_dir: Path = QUEUE_DIR):
+        self.worker_id = worker_id
+        self.name = f"{socket.gethostname()}:{worker_id}"
+        self.queue_dir = Path(queue_dir)
+        self.claim_dir = self.queue_dir / "claimed" / f"worker_{worker_id}_{os.getpid()}"
+        self.executor = Task4Executor()
+
+    def shard_order(self) -> List[Path]:
+        """Own shard first, then the others to steal from"""
+        pending = self.queue_dir / "pending"
+        shards = sorted(p for p in pending.iterdir() if p.is_dir())
+        own = pending / f"shard_{self.worker_id}"
+        return ([own] if own in shards else []) + [s for s in shards if s != own]
+
+    def claim(self) -> Optional[Path]:
+        for shard in self.shard_order():
+            for candidate in sorted(shard.glob('*.json')):
+                target = self.claim_dir / candidate.name
+                try:
+                    # rename is atomic: exactly one worker wins each item
+                    os.rename(candidate, target)
+                except OSError:
+                    continue
+                # Stale-claim detection is based on the claim time
+                os.utime(target)
+                return target
+        return None
+
+    def run(self) -> int:
+        self.claim_dir.mkdir(parents=True, exist_ok=True)
+        (REPORTS_DIR / "individual_outputs").mkdir(parents=True, exist_ok=True)
+        executed = 0
+        while True:
+            claim = self.claim()
+            if claim is None:
+                # Another worker may still die holding a claim: stay until it is
+                # done or requeued as stale, so the item is not lost
+                if not outstanding_claims(self.queue_dir):
+                    break
+                requeue_stale_claims(self.queue_dir)
+                time.sleep(POLL_SECONDS)
+                continue
+            with open(claim, 'r', encoding='utf-8') as f:
+                test = TestItem(**json.load(f))
+            test = self.executor.execute_test(test)
+
+            self.executor.save_json_result(test, worker=self.name)
+            os.replace(claim, self.queue_dir / "done" / claim.name)
+            executed += 1
+            print(f"[{self.name}] #{test.number:03d} {test.status} ({test.execution_time:.1f}s)", flush=True)
+
+        self.executor.budget.stop()
+        self.executor.budget.save()
+        try:
+            self.claim_dir.rmdir()
+        except OSError:
+            pass
+        return executed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sharded execution of the COPRRA inventory")
+    sub = parser.add_subparsers(dest='role', required=True)
+
+    coordinator = sub.add_parser('coordinator', help='shard the inventory and merge the results')
+    coordinator.add_argument('--workers', type=int, default=4, help='number of shards')
+    coordinator.add_argument('--spawn', type=int, default=None,
+                             help='local worker processes to start (default: one per shard)')
+    coordinator.add_argument('--queue', type=Path, default=QUEUE_DIR)
+
+    worker = sub.add_parser('worker', help='execute queued items')
+    worker.add_argument('--id', type=int, required=True, help='preferred shard')
+    worker.add_argument('--queue', type=Path, default=QUEUE_DIR)
+
+    args = parser.parse_args()
+    if args.role == 'coordinator':
+        spawn = args.workers if args.spawn is None else args.spawn
+        ShardCoordinator(args.workers, args.queue).run(spawn)
+    else:
+        ShardWorker(args.id, args.queue).run()
+
+
+if __name__ == "__main__":
+    main()
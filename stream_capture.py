@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory subprocess output capture for the COPRRA test/tool runners.
+
+stdout/stderr are spooled straight to the per-item output file while only a
+bounded head and tail of each stream stay in memory for the reports.  Callers
+can inspect the stream as it arrives (e.g. output_classifier.OutputClassifier)
+through the `on_chunk` callback instead of re-reading the whole output.
+"""
+
+import codecs
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional
+
+CHUNK_SIZE = 64 * 1024
+HEAD_CHARS = 2000
+TAIL_CHARS = 2000
+# How long to wait for the output pipes to drain after a kill
+DRAIN_SECONDS = 5
+# How long a timed-out process tree gets between SIGTERM and SIGKILL
+KILL_GRACE_SECONDS = 5
+GROUP_POLL_SECONDS = 0.05
+
+
+def isolated_popen_kwargs() -> dict:
+    """Popen arguments that start the command in its own process group"""
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def terminate_tree(process: subprocess.Popen, grace: float = KILL_GRACE_SECONDS) -> int:
+    """Terminate the process and everything it spawned, gracefully then hard.
+
+    With shell=True, killing only the Popen handle kills /bin/sh and leaves the
+    php/phpunit grandchildren running; signalling the whole process group
+    (started via isolated_popen_kwargs) reaches them too.
+    """
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return process.wait()
+
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return process.wait()
+    # The grace period covers the whole group: /bin/sh exits on SIGTERM at once,
+    # while php/phpunit may still be shutting down
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline:
+        process.poll()  # reap the leader so a zombie does not keep the group alive
+        try:
+            os.killpg(process.pid, 0)
+        except ProcessLookupError:
+            return process.wait()
+        time.sleep(GROUP_POLL_SECONDS)
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    return process.wait()
+
+
+class BoundedBuffer:
+    """Keeps the first `head_limit` and last `tail_limit` characters of a stream"""
+
+    def __init__(self, head_limit: int = HEAD_CHARS, tail_limit: int = TAIL_CHARS):
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self.head = ''
+        self.tail = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, text: str) -> None:
+        self.total += len(text)
+        if len(self.head) < self.head_limit:
+            room = self.head_limit - len(self.head)
+            self.head += text[:room]
+            text = text[room:]
+        if not text or self.tail_limit <= 0:
+            return
+        self.tail.append(text)
+        self.tail_size += len(text)
+        while self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            self.tail_size -= len(self.tail.popleft())
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > self.head_limit + self.tail_limit
+
+    def text(self, marker: str = "\n... ({omitted} chars omitted) ...\n") -> str:
+        tail = ''.join(self.tail)
+        if not self.truncated:
+            return self.head + tail
+        tail = tail[-self.tail_limit:]
+        omitted = self.total - len(self.head) - len(tail)
+        return self.head + marker.format(omitted=omitted) + tail
+
+    def __bool__(self) -> bool:
+        return self.total > 0
+
+
+class CaptureResult:
+    """Outcome of a streamed command"""
+    def __init__(self):
+        self.returncode: Optional[int] = None
+        self.timed_out = False
+        self.duration = 0.0
+        self.pid: Optional[int] = None
+        self.stdout = BoundedBuffer()
+        self.stderr = BoundedBuffer()
+
+
+def _pump(pipe, sink, buffer: BoundedBuffer, stream: str,
+          on_chunk: Optional[Callable[[str, str], None]]) -> None:
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    try:
+        for data in iter(lambda: pipe.read1(CHUNK_SIZE), b''):
+            text = decoder.decode(data)
+            sink.write(text)
+            buffer.write(text)
+            if on_chunk and text:
+                on_chunk(stream, text)
+        text = decoder.decode(b'', final=True)
+        if text:
+            sink.write(text)
+            buffer.write(text)
+            if on_chunk:
+                on_chunk(stream, text)
+    except ValueError:
+        # The sink was closed after a kill while an orphan still held the pipe
+        pass
+
+
+def run_streaming(command: str, output_path: Path, timeout: float,
+                  header: str = '', stdout_label: str = 'STDOUT:\n',
+                  stderr_label: str = '\nSTDERR:\n',
+                  footer: Callable[[CaptureResult], str] = lambda result: '',
+                  on_chunk: Optional[Callable[[str, str], None]] = None,
+                  on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+                  cwd: Optional[Path] = None) -> CaptureResult:
+    """Run `command` through the shell, spooling its output to `output_path`.
+
+    The file receives `header`, the labelled stdout, the labelled stderr (kept
+    in a temporary spool until the command ends so the streams are not
+    interleaved) and `footer(result)`.  `on_chunk(stream, text)` is called
+    from one reader thread per stream.  Launch errors propagate to the caller.
+    """
+    result = CaptureResult()
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.time()
+
+    with open(output_path, 'w', encoding='utf-8') as out, \
+            tempfile.TemporaryFile('w+', encoding='utf-8') as err_spool:
+        out.write(header)
+        out.write(stdout_label)
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            **isolated_popen_kwargs()
+        )
+        result.pid = process.pid
+        if on_start:
+            on_start(process)
+
+        readers = [
+            threading.Thread(target=_pump, args=(process.stdout, out, result.stdout, 'stdout', on_chunk)),
+            threading.Thread(target=_pump, args=(process.stderr, err_spool, result.stderr, 'stderr', on_chunk)),
+        ]
+        for reader in readers:
+            reader.daemon = True
+            reader.start()
+
+        try:
+            result.returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            result.timed_out = True
+            result.returncode = terminate_tree(process)
+        drain_deadline = time.time() + DRAIN_SECONDS
+        for reader in readers:
+            reader.join(max(0.0, drain_deadline - time.time()) if result.timed_out else None)
+        result.duration = time.time() - start
+
+        out.write(stderr_label)
+        err_spool.seek(0)
+        shutil.copyfileobj(err_spool, out)
+        out.write(footer(result))
+
+    return result
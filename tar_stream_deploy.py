@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Single-archive streaming deploy over SSH.
+
+Instead of one SFTP round trip sequence per file, the deploy tree is
+written as a tar stream, compressed on the fly (gzip, or zstd when the
+`zstandard` package is installed locally and `zstd` exists on the server)
+and sent down one exec channel running `tar -x` in the target directory.
+Nothing is staged on local disk; the transfer is a single sequential,
+bandwidth-bound stream:
+
+    stats = stream_deploy(ssh_client, walk_sources(sources, should_exclude),
+                          "/home/u990109832/public_html", compression="auto")
+    print(stats.describe())
+
+Files are hashed while they are streamed; once the extraction succeeded the
+delta-sync manifest is written beside remote_dir (deploy_manifest.manifest_path)
+so a later delta sync only sends what changed since this deploy.  Extraction
+overwrites in place and does not remove files that no longer exist locally.
+"""
+
+import gzip
+import hashlib
+import shlex
+import tarfile
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Tuple
+
+from deploy_manifest import MANIFEST_NAME, dump_manifest, manifest_path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = ("auto", "gzip", "zstd")
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# A large channel window keeps the link busy while the server acknowledges data
+WINDOW_SIZE = 16 * 1024 * 1024
+COPY_BUFFER = 256 * 1024
+
+
+class StreamDeployError(Exception):
+    """Raised when the remote extraction fails"""
+
+
+class ChannelClosed(OSError):
+    """The remote side stopped reading (tar exited early)"""
+
+
+class ChannelWriter:
+    """File-like sink that sends everything written to an SSH channel"""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.sent = 0
+
+    def write(self, data) -> int:
+        try:
+            self.channel.sendall(data)
+        except OSError as e:
+            raise ChannelClosed(str(e)) from e
+        self.sent += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+class HashingReader:
+    """Wraps a binary file and hashes what tarfile reads from it"""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.digest.update(data)
+        return data
+
+
+class StreamStats:
+    def __init__(self, compression: str):
+        self.compression = compression
+        self.files = 0
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+        self.seconds = 0.0
+
+    def describe(self) -> str:
+        seconds = max(self.seconds, 1e-9)
+        ratio = self.sent_bytes / self.raw_bytes if self.raw_bytes else 0
+        return (f"{self.files} files, {self.raw_bytes / 1024 / 1024:.1f} MB -> "
+                f"{self.sent_bytes / 1024 / 1024:.1f} MB {self.compression} ({ratio:.0%}) in {seconds:.1f}s, "
+                f"{self.sent_bytes / 1024 / 1024 / seconds:.2f} MB/s on the wire, "
+                f"{self.raw_bytes / 1024 / 1024 / seconds:.2f} MB/s effective")
+
+
+def remote_has_zstd(ssh_client) -> bool:
+    stdin, stdout, stderr = ssh_client.exec_command("command -v zstd >/dev/null && echo yes")
+    return stdout.read().strip() == b"yes"
+
+
+def resolve_compression(ssh_client, compression: str) -> str:
+    """'auto' picks zstd when both ends support it, gzip otherwise"""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"unknown compression {compression!r} (expected one of {', '.join(COMPRESSIONS)})")
+    if compression == "gzip":
+        return "gzip"
+    available = zstandard is not None and remote_has_zstd(ssh_client)
+    if compression == "zstd" and not available:
+        raise StreamDeployError("zstd needs the zstandard package locally and the zstd binary on the server")
+    return "zstd" if available else "gzip"
+
+
+def extract_command(remote_dir: str, compression: str) -> str:
+    target = shlex.quote(remote_dir)
+    if compression == "zstd":
+        extract = f"zstd -dc | tar -xf - -C {target} --no-same-owner"
+    else:
+        extract = f"tar -xzf - -C {target} --no-same-owner"
+    return f"mkdir -p {target} && {extract}"
+
+
+def normalized_info(stat, arcname: str) -> tarfile.TarInfo:
+    """Archive entry with neutral ownership and web-server friendly permissions"""
+    info = tarfile.TarInfo(arcname)
+    info.size = stat.st_size
+    info.mtime = int(stat.st_mtime)
+    info.mode = 0o755 if stat.st_mode & 0o111 else 0o644
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    return info
+
+
+def stream_deploy(ssh_client, files: Iterable[Tuple[Path, str]], remote_dir: str,
+                  compression: str = "auto", log: Callable[[str], None] = print) -> StreamStats:
+    """Stream [(local file, path relative to remote_dir)] as one compressed tar into remote_dir"""
+    compression = resolve_compression(ssh_client, compression)
+    stats = StreamStats(compression)
+    channel = ssh_client.get_transport().open_session(window_size=WINDOW_SIZE)
+    channel.exec_command(extract_command(remote_dir, compression))
+    writer = ChannelWriter(channel)
+    if compression == "zstd":
+        compressed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(writer, closefd=False)
+    else:
+        compressed = gzip.GzipFile(fileobj=writer, mode="wb", compresslevel=GZIP_LEVEL)
+
+    log(f"Streaming {compression} tar to {remote_dir}...")
+    start = time.perf_counter()
+    manifest = {}
+    interrupted = None
+    try:
+        with tarfile.open(fileobj=compressed, mode="w|", bufsize=COPY_BUFFER) as archive:
+            for path, arcname in files:
+                stat = path.stat()
+                info = normalized_info(stat, arcname)
+                with open(path, "rb") as f:
+                    reader = HashingReader(f)
+                    archive.addfile(info, reader)
+                manifest[arcname] = {"size": info.size, "mtime": stat.st_mtime_ns,
+                                     "sha256": reader.digest.hexdigest()}
+                stats.files += 1
+                stats.raw_bytes += info.size
+        compressed.close()
+        channel.shutdown_write()
+    except ChannelClosed as e:
+        # The remote side went away (bad path, disk full, ...): report its stderr too
+        interrupted = e
+    except BaseException:
+        # A local failure (file vanished or unreadable, ...): without EOF the
+        # remote tar would wait on stdin forever
+        channel.close()
+        raise
+
+    exit_status = channel.recv_exit_status()
+    error = channel.makefile_stderr("rb").read().decode("utf-8", errors="ignore").strip()
+    channel.close()
+    stats.seconds = time.perf_counter() - start
+    stats.sent_bytes = writer.sent
+    if exit_status != 0 or interrupted:
+        raise StreamDeployError(f"remote tar exited with {exit_status}: {error or interrupted}")
+    write_manifest(ssh_client, remote_dir, dump_manifest(manifest))
+    log(stats.describe())
+    return stats
+
+
+def write_manifest(ssh_client, remote_dir: str, data: bytes) -> None:
+    """Store the manifest outside remote_dir (the docroot serves *.json) and drop an old copy inside it"""
+    stdin, stdout, stderr = ssh_client.exec_command(
+        f"cat > {shlex.quote(manifest_path(remote_dir))} && "
+        f"rm -f {shlex.quote(remote_dir.rstrip('/') + '/' + MANIFEST_NAME)}")
+    stdin.write(data)
+    stdin.channel.shutdown_write()
+    if stdout.channel.recv_exit_status() != 0:
+        raise StreamDeployError(f"could not write the deploy manifest: "
+                                f"{stderr.read().decode('utf-8', errors='ignore').strip()}")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Dependency-aware work-queue scheduler for the COPRRA test/tool runners.
+
+Instead of slicing the command list into fixed batches, every free worker
+slot is refilled as soon as it frees up with the next item whose declared
+dependencies have already finished.
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class SchedulerError(Exception):
+    """Raised when the dependency graph cannot be scheduled"""
+
+
+def default_key(item: Any) -> str:
+    """Items are identified by their name (dict key or attribute)"""
+    if isinstance(item, dict):
+        return item['name']
+    return item.name
+
+
+def default_dependencies(item: Any) -> Iterable[str]:
+    """Dependencies are declared as a list of item names in `depends_on`"""
+    if isinstance(item, dict):
+        return item.get('depends_on', [])
+    return getattr(item, 'depends_on', [])
+
+
+class DependencyScheduler:
+    """Runs items on a fixed worker pool while honouring declared dependencies.
+
+    A dependency only constrains ordering: a dependent item starts after all of
+    its dependencies have finished, whatever their verdict was.
+
+    When `estimate` is given, ready items are started longest critical path
+    first (the item's own expected duration plus its longest chain of
+    dependents); otherwise they start in list order.
+
+    When `admission` is given (see resource_budget.ResourceBudget), an item
+    only starts once `admission.try_acquire(item)` accepts it; lower-priority
+    items that fit may overtake one that is waiting for capacity.
+
+    When `events` is given (see progress_events.EventBus), item_started and
+    item_finished events are published with the worker thread's name and,
+    via `verdict(result)`, the item's outcome.
+    """
+
+    def __init__(self, max_workers: int,
+                 key: Callable[[Any], str] = default_key,
+                 dependencies: Callable[[Any], Iterable[str]] = default_dependencies,
+                 estimate: Optional[Callable[[Any], float]] = None,
+                 admission: Any = None, events: Any = None,
+                 verdict: Optional[Callable[[Any], str]] = None):
+        self.max_workers = max_workers
+        self.key = key
+        self.dependencies = dependencies
+        self.estimate = estimate
+        self.admission = admission
+        self.events = events
+        self.verdict = verdict
+        self.busy_time = 0.0
+        self.wall_time = 0.0
+
+    def build_graph(self, items: List[Any]) -> Dict[str, List[str]]:
+        """Validate the dependency graph and return item -> dependents"""
+        names = [self.key(item) for item in items]
+        known = set(names)
+        if len(known) != len(names):
+            duplicates = sorted({n for n in names if names.count(n) > 1})
+            raise SchedulerError(f"Duplicate item names: {', '.join(duplicates)}")
+
+        dependents: Dict[str, List[str]] = {name: [] for name in names}
+        pending: Dict[str, int] = {}
+        for item in items:
+            name = self.key(item)
+            deps = list(self.dependencies(item))
+            for dep in deps:
+                if dep not in known:
+                    raise SchedulerError(f"'{name}' depends on unknown item '{dep}'")
+                dependents[dep].append(name)
+            pending[name] = len(deps)
+
+        # Kahn's algorithm: anything left unvisited sits on a cycle
+        ready = [name for name, count in pending.items() if count == 0]
+        visited = 0
+        remaining = dict(pending)
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for child in dependents[name]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if visited != len(items):
+            cycle = sorted(name for name, count in remaining.items() if count > 0)
+            raise SchedulerError(f"Dependency cycle between: {', '.join(cycle)}")
+
+        return dependents
+
+    def priorities(self, items: List[Any], dependents: Dict[str, List[str]]) -> Dict[str, float]:
+        """Critical-path length from each item to the end of the run"""
+        if self.estimate is None:
+            return {self.key(item): 0.0 for item in items}
+        by_name = {self.key(item): item for item in items}
+        ranks: Dict[str, float] = {}
+
+        def rank(name: str) -> float:
+            if name not in ranks:
+                tail = max((rank(child) for child in dependents[name]), default=0.0)
+                ranks[name] = self.estimate(by_name[name]) + tail
+            return ranks[name]
+
+        for name in by_name:
+            rank(name)
+        return ranks
+
+    def run(self, items: List[Any], worker: Callable[[Any], Any],
+            on_result: Optional[Callable[[Any, Any], None]] = None) -> List[Any]:
+        """Execute `worker(item)` for every item and return results in completion order.
+
+        `on_result(item, result)` is invoked on the calling thread as soon as
+        each item finishes, so callers can update counters without locking.
+        """
+        dependents = self.build_graph(items)
+        ranks = self.priorities(items, dependents)
+        order = {self.key(item): index for index, item in enumerate(items)}
+        by_name = {self.key(item): item for item in items}
+        waiting = {self.key(item): len(list(self.dependencies(item))) for item in items}
+        ready: List[Any] = []
+        for item in items:
+            if waiting[self.key(item)] == 0:
+                self._push(ready, ranks, order, item)
+        results: List[Any] = []
+        running = {}
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='worker') as executor:
+            while ready or running:
+                for item in self._admit(ready, self.max_workers - len(running)):
+                    running[executor.submit(self._timed, worker, item)] = item
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    if self.admission:
+                        self.admission.release(item)
+                    result, elapsed, thread = future.result()
+                    self.busy_time += elapsed
+                    if self.events:
+                        self.events.publish('item_finished', item=self.key(item), worker=thread,
+                                            duration=elapsed,
+                                            verdict=self.verdict(result) if self.verdict else None)
+                    results.append(result)
+                    if on_result:
+                        on_result(item, result)
+
+                    for child in dependents[self.key(item)]:
+                        waiting[child] -= 1
+                        if waiting[child] == 0:
+                            self._push(ready, ranks, order, by_name[child])
+
+        self.wall_time = time.time() - start
+        return results
+
+    def utilisation(self) -> float:
+        """Fraction of worker-slot time spent running items during the last run"""
+        capacity = self.wall_time * self.max_workers
+        return self.busy_time / capacity if capacity > 0 else 0.0
+
+    def _admit(self, ready: List[Any], free_slots: int) -> List[Any]:
+        """Pop up to `free_slots` ready items, highest priority first, that fit the budget"""
+        if free_slots <= 0:
+            return []
+        if not self.admission:
+            return [heapq.heappop(ready)[2] for _ in range(min(free_slots, len(ready)))]
+
+        admitted, deferred = [], []
+        while ready and len(admitted) < free_slots:
+            entry = heapq.heappop(ready)
+            if self.admission.try_acquire(entry[2]):
+                admitted.append(entry[2])
+            else:
+                deferred.append(entry)
+        for entry in deferred:
+            heapq.heappush(ready, entry)
+        return admitted
+
+    def _push(self, ready: List[Any], ranks: Dict[str, float], order: Dict[str, int], item: Any) -> None:
+        name = self.key(item)
+        heapq.heappush(ready, (-ranks[name], order[name], item))
+
+    def _timed(self, worker: Callable[[Any], Any], item: Any):
+        thread = threading.current_thread().name
+        if self.events:
+            self.events.publish('item_started', item=self.key(item), worker=thread)
+        started = time.time()
+        return worker(item), time.time() - started, thread
@@ -18,6 +18,8 @@ from urllib.parse import urljoin
 import threading
 import queue
 
+from deployment_event_log import EventLog
+
 class UltimateDeploymentBot:
     def __init__(self):
         self.base_url = "https://coprra.com"
@@ -29,6 +31,7 @@ class UltimateDeploymentBot:
         }
         self.deployment_queue = queue.Queue()
         self.status = {"current_step": 0, "total_steps": 10, "errors": [], "success": False}
+        self.event_log = EventLog(self.project_root / "deployment_log.json")
         
     def log_step(self, step_num, title, status="RUNNING", details=""):
         """Enhanced logging with status tracking"""
@@ -54,20 +57,9 @@ class UltimateDeploymentBot:
         self.save_log_entry(log_entry)
 
     def save_log_entry(self, entry):
-        """Save log entry to file"""
-        log_file = self.project_root / "deployment_log.json"
-        
+        """Append log entry to the deployment event log"""
         try:
-            if log_file.exists():
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            else:
-                logs = []
-            
-            logs.append(entry)
-            
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
+            self.event_log.append(entry)
         except Exception as e:
             print(f"⚠️ Could not save log: {e}")
 
@@ -510,6 +502,11 @@ If issues persist:
             self.log_step(0, "Unexpected Error", "ERROR", str(e))
             print(f"\n❌ Unexpected error: {e}")
             return False
+        finally:
+            try:
+                self.event_log.compact()
+            except Exception as e:
+                print(f"⚠️ Could not compact log: {e}")
 
 def main():
     """Main execution function"""
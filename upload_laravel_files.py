@@ -3,11 +3,18 @@
 Upload COPRRA Laravel files to Hostinger via SSH
 """
 
+import argparse
 import os
+import stat
 import sys
 import paramiko
 from pathlib import Path
 
+from deploy_manifest import MANIFEST_NAME, build_manifest, manifest_path, sync, walk_sources
+from remote_tree import RemoteTree
+from sftp_transfer import DEFAULT_CHANNELS, SftpTransferEngine
+from tar_stream_deploy import COMPRESSIONS, stream_deploy
+
 # SSH Configuration
 SSH_HOST = "45.87.81.218"
 SSH_PORT = 65002
@@ -54,6 +61,9 @@ EXCLUDE_PATTERNS = [
     ".phpunit.result.cache",
 ]
 
+# Local size/mtime/SHA-256 cache so unchanged files are not re-hashed
+MANIFEST_CACHE = Path(__file__).resolve().parent / "reports" / "deploy_manifest_sftp.json"
+
 def should_exclude(path):
     """Check if path should be excluded"""
     path_str = str(path).lower()
@@ -62,9 +72,25 @@ def should_exclude(path):
             return True
     return False
 
-def upload_file(sftp, local_file, remote_file):
-    """Upload a single file"""
+def list_subdirs(sftp, remote_dir):
+    """Names of the subdirectories of remote_dir, or None if it does not exist"""
+    try:
+        return [entry.filename for entry in sftp.listdir_attr(remote_dir)
+                if stat.S_ISDIR(entry.st_mode or 0)]
+    except FileNotFoundError:
+        return None
+
+def upload_file(sftp, local_file, remote_file, tree=None):
+    """Upload a single file
+
+    With a RemoteTree whose directories were already created, remote_file is
+    relative to its root and the file is stored with a single put.
+    """
     try:
+        if tree is not None:
+            sftp.put(local_file, tree.absolute(remote_file))
+            return True
+
         # Create remote directory if needed
         remote_dir = os.path.dirname(remote_file)
         try:
@@ -115,7 +141,91 @@ def upload_directory(sftp, local_dir, remote_dir):
         elif os.path.isdir(local_path):
             upload_directory(sftp, local_path, remote_path)
 
+class SftpTransport:
+    """Delta-sync transport (deploy_manifest) over an open SFTP session"""
+
+    def __init__(self, sftp, root=REMOTE_PATH, engine=None):
+        self.sftp = sftp
+        self.root = root
+        self.engine = engine
+
+    def read_manifest(self):
+        # A manifest left inside the root by an earlier deploy is read once, then moved out
+        for path in (manifest_path(self.root), f"{self.root}/{MANIFEST_NAME}"):
+            try:
+                with self.sftp.open(path, 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                continue
+        return None
+
+    def upload(self, files):
+        # Resolve all target directories up front instead of stat-ing every ancestor per file
+        remote_files = [remote_file for _, remote_file in files]
+        tree = RemoteTree(self.root)
+        tree.scan(lambda remote_dir: list_subdirs(self.sftp, remote_dir), remote_files)
+        tree.create_missing(self.sftp.mkdir, remote_files)
+        print(f"  📁 Remote directories: {tree.describe()}")
+
+        if self.engine is not None:
+            # Several pipelined channels; the engine reports progress and MB/s
+            targets = {tree.absolute(remote_file): remote_file for _, remote_file in files}
+            uploaded = self.engine.upload([(str(local_file), tree.absolute(remote_file))
+                                           for local_file, remote_file in files])
+            return [targets[remote_path] for remote_path in uploaded]
+
+        uploaded = []
+        for local_file, remote_file in files:
+            print(f"  📤 {remote_file}")
+            if upload_file(self.sftp, str(local_file), remote_file, tree):
+                uploaded.append(remote_file)
+        return uploaded
+
+    def delete(self, remote_files):
+        deleted = []
+        for remote_file in remote_files:
+            print(f"  🗑️  {remote_file}")
+            try:
+                self.sftp.remove(f"{self.root}/{remote_file}")
+                deleted.append(remote_file)
+            except FileNotFoundError:
+                deleted.append(remote_file)
+            except Exception as e:
+                print(f"  ❌ Error deleting {remote_file}: {e}")
+        return deleted
+
+    def write_manifest(self, data):
+        # Outside the docroot, which serves any *.json file to anyone
+        with self.sftp.open(manifest_path(self.root), 'wb') as f:
+            f.write(data)
+        try:
+            self.sftp.remove(f"{self.root}/{MANIFEST_NAME}")
+        except FileNotFoundError:
+            pass
+
+def deploy_sources(local_root=LOCAL_PATH):
+    """(local path, remote path relative to REMOTE_PATH) of everything that is deployed"""
+    sources = []
+    for name in INCLUDE_DIRS + INCLUDE_FILES:
+        local = Path(local_root) / name
+        if local.exists():
+            sources.append((local, name))
+        else:
+            print(f"⚠️  Skipping {name} (not found)")
+    return sources
+
 def main():
+    parser = argparse.ArgumentParser(description="Upload changed COPRRA Laravel files to Hostinger")
+    parser.add_argument("--full", action="store_true", help="ignore the server manifest and upload everything")
+    parser.add_argument("--delete", action="store_true", help="remove files from the server that were deleted locally")
+    parser.add_argument("--dry-run", action="store_true", help="only print the sync plan")
+    parser.add_argument("--channels", type=int, default=DEFAULT_CHANNELS,
+                        help="concurrent SFTP channels (1 = sequential put)")
+    parser.add_argument("--archive", nargs="?", const="auto", choices=COMPRESSIONS,
+                        help="send everything as one compressed tar stream extracted on the server "
+                             "(default compression: auto = zstd if available, else gzip)")
+    args = parser.parse_args()
+
     print("=" * 80)
     print("🚀 UPLOADING LARAVEL FILES TO HOSTINGER")
     print("=" * 80)
@@ -127,6 +237,13 @@ def main():
         print(f"❌ Local path not found: {LOCAL_PATH}")
         return
 
+    sources = deploy_sources()
+    local = None
+    if not args.archive or args.dry_run:
+        # The archive mode hashes files while streaming them
+        print("🔍 Hashing local files...")
+        local = build_manifest(sources, exclude=should_exclude, cache=MANIFEST_CACHE)
+
     print("Connecting to SSH...")
     ssh_client = paramiko.SSHClient()
     ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -144,6 +261,12 @@ def main():
         # Open SFTP session
         sftp = ssh_client.open_sftp()
 
+        if args.dry_run:
+            sync(SftpTransport(sftp), local, delete=args.delete, full=args.full, dry_run=True,
+                 scope=[remote for _, remote in sources])
+            sftp.close()
+            return
+
         # Create backup of existing files
         print("📦 Creating backup...")
         stdin, stdout, stderr = ssh_client.exec_command(
@@ -152,27 +275,20 @@ def main():
         stdout.channel.recv_exit_status()
         print("✅ Backup created\n")
 
-        # Upload directories
-        print("📁 Uploading Laravel directories...")
-        for dir_name in INCLUDE_DIRS:
-            local_dir = os.path.join(LOCAL_PATH, dir_name)
-            if os.path.exists(local_dir):
-                print(f"\n📂 Uploading {dir_name}/...")
-                remote_dir = f"{REMOTE_PATH}/{dir_name}"
-                upload_directory(sftp, local_dir, remote_dir)
-            else:
-                print(f"⚠️  Skipping {dir_name}/ (not found)")
-
-        # Upload individual files
-        print(f"\n📄 Uploading root files...")
-        for file_name in INCLUDE_FILES:
-            local_file = os.path.join(LOCAL_PATH, file_name)
-            if os.path.exists(local_file):
-                remote_file = f"{REMOTE_PATH}/{file_name}"
-                print(f"  📤 {file_name}")
-                upload_file(sftp, local_file, remote_file)
-            else:
-                print(f"  ⚠️  Skipping {file_name} (not found)")
+        if args.archive:
+            # One tar stream over a single exec channel, extracted in place
+            print("📦 Streaming Laravel files as one archive...")
+            stream_deploy(ssh_client, walk_sources(sources, should_exclude), REMOTE_PATH,
+                          compression=args.archive, log=lambda message: print(f"  {message}"))
+        else:
+            # Upload only files added or changed since the last deploy's manifest
+            print("📁 Syncing Laravel files...")
+            engine = None
+            if args.channels > 1:
+                engine = SftpTransferEngine(ssh_client.get_transport(), channels=args.channels,
+                                            log=lambda message: print(f"  {message}"))
+            sync(SftpTransport(sftp, engine=engine), local, delete=args.delete, full=args.full,
+                 scope=[remote for _, remote in sources])
 
         # Fix permissions
         print("\n🔒 Fixing permissions...")